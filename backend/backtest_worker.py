@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Backtest job worker
+Runs queued backtests, optimizations and walk-forward analyses; start as many
+as needed on any node, they share the Redis queue
+"""
+import asyncio
+import signal
+
+from database import PostgresSessionLocal
+from services.backtest_queue import BacktestWorker
+from services.strategy_service import StrategyService
+
+async def run_job(job, progress):
+    db = PostgresSessionLocal()
+    try:
+        return await StrategyService(db).run_job(job, progress)
+    finally:
+        db.close()
+
+async def main():
+    worker = BacktestWorker(run_job)
+    loop = asyncio.get_running_loop()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        # Finish running jobs, claim no new ones
+        loop.add_signal_handler(stop_signal, worker.stop)
+    print(f"🚀 Backtest worker {worker.worker_id} started ({worker.concurrency} concurrent jobs)")
+    await worker.run()
+    print("🛑 Backtest worker stopped")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -31,9 +31,66 @@ class Settings(BaseSettings):
     # Cache Configuration
     CACHE_ENABLED: bool = True
     CACHE_TTL: int = 300  # 5 minutes
+    QUOTE_SNAPSHOT_TTL: int = 5  # seconds a bulk-fetched quote is reused by snapshots
+    PORTFOLIO_STREAM_REFRESH_SECONDS: int = 5  # quote poll interval for portfolios watched over WebSocket
     
     # Time Series Configuration (using PostgreSQL)
     TIME_SERIES_ENABLED: bool = True
+    TIMESERIES_BACKEND: str = "embedded"  # embedded (in-process SQLite) or influxdb
+    TIMESERIES_EMBEDDED_PATH: str = "data/timeseries.db"
+    TIMESERIES_RAW_RETENTION_DAYS: int = 30  # 1m points; 1h/1d rollups cover longer ranges
+    TIMESERIES_HOURLY_RETENTION_DAYS: int = 730
+    TIMESERIES_LATE_POINT_SECONDS: int = 300  # points may still land this long after their window ends
+
+    # InfluxDB (optional remote time-series backend)
+    INFLUXDB_URL: str = "http://localhost:8086"
+    INFLUXDB_TOKEN: Optional[str] = None
+    INFLUXDB_ORG: str = "trading"
+    INFLUXDB_BUCKET: str = "market_data"
+    
+    # PostgreSQL market_data partitions (monthly)
+    MARKET_DATA_RETENTION_DAYS: int = 730
+    MARKET_DATA_PARTITIONS_AHEAD: int = 2  # future months created up front
+    MARKET_DATA_RETENTION_ON_STARTUP: bool = False  # drop expired partitions when the API starts
+    
+    # Backtesting (costs are percentages of traded notional, per side)
+    BACKTEST_COMMISSION_PERCENT: float = 0.03
+    BACKTEST_SLIPPAGE_PERCENT: float = 0.05
+    BACKTEST_PERIODS_PER_YEAR: int = 252
+    BACKTEST_LATENCY_MS: float = 50  # order-to-exchange latency in event-driven backtests
+    BACKTEST_PARTICIPATION_PERCENT: float = 10.0  # max share of a bar's volume one order can take
+    BACKTEST_CIRCUIT_PERCENT: float = 20.0  # NSE daily price band; 0 disables
+    BACKTEST_PANEL_DIR: str = "data/panels"  # memory-mapped price panels shared by backtests
+    BACKTEST_PANEL_TTL_SECONDS: int = 3600  # rebuild panels that reach today after this long
+    BACKTEST_PANEL_RETENTION_DAYS: int = 14
+    OPTIMIZER_MAX_WORKERS: int = 0  # 0 = one per CPU
+    OPTIMIZER_MAX_COMBINATIONS: int = 5000
+    
+    # Backtest job queue (workers: backtest_worker.py)
+    BACKTEST_WORKER_CONCURRENCY: int = 2  # jobs one worker process runs at a time
+    BACKTEST_JOBS_PER_USER: int = 2  # jobs one user can have running across all workers
+    BACKTEST_MAX_QUEUED_PER_USER: int = 20
+    BACKTEST_JOB_LEASE_SECONDS: int = 60  # jobs whose worker stops heartbeating are requeued after this
+    BACKTEST_JOB_MAX_ATTEMPTS: int = 3
+    BACKTEST_JOB_RETENTION_SECONDS: int = 86400  # finished job records kept in Redis
+    BACKTEST_PREVIEW_POINTS: int = 200  # equity curve points kept uncompressed for list views
+    
+    # Strategy scheduler (auto-execute strategies on bar close)
+    SCHEDULER_ENABLED: bool = False  # run the scheduler inside the API process too
+    SCHEDULER_SHARDS: int = 64  # symbol groups leased independently through Redis
+    SCHEDULER_LEASE_MS: int = 10000
+    SCHEDULER_BAR_DELAY_MS: int = 250  # wait after a bar closes for its last ticks to land
+    SCHEDULER_CONCURRENCY: int = 8  # shards one worker evaluates at a time
+    SCHEDULER_SHARD_ATTEMPTS: int = 3  # runs of a failing shard per worker before leaving it to others
+    SCHEDULER_REFRESH_SECONDS: int = 30  # reload auto-execute strategies this often
+    SCHEDULER_DEFAULT_CAPITAL: float = 100000.0
+    NSE_HOLIDAYS: list = []  # ISO dates of weekday exchange holidays
+    
+    # Strategy performance
+    PERFORMANCE_BENCHMARK_SYMBOL: str = "^NSEI"  # NIFTY 50; beta and alpha are measured against it
+    RISK_WINDOW_DAYS: int = 252  # daily returns behind VaR, covariance and beta
+    RISK_CONFIDENCE: float = 0.95
+    PORTFOLIO_NAV_BACKFILL_DAYS: int = 365  # history reconstructed before a portfolio's first NAV snapshot
     
     # Broker API Keys
     ZERODHA_API_KEY: Optional[str] = None
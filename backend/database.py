@@ -40,6 +40,39 @@ def get_postgres_db():
 def get_redis_client():
     return redis_client
 
+# Async Redis for pub/sub listeners (WebSockets), created lazily
+async_redis_client = None
+
+def get_async_redis_client():
+    global async_redis_client
+    if async_redis_client is None:
+        import redis.asyncio as aioredis
+        async_redis_client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD,
+            decode_responses=True,
+            socket_connect_timeout=5,
+            retry_on_timeout=True
+        )
+    return async_redis_client
+
+# InfluxDB Connection (created lazily, only services that need it pay for the import)
+influx_client = None
+
+async def get_influx_client():
+    global influx_client
+    if influx_client is None:
+        from influxdb_client import InfluxDBClient
+        influx_client = InfluxDBClient(
+            url=settings.INFLUXDB_URL,
+            token=settings.INFLUXDB_TOKEN,
+            org=settings.INFLUXDB_ORG,
+            timeout=30000
+        )
+    return influx_client
+
 # Health check function
 def check_database_health():
     """Check if both PostgreSQL and Redis are healthy"""
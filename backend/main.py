@@ -6,7 +6,10 @@ from contextlib import asynccontextmanager
 
 from config import settings
 from database import init_database, check_database_health
-from routers import auth, trading, portfolio, market_data, watchlist, settings as settings_router, broker, news, strategy, live_news
+from services.market_data_store import market_data_store
+from services.strategy_scheduler import strategy_scheduler
+from services.portfolio_stream import portfolio_stream
+from routers import auth, trading, portfolio, market_data, watchlist, settings as settings_router, broker, news, strategy, live_news, timeseries, backtest_jobs
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,18 +23,36 @@ async def lifespan(app: FastAPI):
     
     print("✅ Database initialized successfully")
     
+    # Market data partitions: create upcoming months; dropping expired ones is opt-in
+    try:
+        market_data_store.ensure_current_partitions()
+        print("✅ Market data partitions ready")
+        if settings.MARKET_DATA_RETENTION_ON_STARTUP:
+            dropped = market_data_store.apply_retention()
+            print(f"✅ Dropped {len(dropped)} expired market data partitions")
+    except Exception as e:
+        print(f"⚠️ Market data partition maintenance failed: {e}")
+    
     # Health check
     if not check_database_health():
         print("❌ Database health check failed")
         raise RuntimeError("Database health check failed")
     
     print("✅ Database health check passed")
+    
+    # Auto-execute strategies (dedicated nodes run scheduler_worker.py instead)
+    if settings.SCHEDULER_ENABLED:
+        strategy_scheduler.start()
+        print(f"✅ Strategy scheduler started ({strategy_scheduler.worker_id})")
+    
     print("🎯 Trading Web App is ready!")
     
     yield
     
     # Shutdown
     print("🛑 Shutting down Trading Web App...")
+    await strategy_scheduler.stop()
+    await portfolio_stream.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -60,7 +81,9 @@ app.include_router(settings_router.router, prefix="/api/settings", tags=["Settin
 app.include_router(broker.router, prefix="/api/broker", tags=["Broker"])
 app.include_router(news.router, prefix="/api/news", tags=["Financial News"])
 app.include_router(strategy.router, prefix="/api/strategy", tags=["Trading Strategies"])
+app.include_router(backtest_jobs.router, prefix="/api/backtest-jobs", tags=["Backtest Jobs"])
 app.include_router(live_news.router, prefix="/api/live-news", tags=["Live News"])
+app.include_router(timeseries.router, prefix="/api/timeseries", tags=["Time Series"])
 
 # Health check endpoint
 @app.get("/health")
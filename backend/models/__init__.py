@@ -3,16 +3,17 @@
 
 from .user import User
 from .broker import BrokerConnection
-from .portfolio import Portfolio
+from .portfolio import Portfolio, PortfolioNavSnapshot
 from .trade import Trade
 from .watchlist import Watchlist
 from .market_data import MarketData, StockQuote, MarketIndex, NewsArticle
-from .strategy import Strategy, StrategyTrade, StrategyBacktest
+from .strategy import Strategy, StrategyTrade, StrategyPerformance, StrategyDailyPerformance, StrategyBacktest
 
 __all__ = [
     "User", 
     "BrokerConnection", 
     "Portfolio", 
+    "PortfolioNavSnapshot",
     "Trade", 
     "Watchlist",
     "MarketData",
@@ -21,5 +22,7 @@ __all__ = [
     "NewsArticle",
     "Strategy",
     "StrategyTrade",
+    "StrategyPerformance",
+    "StrategyDailyPerformance",
     "StrategyBacktest"
 ]
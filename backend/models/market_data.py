@@ -4,12 +4,16 @@ from datetime import datetime
 from database import Base
 
 class MarketData(Base):
-    """Market data storage using PostgreSQL's time-series capabilities"""
+    """Market data storage using PostgreSQL's time-series capabilities
+    
+    Range-partitioned by month on `timestamp` (see services/market_data_store.py);
+    (symbol, timestamp) is the natural key, so queries on it prune to the
+    matching partitions and bulk upserts can target it with ON CONFLICT.
+    """
     __tablename__ = "market_data"
     
-    id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(20), index=True, nullable=False)
-    timestamp = Column(DateTime, index=True, nullable=False)
+    symbol = Column(String(20), primary_key=True, nullable=False)
+    timestamp = Column(DateTime, primary_key=True, nullable=False)
     price = Column(Float)
     volume = Column(Integer)
     open_price = Column(Float)
@@ -22,10 +26,10 @@ class MarketData(Base):
     # JSON column for additional data (market cap, P/E ratio, etc.)
     additional_data = Column(JSON)
     
-    # Indexes for performance
+    # Indexes for performance (the primary key already covers symbol, timestamp)
     __table_args__ = (
-        Index('idx_market_data_symbol_timestamp', 'symbol', 'timestamp'),
         Index('idx_market_data_timestamp', 'timestamp'),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
 class StockQuote(Base):
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -18,6 +18,7 @@ class Portfolio(Base):
     # Relationships
     user = relationship("User", back_populates="portfolios")
     holdings = relationship("Holding", back_populates="portfolio", cascade="all, delete-orphan")
+    nav_snapshots = relationship("PortfolioNavSnapshot", cascade="all, delete-orphan", passive_deletes=True)
 
 class Holding(Base):
     __tablename__ = "holdings"
@@ -37,3 +38,15 @@ class Holding(Base):
     __table_args__ = (
         Index('idx_holdings_portfolio_symbol', 'portfolio_id', 'symbol'),
     )
+
+class PortfolioNavSnapshot(Base):
+    """Reconstructed net asset value of a portfolio at one exchange day's close"""
+    __tablename__ = "portfolio_nav_snapshots"
+    
+    portfolio_id = Column(Integer, ForeignKey("portfolios.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    nav = Column(Float, default=0.0)
+    net_flow = Column(Float, default=0.0)  # Buys minus sells booked that day
+    daily_return = Column(Float, default=0.0)  # Flow-adjusted (time-weighted) return of the day
+    growth = Column(Float, default=1.0)  # Chained TWR index: growth of 1 invested on the first day
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
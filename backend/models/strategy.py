@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Float, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, Date, Float, JSON, ForeignKey, LargeBinary
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from database import Base
 
@@ -37,6 +37,7 @@ class Strategy(Base):
     # Relationships
     user = relationship("User", back_populates="strategies")
     trades = relationship("StrategyTrade", back_populates="strategy")
+    performance = relationship("StrategyPerformance", uselist=False, back_populates="strategy")
     
     def __repr__(self):
         return f"<Strategy(id={self.id}, name='{self.name}', user_id={self.user_id})>"
@@ -62,6 +63,64 @@ class StrategyTrade(Base):
     def __repr__(self):
         return f"<StrategyTrade(id={self.id}, strategy_id={self.strategy_id}, trade_id={self.trade_id})>"
 
+class StrategyPerformance(Base):
+    """Running aggregates of a strategy's closed trades, updated in the transaction that records each trade
+    
+    Returns are measured against `capital`; a daily return is that day's
+    realized P&L over capital, so the daily sums can be adjusted in place as
+    later trades land on the same day.
+    """
+    __tablename__ = "strategy_performance"
+    
+    strategy_id = Column(Integer, ForeignKey("strategies.id", ondelete="CASCADE"), primary_key=True)
+    capital = Column(Float, nullable=False)
+    
+    # Trade counts and P&L
+    closed_trades = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    gross_profit = Column(Float, default=0.0)
+    gross_loss = Column(Float, default=0.0)  # Positive magnitude
+    largest_win = Column(Float, default=0.0)
+    largest_loss = Column(Float, default=0.0)
+    total_holding_seconds = Column(Float, default=0.0)
+    
+    # Realized equity path, in recording order
+    cum_pnl = Column(Float, default=0.0)
+    peak_pnl = Column(Float, default=0.0)
+    max_drawdown = Column(Float, default=0.0)  # Percent of peak equity
+    
+    # Sums over daily returns
+    trading_days = Column(Integer, default=0)
+    sum_daily_return = Column(Float, default=0.0)
+    sum_daily_return_sq = Column(Float, default=0.0)
+    sum_downside_sq = Column(Float, default=0.0)
+    
+    # Timestamps
+    first_trade_at = Column(DateTime(timezone=True))
+    last_trade_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    strategy = relationship("Strategy", back_populates="performance")
+    
+    def __repr__(self):
+        return f"<StrategyPerformance(strategy_id={self.strategy_id}, closed_trades={self.closed_trades})>"
+
+class StrategyDailyPerformance(Base):
+    """Realized P&L of a strategy per exchange day"""
+    __tablename__ = "strategy_daily_performance"
+    
+    strategy_id = Column(Integer, ForeignKey("strategies.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    pnl = Column(Float, default=0.0)
+    trades = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    benchmark_return = Column(Float)  # Benchmark's close-to-close return, filled once the day has closed
+    
+    def __repr__(self):
+        return f"<StrategyDailyPerformance(strategy_id={self.strategy_id}, day={self.day})>"
+
 class StrategyBacktest(Base):
     """Model for storing strategy backtest results"""
     __tablename__ = "strategy_backtests"
@@ -73,6 +132,7 @@ class StrategyBacktest(Base):
     start_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True), nullable=False)
     initial_capital = Column(Float, nullable=False)
+    symbols = Column(JSON)  # Symbols traded; capital is split per the strategy's risk_management["allocation"]
     
     # Results
     total_return = Column(Float)
@@ -83,12 +143,29 @@ class StrategyBacktest(Base):
     total_trades = Column(Integer)
     
     # Detailed results
-    equity_curve = Column(JSON)  # Daily equity values
-    trade_history = Column(JSON)  # Detailed trade results
+    equity_preview = Column(JSON)  # Downsampled equity curve for list views
+    equity_blob = deferred(Column(LargeBinary))  # Full curve, see services/result_codec.py
+    trade_blob = deferred(Column(LargeBinary))  # Columnar trades plus per-symbol metrics
+    state_blob = deferred(Column(LargeBinary))  # Engine state at the last bar, for extending the run
     monthly_returns = Column(JSON)  # Monthly performance
+    robustness = Column(JSON)  # Monte Carlo / bootstrap distributions, keyed by method
+    
+    # JSON results of rows written before the blob columns
+    equity_curve = Column(JSON)
+    trade_history = Column(JSON)
+    
+    # Content address: identical inputs on the same data share one result
+    input_hash = Column(String(64), index=True)
+    data_version = Column(String(64))
+    
+    # Job state (backtests run on the job queue)
+    status = Column(String(20), default="completed")  # queued, running, completed, failed, cancelled
+    job_id = Column(String(36), index=True)
+    error = Column(Text)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
     
     # Relationships
     strategy = relationship("Strategy")
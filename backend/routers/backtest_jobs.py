@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import List
+from jose import jwt
+import asyncio
+import json
+import logging
+from datetime import datetime
+
+from database import get_postgres_db, get_async_redis_client
+from models.user import User
+from config import settings
+from services.backtest_queue import backtest_queue
+from services.cache_service import cache_service
+from schemas.strategy import StrategyJobResponse
+
+router = APIRouter()
+security = HTTPBearer()
+
+logger = logging.getLogger(__name__)
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_postgres_db)
+) -> User:
+    try:
+        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email: str = payload.get("sub")
+        if email is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+    except jwt.JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
+@router.get("/", response_model=List[StrategyJobResponse])
+async def get_jobs(
+    limit: int = Query(50, ge=1, le=200, description="Number of recent jobs to return"),
+    current_user: User = Depends(get_current_user)
+):
+    """Recent backtest, optimization and walk-forward jobs, newest first"""
+    try:
+        return backtest_queue.list(current_user.id, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {str(e)}")
+
+@router.get("/{job_id}", response_model=StrategyJobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Status, progress and (for optimizations) results of one job"""
+    job = backtest_queue.get(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.delete("/{job_id}", response_model=StrategyJobResponse)
+async def cancel_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a queued or running job"""
+    try:
+        job = backtest_queue.cancel(job_id, current_user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "cancelled_backtest_job",
+            "job_id": job_id,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+
+        return job
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to cancel job: {str(e)}")
+
+@router.websocket("/ws/{user_token}")
+async def websocket_job_events(websocket: WebSocket, user_token: str):
+    """Stream the user's job events (queued, running, progress, completed, ...)"""
+    await websocket.accept()
+
+    db = next(get_postgres_db())
+    try:
+        payload = jwt.decode(user_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user = db.query(User).filter(User.email == payload.get("sub")).first()
+    except jwt.JWTError:
+        user = None
+    finally:
+        db.close()
+
+    if not user:
+        await websocket.send_text(json.dumps({"type": "error", "message": "Invalid authentication token"}))
+        await websocket.close(code=4001)
+        return
+
+    pubsub = get_async_redis_client().pubsub()
+    await pubsub.subscribe(backtest_queue.events_channel(user.id))
+
+    async def forward():
+        async for message in pubsub.listen():
+            if message["type"] == "message":
+                await websocket.send_text(message["data"])
+
+    async def receive():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                await websocket.send_text(json.dumps({"type": "error", "message": "Invalid JSON format"}))
+                continue
+            if message.get("type") == "ping":
+                await websocket.send_text(json.dumps({"type": "pong", "timestamp": datetime.utcnow().isoformat()}))
+            elif message.get("type") == "cancel" and message.get("job_id"):
+                backtest_queue.cancel(message["job_id"], user.id)
+
+    try:
+        # Snapshot first, so a client that connects mid-run knows where every job stands
+        await websocket.send_text(json.dumps({
+            "type": "backtest_jobs",
+            "jobs": [
+                {key: value for key, value in job.items() if key not in ("payload", "result")}
+                for job in backtest_queue.list(user.id, 20)
+            ]
+        }))
+        tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(receive())]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        for task in done:
+            if task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                logger.error(f"Backtest job WebSocket error: {task.exception()}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        try:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+        except Exception as e:
+            logger.error(f"Error closing job event subscription: {e}")
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from jose import jwt
+import json
+from datetime import datetime
 
 from database import get_postgres_db
 from models.user import User
 from models.portfolio import Portfolio, Holding
 from schemas.portfolio import PortfolioCreate, PortfolioResponse, HoldingCreate, HoldingResponse
+from services.portfolio_service import PortfolioService
+from services.portfolio_stream import portfolio_stream
 from config import settings
 
 router = APIRouter()
@@ -121,6 +125,50 @@ async def get_portfolio(
         created_at=portfolio.created_at
     )
 
+@router.get("/{portfolio_id}/metrics")
+async def get_portfolio_metrics(
+    portfolio_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_postgres_db)
+):
+    """Get portfolio valuation, P&L and risk metrics (VaR/CVaR, beta, alpha, drawdown)"""
+    
+    portfolio = db.query(Portfolio).filter(
+        Portfolio.id == portfolio_id,
+        Portfolio.user_id == current_user.id
+    ).first()
+    
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    
+    portfolio_service = PortfolioService()
+    return await portfolio_service.calculate_portfolio_metrics(portfolio_id, db)
+
+@router.get("/{portfolio_id}/performance")
+async def get_portfolio_performance(
+    portfolio_id: int,
+    period: str = Query("1y", description="1m, 3m, 6m, 1y, 2y, 5y, ytd or all"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_postgres_db)
+):
+    """Get time- and money-weighted returns, volatility, Sharpe and drawdown from daily NAV"""
+    
+    portfolio = db.query(Portfolio).filter(
+        Portfolio.id == portfolio_id,
+        Portfolio.user_id == current_user.id
+    ).first()
+    
+    if not portfolio:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    
+    try:
+        portfolio_service = PortfolioService()
+        return await portfolio_service.get_portfolio_performance(portfolio_id, db, period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get portfolio performance: {str(e)}")
+
 @router.put("/{portfolio_id}", response_model=PortfolioResponse)
 async def update_portfolio(
     portfolio_id: int,
@@ -202,6 +250,7 @@ async def delete_portfolio(
     
     db.delete(portfolio)
     db.commit()
+    portfolio_stream.notify_changed(portfolio_id)
     
     return {"message": "Portfolio deleted successfully"}
 
@@ -242,6 +291,7 @@ async def add_holding(
         
         db.commit()
         db.refresh(existing_holding)
+        portfolio_stream.notify_changed(portfolio_id)
         
         return HoldingResponse(
             id=existing_holding.id,
@@ -265,6 +315,7 @@ async def add_holding(
     db.add(holding)
     db.commit()
     db.refresh(holding)
+    portfolio_stream.notify_changed(portfolio_id)
     
     return HoldingResponse(
         id=holding.id,
@@ -344,6 +395,7 @@ async def update_holding(
     
     db.commit()
     db.refresh(holding)
+    portfolio_stream.notify_changed(portfolio_id)
     
     return HoldingResponse(
         id=holding.id,
@@ -383,5 +435,51 @@ async def remove_holding(
     
     db.delete(holding)
     db.commit()
+    portfolio_stream.notify_changed(portfolio_id)
     
     return {"message": "Holding removed successfully"}
+
+@router.websocket("/ws/{user_token}")
+async def websocket_portfolio_pnl(websocket: WebSocket, user_token: str):
+    """Stream live P&L of the portfolios the client subscribes to"""
+    await websocket.accept()
+
+    db = next(get_postgres_db())
+    try:
+        payload = jwt.decode(user_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        user = db.query(User).filter(User.email == payload.get("sub")).first()
+    except jwt.JWTError:
+        user = None
+    finally:
+        db.close()
+
+    if not user:
+        await websocket.send_text(json.dumps({"type": "error", "message": "Invalid authentication token"}))
+        await websocket.close(code=4001)
+        return
+
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                message_type = message.get("type")
+                portfolio_id = int(message["portfolio_id"]) if message_type in ("subscribe", "unsubscribe") else None
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                await websocket.send_text(json.dumps({"type": "error", "message": "Invalid message format"}))
+                continue
+
+            if message_type == "ping":
+                await websocket.send_text(json.dumps({"type": "pong", "timestamp": datetime.utcnow().isoformat()}))
+            elif message_type == "subscribe":
+                # Snapshot first; portfolio_pnl deltas follow as prices move
+                snapshot = await portfolio_stream.subscribe(websocket, portfolio_id, user.id)
+                if snapshot is None:
+                    await websocket.send_text(json.dumps({"type": "error", "message": "Portfolio not found", "portfolio_id": portfolio_id}))
+                else:
+                    await websocket.send_text(json.dumps(snapshot))
+            elif message_type == "unsubscribe":
+                portfolio_stream.unsubscribe(websocket, portfolio_id)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        portfolio_stream.unsubscribe(websocket)
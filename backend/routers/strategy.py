@@ -11,9 +11,10 @@ from config import settings
 from services.strategy_service import StrategyService
 from services.cache_service import cache_service
 from schemas.strategy import (
-    StrategyCreate, StrategyUpdate, StrategyResponse, StrategyListResponse,
-    StrategyBacktestCreate, StrategyBacktestResponse, StrategyExecuteRequest,
-    StrategyExecuteResponse, StrategyPerformanceResponse, StrategyTemplate
+    StrategyCreate, StrategyUpdate, StrategyResponse, StrategyListResponse, StrategyTradeCreate, StrategyTradeResponse,
+    StrategyBacktestCreate, StrategyBacktestExtend, StrategyBacktestResponse, StrategyExecuteRequest,
+    StrategyExecuteResponse, StrategyPerformanceResponse, StrategyTemplate,
+    StrategyOptimizeRequest, StrategyWalkForwardRequest, StrategyRobustnessRequest, StrategyJobResponse
 )
 
 router = APIRouter()
@@ -167,7 +168,9 @@ async def update_strategy(
         cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
         
         return strategy
-        
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update strategy: {str(e)}")
 
@@ -248,7 +251,7 @@ async def create_backtest(
     current_user: User = Depends(get_current_user),
     db = Depends(get_postgres_db)
 ):
-    """Create a new strategy backtest"""
+    """Queue a strategy backtest; follow it on /api/backtest-jobs and fetch the filled row when done"""
     try:
         strategy_service = StrategyService(db)
         backtest = await strategy_service.create_backtest(current_user.id, backtest_data)
@@ -263,6 +266,7 @@ async def create_backtest(
             "action": "created_strategy_backtest",
             "strategy_id": strategy_id,
             "backtest_id": backtest.id,
+            "job_id": backtest.job_id,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -277,14 +281,87 @@ async def create_backtest(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create backtest: {str(e)}")
 
+@router.post("/{strategy_id}/backtest/{backtest_id}/extend", response_model=StrategyBacktestResponse)
+async def extend_backtest(
+    strategy_id: int,
+    backtest_id: int,
+    extend_data: StrategyBacktestExtend,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_postgres_db)
+):
+    """Queue an extension of a finished backtest; only bars after its end are simulated"""
+    try:
+        strategy_service = StrategyService(db)
+        backtest = await strategy_service.extend_backtest(strategy_id, backtest_id, current_user.id, extend_data)
+        
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "extended_strategy_backtest",
+            "strategy_id": strategy_id,
+            "backtest_id": backtest_id,
+            "job_id": backtest.job_id,
+            "end_date": extend_data.end_date.isoformat(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+        
+        return backtest
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to extend backtest: {str(e)}")
+
+@router.post("/{strategy_id}/backtest/{backtest_id}/robustness", response_model=StrategyJobResponse)
+async def analyze_backtest_robustness(
+    strategy_id: int,
+    backtest_id: int,
+    robustness_data: StrategyRobustnessRequest,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_postgres_db)
+):
+    """Queue Monte Carlo trade resampling or a block bootstrap; results land on the backtest's robustness field"""
+    try:
+        strategy_service = StrategyService(db)
+        job = await strategy_service.enqueue_robustness(strategy_id, backtest_id, current_user.id, robustness_data)
+        
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "analyzed_backtest_robustness",
+            "strategy_id": strategy_id,
+            "backtest_id": backtest_id,
+            "method": robustness_data.method,
+            "job_id": job["job_id"],
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+        
+        return job
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue robustness analysis: {str(e)}")
+
 @router.get("/{strategy_id}/backtest/{backtest_id}", response_model=StrategyBacktestResponse)
 async def get_backtest_results(
     strategy_id: int,
     backtest_id: int,
+    full: bool = Query(False, description="Decode the full-resolution equity curve and trade history"),
     current_user: User = Depends(get_current_user),
     db = Depends(get_postgres_db)
 ):
-    """Get backtest results"""
+    """Get backtest results; list-sized preview unless full=true"""
     try:
         strategy_service = StrategyService(db)
         backtest = await strategy_service.get_backtest_results(backtest_id, current_user.id)
@@ -306,11 +383,84 @@ async def get_backtest_results(
         cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
         cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
         
+        if full:
+            return StrategyBacktestResponse.from_orm(backtest).copy(
+                update=strategy_service.decode_backtest_results(backtest)
+            )
         return backtest
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch backtest results: {str(e)}")
 
+@router.post("/{strategy_id}/optimize", response_model=StrategyJobResponse)
+async def optimize_strategy(
+    strategy_id: int,
+    optimize_data: StrategyOptimizeRequest,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_postgres_db)
+):
+    """Queue a grid or random search over a strategy's parameters; ranked results land on the job"""
+    try:
+        strategy_service = StrategyService(db)
+        job = await strategy_service.enqueue_optimization(strategy_id, current_user.id, optimize_data)
+        
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "optimized_strategy",
+            "strategy_id": strategy_id,
+            "job_id": job["job_id"],
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+        
+        return job
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to optimize strategy: {str(e)}")
+
+@router.post("/{strategy_id}/walk-forward", response_model=StrategyJobResponse)
+async def walk_forward_strategy(
+    strategy_id: int,
+    walk_forward_data: StrategyWalkForwardRequest,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_postgres_db)
+):
+    """Queue rolling re-optimization with out-of-sample evaluation, saved as a backtest"""
+    try:
+        strategy_service = StrategyService(db)
+        job = await strategy_service.enqueue_walk_forward(strategy_id, current_user.id, walk_forward_data)
+        
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "walk_forward_strategy",
+            "strategy_id": strategy_id,
+            "backtest_id": job["backtest_id"],
+            "job_id": job["job_id"],
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+        
+        return job
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run walk-forward analysis: {str(e)}")
+
 # Strategy Execution
 @router.post("/{strategy_id}/execute", response_model=StrategyExecuteResponse)
 async def execute_strategy(
@@ -347,6 +497,44 @@ async def execute_strategy(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to execute strategy: {str(e)}")
 
+# Strategy Trades
+@router.post("/{strategy_id}/trades", response_model=StrategyTradeResponse)
+async def record_strategy_trade(
+    strategy_id: int,
+    trade_data: StrategyTradeCreate,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_postgres_db)
+):
+    """Record a trade executed by a strategy; closing trades update its performance aggregates"""
+    try:
+        if trade_data.strategy_id != strategy_id:
+            raise ValueError("strategy_id in the body does not match the URL")
+        
+        strategy_service = StrategyService(db)
+        strategy_trade = await strategy_service.record_strategy_trade(strategy_id, current_user.id, trade_data)
+        
+        # Log user activity
+        user_action = {
+            "user_id": current_user.id,
+            "username": current_user.username,
+            "action": "recorded_strategy_trade",
+            "strategy_id": strategy_id,
+            "trade_id": trade_data.trade_id,
+            "pnl": trade_data.pnl,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        cache_service.redis_client.lpush(f"user:actions:{current_user.id}", json.dumps(user_action))
+        cache_service.redis_client.ltrim(f"user:actions:{current_user.id}", 0, 49)
+        cache_service.redis_client.expire(f"user:actions:{current_user.id}", 3600)
+        
+        return strategy_trade
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to record strategy trade: {str(e)}")
+
 # Strategy Performance
 @router.get("/{strategy_id}/performance", response_model=StrategyPerformanceResponse)
 async def get_strategy_performance(
@@ -377,6 +565,8 @@ async def get_strategy_performance(
         
         return performance
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch strategy performance: {str(e)}")
 
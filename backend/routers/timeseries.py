@@ -0,0 +1,116 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from jose import jwt
+from datetime import datetime, timedelta
+
+from database import get_postgres_db
+from models.user import User
+from config import settings
+from services.timeseries_service import TimeSeriesService
+
+router = APIRouter()
+security = HTTPBearer()
+
+# Created on first use so importing the router does not open the time-series store
+timeseries_service = None
+
+def get_timeseries_service() -> TimeSeriesService:
+    global timeseries_service
+    if timeseries_service is None:
+        timeseries_service = TimeSeriesService()
+    return timeseries_service
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_postgres_db)
+) -> User:
+    try:
+        payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        email: str = payload.get("sub")
+        if email is None:
+            raise HTTPException(status_code=401, detail="Invalid token")
+    except jwt.JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    user = db.query(User).filter(User.email == email).first()
+    if user is None:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return user
+
+def _resolve_range(start: Optional[datetime], end: Optional[datetime]):
+    """Default to the last 24 hours when no range is given"""
+    end_time = end or datetime.utcnow()
+    start_time = start or end_time - timedelta(days=1)
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start_time, end_time
+
+@router.get("/summary")
+async def get_market_summary(
+    start: Optional[datetime] = Query(None, description="Range start (defaults to 24h ago)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to now)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get market-wide summary for a time range"""
+    start_time, end_time = _resolve_range(start, end)
+
+    try:
+        return await get_timeseries_service().get_market_summary(start_time, end_time)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch market summary: {str(e)}")
+
+@router.get("/statistics")
+async def get_symbol_statistics(
+    symbols: Optional[str] = Query(None, description="Comma-separated list of symbols (all if omitted)"),
+    field: str = Query("close", description="Price field to aggregate"),
+    start: Optional[datetime] = Query(None, description="Range start (defaults to 24h ago)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to now)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get count/first/last/min/max/mean per symbol for a time range"""
+    start_time, end_time = _resolve_range(start, end)
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+
+    try:
+        statistics = await get_timeseries_service().get_symbol_statistics(
+            start_time, end_time, symbols=symbol_list, field=field
+        )
+        return {
+            "field": field,
+            "time_range": {"start": start_time.isoformat(), "end": end_time.isoformat()},
+            "statistics": statistics
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch statistics: {str(e)}")
+
+@router.get("/volume")
+async def get_volume_analytics(
+    symbols: str = Query(..., description="Comma-separated list of symbols"),
+    interval: str = Query("5m", description="Bar interval (1m, 5m, 15m, 1h)"),
+    sections: Optional[str] = Query(None, description="Comma-separated subset of summary,vwap,profile,relative_volume,slope"),
+    start: Optional[datetime] = Query(None, description="Range start (defaults to 30 days ago)"),
+    end: Optional[datetime] = Query(None, description="Range end (defaults to now)"),
+    current_user: User = Depends(get_current_user)
+):
+    """Get VWAP bands, volume profile and relative volume for one or more symbols"""
+    # Relative volume compares against prior sessions, so default to a month of bars
+    start_time, end_time = _resolve_range(start or (end or datetime.utcnow()) - timedelta(days=30), end)
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+    section_list = [s.strip() for s in sections.split(",") if s.strip()] if sections else None
+
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+
+    try:
+        analytics = await get_timeseries_service().get_volume_analytics(
+            symbol_list, start_time, end_time, interval=interval, sections=section_list
+        )
+        return {
+            "interval": interval,
+            "time_range": {"start": start_time.isoformat(), "end": end_time.isoformat()},
+            "symbols": analytics
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compute volume analytics: {str(e)}")
@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Strategy scheduler worker
+Runs auto-execute strategies on NSE bar closes; start one per node; shards
+are shared out between all running workers through Redis leases
+"""
+import asyncio
+
+from services.strategy_scheduler import strategy_scheduler
+
+async def main():
+    print(f"🚀 Starting strategy scheduler worker {strategy_scheduler.worker_id}...")
+    await strategy_scheduler.refresh(force=True)
+    intervals = {interval: len(groups) for interval, groups in strategy_scheduler.groups.items()}
+    print(f"📅 Scheduled symbol groups per interval: {intervals}")
+    await strategy_scheduler.run()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("🛑 Strategy scheduler worker stopped")
@@ -69,6 +69,9 @@ class StrategyTradeBase(BaseModel):
 class StrategyTradeCreate(StrategyTradeBase):
     strategy_id: int
     trade_id: int
+    pnl: Optional[float] = Field(None, description="Realized P&L when the trade closes a position; empty for entries")
+    holding_seconds: Optional[float] = Field(None, ge=0, description="How long the closed position was held")
+    closed_at: Optional[datetime] = Field(None, description="When the position closed (defaults to the trade's timestamp)")
 
 class StrategyTradeResponse(StrategyTradeBase):
     id: int
@@ -84,9 +87,19 @@ class StrategyBacktestBase(BaseModel):
     start_date: datetime
     end_date: datetime
     initial_capital: float = Field(..., gt=0, description="Initial capital for backtest")
+    symbols: Optional[List[str]] = Field(None, description="Symbols to backtest (defaults to the strategy's parameters.symbols)")
 
 class StrategyBacktestCreate(StrategyBacktestBase):
     strategy_id: int
+    engine: str = Field(default="vectorized", description="vectorized (daily bars) or event (intraday bars with order-level fills)")
+    interval: str = Field(default="1m", description="Bar interval for the event engine: 1m, 5m, 15m or 1h")
+    fill_model: Optional[Dict[str, float]] = Field(None, description="Event engine overrides: latency_ms, slippage_percent, impact_percent, participation_percent, circuit_percent")
+    priority: int = Field(default=0, ge=0, le=9, description="Queue priority; higher runs first")
+    use_cache: bool = Field(default=True, description="Return a stored backtest with the same inputs and data instead of re-running")
+
+class StrategyBacktestExtend(BaseModel):
+    end_date: datetime = Field(..., description="New end date; only bars after the current end are simulated")
+    priority: int = Field(default=0, ge=0, le=9, description="Queue priority; higher runs first")
 
 class StrategyBacktestResponse(StrategyBacktestBase):
     id: int
@@ -100,16 +113,67 @@ class StrategyBacktestResponse(StrategyBacktestBase):
     win_rate: Optional[float] = None
     total_trades: Optional[int] = None
     
-    # Detailed results
+    # Detailed results; the full curve and trades only with ?full=true
+    equity_preview: Optional[Dict[str, Any]] = None
     equity_curve: Optional[Dict[str, Any]] = None
     trade_history: Optional[Dict[str, Any]] = None
     monthly_returns: Optional[Dict[str, Any]] = None
+    robustness: Optional[Dict[str, Any]] = None
+    
+    # Job state
+    status: Optional[str] = None
+    job_id: Optional[str] = None
+    error: Optional[str] = None
     
     created_at: datetime
+    completed_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+# Strategy Optimization Schema
+class StrategyOptimizeRequest(StrategyBacktestBase):
+    method: str = Field(default="grid", description="grid or random")
+    search_space: Optional[Dict[str, List[Any]]] = Field(None, description="Explicit values per parameter (defaults to the template ranges)")
+    grid_steps: int = Field(default=5, ge=2, le=50, description="Values per parameter when derived from template ranges")
+    samples: int = Field(default=50, ge=1, description="Combinations to draw for random search")
+    metric: str = Field(default="sharpe_ratio", description="Ranking metric")
+    top_n: int = Field(default=20, ge=1, le=500, description="Rows to return")
+    seed: Optional[int] = Field(None, description="Random search seed")
+    priority: int = Field(default=0, ge=0, le=9, description="Queue priority; higher runs first")
+
+# Walk-Forward Schema
+class StrategyWalkForwardRequest(StrategyOptimizeRequest):
+    in_sample_bars: int = Field(default=252, ge=20, description="Bars (trading days for daily data) per in-sample window")
+    out_of_sample_bars: int = Field(default=63, ge=5, description="Bars per out-of-sample window; windows roll forward by this much")
+    anchored: bool = Field(default=False, description="Keep every in-sample window anchored at the start date")
+
+class StrategyRobustnessRequest(BaseModel):
+    method: str = Field(default="trades", description="trades (resample trade returns) or block_bootstrap (resample blocks of bar returns)")
+    simulations: int = Field(default=5000, ge=100, le=100000, description="Number of resampled equity paths")
+    block_size: Optional[int] = Field(None, ge=1, description="Bars per bootstrap block (defaults to the cube root of the bar count)")
+    ruin_percent: float = Field(default=50.0, gt=0, le=100, description="Loss from starting capital that counts as ruin")
+    seed: Optional[int] = Field(None, description="Random seed for reproducible distributions")
+    priority: int = Field(default=0, ge=0, le=9, description="Queue priority; higher runs first")
+
+# Backtest Job Schema
+class StrategyJobResponse(BaseModel):
+    job_id: str
+    kind: str  # backtest, optimize, walk_forward
+    strategy_id: int
+    status: str  # queued, running, completed, failed, cancelled
+    priority: int
+    progress: float = 0.0
+    message: Optional[str] = None
+    backtest_id: Optional[int] = None
+    result: Optional[Dict[str, Any]] = None  # optimize: ranked parameter sets under "results", walk_forward: out-of-sample metrics and "windows"
+    error: Optional[str] = None
+    attempts: int = 0
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 # Strategy Execution Schema
 class StrategyExecuteRequest(BaseModel):
     strategy_id: int
@@ -0,0 +1,452 @@
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from services.indicators import rising_edge, IndicatorCache
+from services.condition_compiler import condition_compiler, PRICE_SERIES
+
+# Signals --------------------------------------------------------------------
+
+def signal_prices(columns: Dict[str, Optional[np.ndarray]]) -> Dict[str, np.ndarray]:
+    """The price series conditions can reference (open, high, low, close, volume) out of named columns"""
+    return {field: columns[field] for field in PRICE_SERIES if columns.get(field) is not None}
+
+def evaluate_condition(expression: str, prices: Dict[str, np.ndarray], parameters: Dict[str, Any],
+                       cache: Optional[IndicatorCache] = None) -> np.ndarray:
+    """Evaluate one condition expression into a boolean array"""
+    cache = cache or IndicatorCache(prices["close"])
+    plan = condition_compiler.compile({"condition": expression}, parameters, names=("condition",))
+    return plan.evaluate(prices, cache)["condition"]
+
+def generate_signals(category: str, prices: Dict[str, np.ndarray], parameters: Optional[Dict[str, Any]] = None,
+                     conditions: Optional[Dict[str, Any]] = None,
+                     cache: Optional[IndicatorCache] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Entry and exit boolean arrays for one of the strategy templates or custom conditions"""
+    parameters = parameters or {}
+    close = prices["close"]
+    cache = cache or IndicatorCache(close)
+
+    if category == "moving_average_crossover":
+        short_ma = cache.get("sma", parameters.get("short_period", 10))
+        long_ma = cache.get("sma", parameters.get("long_period", 20))
+        with np.errstate(invalid="ignore"):
+            entries = rising_edge(short_ma > long_ma)
+            exits = short_ma < long_ma
+    elif category == "mean_reversion":
+        ma = cache.get("sma", parameters.get("ma_period", 20))
+        threshold = float(parameters.get("deviation_threshold", 2.0)) / 100
+        with np.errstate(invalid="ignore"):
+            entries = close < ma * (1 - threshold)
+            exits = close > ma * (1 + threshold)
+    elif category == "momentum":
+        strength = cache.get("momentum", parameters.get("momentum_period", 14))
+        threshold = float(parameters.get("momentum_threshold", 0.5))
+        with np.errstate(invalid="ignore"):
+            entries = strength > threshold
+            exits = strength < threshold
+    else:
+        conditions = conditions or {}
+        if not conditions.get("entry"):
+            raise ValueError("Custom strategies need an entry condition")
+        # Entry and exit compile into one plan, so shared subexpressions run once
+        signals = condition_compiler.compile(conditions, parameters).evaluate(prices, cache)
+        entries = signals["entry"]
+        exits = signals["exit"] if "exit" in signals else np.zeros(close.shape, dtype=bool)
+
+    return entries, exits
+
+# Simulation -----------------------------------------------------------------
+
+def _simulate_column(close: np.ndarray, high: np.ndarray, low: np.ndarray, open: np.ndarray,
+                     entries: np.ndarray, exits: np.ndarray, capital: float, options: Dict[str, float],
+                     resume: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Long-only simulation of one symbol
+
+    Signals are evaluated on the bar close and filled at that close. Stops and
+    targets are checked against each later bar's low/high and fill at their
+    level, or at the open of a bar that gaps through it (NaN opens mean no gap
+    information). Every fill pays slippage. The only Python loop is over
+    trades; locating each exit is a vectorized scan.
+
+    `resume` continues an earlier run from its "resume" output: the cash and
+    any position held going into row 0. The returned "resume" is that state
+    going into the last row, which is the row an extension replays first.
+    """
+    length = len(close)
+    stop_loss = options["stop_loss"]
+    take_profit = options["take_profit"]
+    position_size = options["position_size"]
+    commission = options["commission"]
+    slippage = options["slippage"]
+
+    share_delta = np.zeros(length)
+    cash_delta = np.zeros(length)
+    trades: List[Dict[str, Any]] = []
+
+    valid = ~np.isnan(close)
+    candidates = np.flatnonzero(entries & valid)
+    cash = resume["cash"] if resume else capital
+    carried = resume.get("position") if resume else None
+    start_cash = cash
+    start_shares = carried["shares"] if carried else 0.0
+    state = None
+    cursor = 0
+
+    while True:
+        if carried is not None:
+            # Held in from before row 0; its cost was paid then
+            entry, entry_price, shares, cost = carried["entry_index"], carried["entry_price"], carried["shares"], carried["cost"]
+            carried = None
+            window = slice(0, length)
+        else:
+            position = np.searchsorted(candidates, cursor)
+            if position >= len(candidates):
+                break
+            entry = int(candidates[position])
+            if entry >= length - 1:
+                break
+            entry_price = close[entry] * (1 + slippage)
+            shares = cash * position_size / (entry_price * (1 + commission))
+            cost = shares * entry_price * (1 + commission)
+            share_delta[entry] += shares
+            cash_delta[entry] -= cost
+            cash -= cost
+            window = slice(entry + 1, length)
+
+        stop_price = entry_price * (1 - stop_loss) if stop_loss else -np.inf
+        target_price = entry_price * (1 + take_profit) if take_profit else np.inf
+        with np.errstate(invalid="ignore"):
+            stop_hit = low[window] <= stop_price
+            target_hit = high[window] >= target_price
+        hit = stop_hit | target_hit | exits[window]
+
+        if hit.any():
+            offset = int(np.argmax(hit))
+            exit_index = window.start + offset
+            # A stop takes precedence when a bar spans both levels
+            if stop_hit[offset]:
+                exit_price, reason = np.fmin(stop_price, open[exit_index]) * (1 - slippage), "stop_loss"
+            elif target_hit[offset]:
+                exit_price, reason = np.fmax(target_price, open[exit_index]) * (1 - slippage), "take_profit"
+            else:
+                exit_price, reason = close[exit_index] * (1 - slippage), "exit_signal"
+        else:
+            exit_index, reason = length - 1, "end_of_data"
+            exit_price = close[exit_index] * (1 - slippage)
+
+        if exit_index == length - 1:
+            state = {
+                "cash": float(cash),
+                "position": {"entry_index": entry, "entry_price": float(entry_price),
+                             "shares": float(shares), "cost": float(cost)}
+            }
+
+        proceeds = shares * exit_price * (1 - commission)
+        share_delta[exit_index] -= shares
+        cash_delta[exit_index] += proceeds
+        cash += proceeds
+
+        trades.append({
+            "entry_index": entry,
+            "exit_index": exit_index,
+            "entry_price": float(entry_price),
+            "exit_price": float(exit_price),
+            "shares": float(shares),
+            "pnl": float(proceeds - cost),
+            "return_percent": float((proceeds / cost - 1) * 100),
+            "exit_reason": reason
+        })
+        cursor = exit_index + 1
+
+    held = start_shares + np.cumsum(share_delta)
+    equity = start_cash + np.cumsum(cash_delta) + held * np.nan_to_num(close)
+    return {"equity": equity, "trades": trades, "resume": state or {"cash": float(cash), "position": None}}
+
+def _as_panel(values: Optional[np.ndarray], like: np.ndarray) -> np.ndarray:
+    if values is None:
+        return like
+    values = np.asarray(values, dtype=float)
+    return values.reshape(like.shape)
+
+def compute_metrics(equity: np.ndarray, initial_capital: float,
+                    periods_per_year: Optional[int] = None) -> Dict[str, float]:
+    """Return, annualized return, Sharpe and max drawdown (all percentages except Sharpe)"""
+    periods_per_year = periods_per_year or settings.BACKTEST_PERIODS_PER_YEAR
+    if len(equity) == 0:
+        return {"total_return": 0.0, "annualized_return": 0.0, "sharpe_ratio": 0.0, "max_drawdown": 0.0}
+
+    returns = np.diff(equity, prepend=initial_capital) / np.concatenate([[initial_capital], equity[:-1]])
+    total_return = equity[-1] / initial_capital - 1
+    years = len(equity) / periods_per_year
+    annualized = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else -1.0
+    deviation = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = returns.mean() / deviation * np.sqrt(periods_per_year) if deviation > 0 else 0.0
+    peaks = np.maximum.accumulate(np.concatenate([[initial_capital], equity]))[1:]
+    drawdown = (peaks - equity) / peaks
+
+    return {
+        "total_return": float(total_return * 100),
+        "annualized_return": float(annualized * 100),
+        "sharpe_ratio": float(sharpe),
+        "max_drawdown": float(drawdown.max() * 100)
+    }
+
+def metric_totals(equity: np.ndarray, previous: Dict[str, float]) -> Dict[str, float]:
+    """Running sums behind compute_metrics, so a run can be extended without its full curve
+
+    `previous` holds the totals of the rows before `equity`; a fresh run
+    starts from {"last": initial_capital, "peak": initial_capital}.
+    """
+    if len(equity) == 0:
+        return dict(previous)
+    returns = np.diff(equity, prepend=previous["last"]) / np.concatenate([[previous["last"]], equity[:-1]])
+    peaks = np.maximum.accumulate(np.concatenate([[previous["peak"]], equity]))[1:]
+    return {
+        "count": previous.get("count", 0) + len(equity),
+        "sum": previous.get("sum", 0.0) + float(returns.sum()),
+        "sum_sq": previous.get("sum_sq", 0.0) + float(np.square(returns).sum()),
+        "peak": float(peaks[-1]),
+        "max_drawdown": max(previous.get("max_drawdown", 0.0), float(((peaks - equity) / peaks).max())),
+        "last": float(equity[-1])
+    }
+
+def metrics_from_totals(totals: Dict[str, float], initial_capital: float,
+                        periods_per_year: Optional[int] = None) -> Dict[str, float]:
+    """compute_metrics from metric_totals output"""
+    periods_per_year = periods_per_year or settings.BACKTEST_PERIODS_PER_YEAR
+    count = totals.get("count", 0)
+    if count == 0:
+        return {"total_return": 0.0, "annualized_return": 0.0, "sharpe_ratio": 0.0, "max_drawdown": 0.0}
+
+    total_return = totals["last"] / initial_capital - 1
+    years = count / periods_per_year
+    annualized = (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else -1.0
+    mean = totals["sum"] / count
+    variance = (totals["sum_sq"] - count * mean ** 2) / (count - 1) if count > 1 else 0.0
+    deviation = np.sqrt(max(variance, 0.0))
+    sharpe = mean / deviation * np.sqrt(periods_per_year) if deviation > 0 else 0.0
+
+    return {
+        "total_return": float(total_return * 100),
+        "annualized_return": float(annualized * 100),
+        "sharpe_ratio": float(sharpe),
+        "max_drawdown": float(totals["max_drawdown"] * 100)
+    }
+
+def monthly_returns(timestamps: np.ndarray, equity: np.ndarray, initial_capital: float) -> Dict[str, float]:
+    """Percentage return per calendar month, keyed YYYY-MM"""
+    if len(equity) == 0:
+        return {}
+    months = timestamps.astype("datetime64[ns]").astype("datetime64[M]")
+    # Last row of every month
+    is_last = np.ones(len(months), dtype=bool)
+    is_last[:-1] = months[1:] != months[:-1]
+    closing = equity[is_last]
+    opening = np.concatenate([[initial_capital], closing[:-1]])
+    return {
+        str(month): float((end / start - 1) * 100)
+        for month, start, end in zip(months[is_last], opening, closing)
+    }
+
+class BacktestEngine:
+    """Vectorized backtester for strategy templates and custom conditions"""
+
+    def __init__(self, commission_percent: Optional[float] = None, slippage_percent: Optional[float] = None,
+                 periods_per_year: Optional[int] = None):
+        self.commission = (commission_percent if commission_percent is not None
+                           else settings.BACKTEST_COMMISSION_PERCENT) / 100
+        self.slippage = (slippage_percent if slippage_percent is not None
+                         else settings.BACKTEST_SLIPPAGE_PERCENT) / 100
+        self.periods_per_year = periods_per_year or settings.BACKTEST_PERIODS_PER_YEAR
+
+    def _options(self, risk_management: Optional[Dict[str, Any]]) -> Dict[str, float]:
+        """Risk settings are percentages; accept plain numbers or template-style {"default": x}"""
+        risk_management = risk_management or {}
+
+        def percent(key: str, default: float) -> float:
+            value = risk_management.get(key, default)
+            if isinstance(value, dict):
+                value = value.get("value", value.get("default", default))
+            return float(value or 0) / 100
+
+        return {
+            "stop_loss": percent("stop_loss", 0),
+            "take_profit": percent("take_profit", 0),
+            "position_size": percent("position_size", 100) or 1.0,
+            "commission": percent("commission", self.commission * 100),
+            "slippage": percent("slippage", self.slippage * 100)
+        }
+
+    def risk_options(self, risk_management: Optional[Dict[str, Any]] = None) -> Dict[str, float]:
+        """Stop loss, take profit, position size and costs as fractions"""
+        return self._options(risk_management)
+
+    def position_size(self, risk_management: Optional[Dict[str, Any]] = None) -> float:
+        """Fraction of a symbol's allocated capital committed per trade"""
+        return self._options(risk_management)["position_size"]
+
+    def allocation(self, symbols: List[str], risk_management: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Share of capital per symbol from risk_management["allocation"]
+
+        "equal" (the default) splits capital evenly; a {symbol: weight} mapping
+        is normalized, and symbols it leaves out get nothing.
+        """
+        allocation = (risk_management or {}).get("allocation", "equal")
+        if isinstance(allocation, dict):
+            weights = np.array([max(float(allocation.get(symbol, 0) or 0), 0.0) for symbol in symbols])
+            if weights.sum() > 0:
+                return weights / weights.sum()
+        elif allocation != "equal":
+            raise ValueError(f"Unknown allocation '{allocation}'")
+        return np.full(len(symbols), 1 / len(symbols)) if symbols else np.empty(0)
+
+    def run(self, timestamps: np.ndarray, close: np.ndarray, initial_capital: float,
+            category: str = "custom", parameters: Optional[Dict[str, Any]] = None,
+            conditions: Optional[Dict[str, Any]] = None, risk_management: Optional[Dict[str, Any]] = None,
+            high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+            symbols: Optional[List[str]] = None, cache: Optional[IndicatorCache] = None,
+            open: Optional[np.ndarray] = None, volume: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Backtest over close of shape (T,) or (T, N); capital is split per risk_management["allocation"]"""
+        close = np.asarray(close, dtype=float)
+        panel = close if close.ndim == 2 else close[:, None]
+        prices = {"close": panel, "high": _as_panel(high, panel), "low": _as_panel(low, panel)}
+        prices.update(signal_prices({
+            "open": None if open is None else _as_panel(open, panel),
+            "volume": None if volume is None else _as_panel(volume, panel)
+        }))
+        entries, exits = generate_signals(category, prices, parameters, conditions, cache)
+        return self.simulate(
+            timestamps, panel, entries, exits, initial_capital,
+            risk_management, prices["high"], prices["low"], symbols, open=prices.get("open")
+        )
+
+    def simulate(self, timestamps: np.ndarray, close: np.ndarray, entries: np.ndarray, exits: np.ndarray,
+                 initial_capital: float, risk_management: Optional[Dict[str, Any]] = None,
+                 high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+                 symbols: Optional[List[str]] = None, resume: Optional[Dict[str, Any]] = None,
+                 open: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """Simulate precomputed signals; callers may pass row slices of signals built on a longer series
+
+        Every result carries a "state" to extend the run later. Passed back as
+        `resume` with rows starting at that run's last row (which is replayed,
+        since it may have been a forming bar or a forced exit), the metrics cover
+        the whole run while equity, trades and monthly returns cover these rows.
+        """
+        close = np.asarray(close, dtype=float)
+        panel = close if close.ndim == 2 else close[:, None]
+        high_panel = _as_panel(high, panel)
+        low_panel = _as_panel(low, panel)
+        open_panel = np.full(panel.shape, np.nan) if open is None else _as_panel(open, panel)
+        entries = entries.reshape(panel.shape)
+        exits = exits.reshape(panel.shape)
+        columns = panel.shape[1]
+        symbols = symbols or [f"symbol_{index}" for index in range(columns)]
+        options = self._options(risk_management)
+        if resume:
+            if list(resume["symbols"]) != list(symbols):
+                raise ValueError("Symbols differ from the run being extended")
+            weights = np.asarray(resume["weights"])
+            offset = resume["offset"]
+        else:
+            weights = self.allocation(symbols, risk_management)
+            offset = 0
+
+        equity = np.zeros(len(panel))
+        trade_history: List[Dict[str, Any]] = []
+        per_symbol: Dict[str, Dict[str, Any]] = {}
+        column_states: Dict[str, Dict[str, Any]] = {}
+        last = len(panel) - 1
+
+        for index in np.flatnonzero(weights):
+            symbol = symbols[index]
+            capital = initial_capital * weights[index]
+            previous = resume["columns"][symbol] if resume else None
+            carried = None
+            if previous:
+                carried = previous["position"] and dict(previous["position"], entry_index=previous["position"]["entry_index"] - offset)
+            result = _simulate_column(
+                panel[:, index], high_panel[:, index], low_panel[:, index], open_panel[:, index],
+                entries[:, index], exits[:, index], capital, options,
+                {"cash": previous["cash"], "position": carried} if previous else None
+            )
+            equity += result["equity"]
+            for trade in result["trades"]:
+                trade["symbol"] = symbol
+                trade["entry_time"] = (
+                    str(np.datetime64(int(timestamps[trade["entry_index"]]), "ns")) if trade["entry_index"] >= 0
+                    else carried["entry_time"]
+                )
+                trade["exit_time"] = str(np.datetime64(int(timestamps[trade["exit_index"]]), "ns"))
+                trade["entry_index"] += offset
+                trade["exit_index"] += offset
+            trade_history.extend(result["trades"])
+
+            # Totals stop short of the last row; an extension replays it
+            totals = metric_totals(result["equity"][:-1], previous["totals"] if previous else {"last": capital, "peak": capital})
+            closed = [trade for trade in result["trades"] if trade["exit_index"] < offset + last]
+            position = result["resume"]["position"]
+            if position:
+                relative = position["entry_index"]
+                position = dict(
+                    position,
+                    entry_index=relative + offset,
+                    entry_time=str(np.datetime64(int(timestamps[relative]), "ns")) if relative >= 0 else carried["entry_time"]
+                )
+            column_states[symbol] = {
+                "cash": result["resume"]["cash"],
+                "position": position,
+                "totals": totals,
+                "closed_trades": (previous["closed_trades"] if previous else 0) + len(closed),
+                "wins": (previous["wins"] if previous else 0) + sum(1 for trade in closed if trade["pnl"] > 0)
+            }
+
+            metrics = (
+                metrics_from_totals(metric_totals(result["equity"][-1:], totals), capital, self.periods_per_year)
+                if resume else compute_metrics(result["equity"], capital, self.periods_per_year)
+            )
+            per_symbol[symbol] = dict(
+                metrics,
+                total_trades=(previous["closed_trades"] if previous else 0) + len(result["trades"]),
+                allocation=float(weights[index] * 100)
+            )
+
+        trade_history.sort(key=lambda trade: trade["entry_index"])
+        totals = metric_totals(equity[:-1], resume["totals"] if resume else {"last": initial_capital, "peak": initial_capital})
+        closed_trades = sum(state["closed_trades"] for state in column_states.values())
+        wins = sum(state["wins"] for state in column_states.values())
+        open_trades = [trade for trade in trade_history if trade["exit_index"] == offset + last]
+        total_trades = closed_trades + len(open_trades)
+        wins += sum(1 for trade in open_trades if trade["pnl"] > 0)
+
+        # Opening equity of the last row's month, for its monthly return after an extension
+        months = timestamps.astype("datetime64[ns]").astype("datetime64[M]")
+        opening = resume["month_opening"] if resume else initial_capital
+        earlier = np.flatnonzero(months < months[-1]) if len(months) else []
+        state = {
+            "offset": offset + last,
+            "timestamp": int(timestamps[-1]) if len(timestamps) else None,
+            "symbols": list(symbols),
+            "weights": weights.tolist(),
+            "columns": column_states,
+            "totals": totals,
+            "month_opening": float(equity[earlier[-1]]) if len(earlier) else opening
+        }
+
+        metrics = (
+            metrics_from_totals(metric_totals(equity[-1:], totals), initial_capital, self.periods_per_year)
+            if resume else compute_metrics(equity, initial_capital, self.periods_per_year)
+        )
+        return dict(
+            metrics,
+            win_rate=float(wins / total_trades * 100) if total_trades else 0.0,
+            total_trades=total_trades,
+            equity=equity,
+            timestamps=timestamps,
+            trades=trade_history,
+            monthly_returns=monthly_returns(timestamps, equity, opening),
+            per_symbol=per_symbol,
+            state=state
+        )
+
+# Create global backtest engine instance
+backtest_engine = BacktestEngine()
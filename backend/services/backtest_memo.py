@@ -0,0 +1,102 @@
+import json
+import hashlib
+import weakref
+import numpy as np
+from datetime import datetime, date, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from services.backtest_engine import generate_signals
+from services.indicators import IndicatorCache
+from services.data_panel import DataPanel
+from services.market_calendar import nse_calendar
+
+# Bump when engine changes alter results, so stored backtests stop matching
+MEMO_VERSION = 1
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+def _day(value: datetime) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+class BacktestMemo:
+    """Content addresses for backtests, and indicator/signal arrays shared between runs
+
+    A backtest is identified by a hash of everything that determines its
+    result (strategy definition, symbols, range, capital, engine settings)
+    plus a data-version stamp: the newest bar close its range can contain.
+    Ranges that ended before today are closed and never change. Runs on the
+    same price panel (other capital or risk settings, other parameters on the
+    same indicators) reuse that panel's indicator cache and signal arrays.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.caches: "weakref.WeakKeyDictionary[DataPanel, IndicatorCache]" = weakref.WeakKeyDictionary()
+
+    def input_hash(self, strategy, symbols: List[str], start_date: datetime, end_date: datetime,
+                   initial_capital: float, engine: str = "vectorized", interval: str = "1d",
+                   fill_model: Optional[Dict[str, float]] = None) -> str:
+        """sha256 over the canonical JSON of a backtest's inputs"""
+        event = engine == "event"
+        identity = {
+            "version": MEMO_VERSION,
+            "category": strategy.category,
+            "parameters": strategy.parameters or {},
+            "conditions": strategy.conditions or {},
+            "risk_management": strategy.risk_management or {},
+            "symbols": sorted(set(symbols)),
+            # Price panels are keyed by day, so finer bounds would not change the data
+            "start": _day(start_date).isoformat(),
+            "end": _day(end_date).isoformat(),
+            "initial_capital": float(initial_capital),
+            "engine": engine,
+            "interval": interval if event else "1d",
+            "fill_model": (fill_model or {}) if event else None,
+            "costs": [
+                settings.BACKTEST_COMMISSION_PERCENT, settings.BACKTEST_SLIPPAGE_PERCENT,
+                settings.BACKTEST_PERIODS_PER_YEAR
+            ] + ([
+                settings.BACKTEST_LATENCY_MS, settings.BACKTEST_PARTICIPATION_PERCENT,
+                settings.BACKTEST_CIRCUIT_PERCENT
+            ] if event else [])
+        }
+        return hashlib.sha256(_canonical(identity).encode()).hexdigest()
+
+    def strategy_hash(self, strategy) -> str:
+        """sha256 of the parts of a strategy that decide its signals and fills"""
+        return hashlib.sha256(_canonical([
+            strategy.category, strategy.parameters or {}, strategy.conditions or {}, strategy.risk_management or {}
+        ]).encode()).hexdigest()
+
+    def data_version(self, end_date: datetime, interval: str = "1d", now: Optional[datetime] = None) -> str:
+        """Stamp of the newest bar a range ending on `end_date` can see right now"""
+        now = now or datetime.now(timezone.utc)
+        end_day = _day(end_date)
+        if end_day < now.astimezone(nse_calendar.tz).date():
+            return f"closed:{end_day.isoformat()}"
+        latest = nse_calendar.last_bar_close(now, interval)
+        return f"{interval}:{latest.isoformat() if latest else end_day.isoformat()}"
+
+    def indicator_cache(self, panel: DataPanel) -> IndicatorCache:
+        """The panel's shared cache; it lives as long as the panel stays mapped"""
+        cache = self.caches.get(panel)
+        if cache is None:
+            cache = IndicatorCache(panel["close"], self.max_entries)
+            self.caches[panel] = cache
+        return cache
+
+    def signals(self, panel: DataPanel, category: str, parameters: Optional[Dict[str, Any]] = None,
+                conditions: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Entry and exit arrays of a strategy on a panel, computed once per panel"""
+        cache = self.indicator_cache(panel)
+        key = ("signals", category, _canonical(parameters or {}), _canonical(conditions or {}))
+        signals = cache.nodes.get(key)
+        if signals is None:
+            signals = generate_signals(category, panel.prices(), parameters, conditions, cache)
+            cache.remember(key, signals)
+        return signals
+
+# Create global backtest memo instance
+backtest_memo = BacktestMemo()
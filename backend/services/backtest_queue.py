@@ -0,0 +1,426 @@
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from config import settings
+from database import get_redis_client
+
+JOB_KINDS = ("backtest", "extend", "optimize", "walk_forward", "robustness")
+FINISHED = ("completed", "failed", "cancelled")
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback once cancellation was requested"""
+
+class LeaseLost(Exception):
+    """Raised by heartbeat once the job was requeued and no longer belongs to this attempt"""
+
+# Pops the best queued job whose owner is under the running limit. Priority
+# is folded into the score, so ZRANGE order is priority first, then FIFO.
+CLAIM_SCRIPT = """
+local ids = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[5]) - 1)
+for _, id in ipairs(ids) do
+    local job = ARGV[1] .. ':job:' .. id
+    local user = redis.call('HGET', job, 'user_id')
+    if not user then
+        redis.call('ZREM', KEYS[1], id)
+    elseif tonumber(redis.call('HGET', KEYS[3], user) or '0') < tonumber(ARGV[4]) then
+        redis.call('ZREM', KEYS[1], id)
+        redis.call('HINCRBY', KEYS[3], user, 1)
+        redis.call('ZADD', KEYS[2], tonumber(ARGV[2]) + tonumber(ARGV[3]), id)
+        local attempt = redis.call('HINCRBY', job, 'attempts', 1)
+        redis.call('HSET', job, 'status', 'running', 'started_at', ARGV[6], 'worker', ARGV[7],
+                   'lease', ARGV[7] .. '#' .. attempt)
+        return id
+    end
+end
+return false
+"""
+
+# Extends a running job's lease while this attempt still holds it; returns -1
+# once the job was requeued, else 1 if cancellation was requested
+HEARTBEAT_SCRIPT = """
+if redis.call('HGET', KEYS[2], 'lease') ~= ARGV[2] or not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], 'XX', tonumber(ARGV[3]), ARGV[1])
+if redis.call('HGET', KEYS[2], 'cancel') == '1' then
+    return 1
+end
+return 0
+"""
+
+# Records a running job's outcome if this attempt still holds the lease. The
+# user's running count only drops if this call took the job off `running`.
+FINISH_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'lease') ~= ARGV[2] then
+    return 0
+end
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 1 then
+    redis.call('HINCRBY', KEYS[3], ARGV[3], -1)
+end
+redis.call('HDEL', KEYS[1], 'lease')
+redis.call('HSET', KEYS[1], unpack(ARGV, 5))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+redis.call('SREM', KEYS[4], ARGV[1])
+return 1
+"""
+
+# Takes an expired job off `running`; only the caller that removes it recovers
+# it, and the old attempt's lease is revoked so its heartbeat and finish fail
+REAP_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+local user = redis.call('HGET', KEYS[2], 'user_id')
+if user then
+    redis.call('HINCRBY', KEYS[3], user, -1)
+end
+redis.call('HDEL', KEYS[2], 'lease')
+return 1
+"""
+
+class BacktestQueue:
+    """Redis job queue for backtests, optimizations and walk-forward runs
+
+    Layout under `prefix`:
+      queue             ZSET of queued job ids, scored by (-priority, enqueue time)
+      running           ZSET of running job ids, scored by lease expiry
+      active            HASH user_id -> running job count
+      job:{id}          HASH job record; `lease` names the worker attempt running it
+      user:{uid}:jobs   ZSET of a user's job ids by creation time
+      user:{uid}:open   SET of a user's queued or running job ids
+      events:{uid}      pub/sub channel of job events for the user
+    """
+
+    def __init__(self, redis_client=None, prefix: str = "backtest"):
+        self.redis_client = redis_client or get_redis_client()
+        self.prefix = prefix
+        self._claim = None
+        self._heartbeat = None
+        self._finish = None
+        self._reap = None
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.prefix] + [str(part) for part in parts])
+
+    # API side ---------------------------------------------------------------
+
+    def enqueue(self, user_id: int, strategy_id: int, kind: str, payload: str, priority: int = 0,
+                backtest_id: Optional[int] = None, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue a job; `payload` is the request JSON the worker re-parses"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if self.redis_client.scard(self._key("user", user_id, "open")) >= settings.BACKTEST_MAX_QUEUED_PER_USER:
+            raise ValueError(f"At most {settings.BACKTEST_MAX_QUEUED_PER_USER} backtest jobs can be pending per user")
+
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "user_id": user_id,
+            "strategy_id": strategy_id,
+            "backtest_id": backtest_id if backtest_id is not None else "",
+            "priority": priority,
+            "status": "queued",
+            "progress": 0.0,
+            "attempts": 0,
+            "payload": payload,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key("job", job_id), mapping=job)
+        pipe.sadd(self._key("user", user_id, "open"), job_id)
+        pipe.zadd(self._key("user", user_id, "jobs"), {job_id: now})
+        pipe.zadd(self._key("queue"), {job_id: self._score(priority, now)})
+        pipe.execute()
+
+        self._trim_history(user_id)
+        self.publish(job, "queued")
+        return self.get(job_id)
+
+    def get(self, job_id: str, user_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Job record, or None if unknown (or owned by someone else)"""
+        job = self.redis_client.hgetall(self._key("job", job_id))
+        if not job or (user_id is not None and int(job["user_id"]) != user_id):
+            return None
+        return self._decode(job)
+
+    def list(self, user_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+        job_ids = self.redis_client.zrevrange(self._key("user", user_id, "jobs"), 0, limit - 1)
+        pipe = self.redis_client.pipeline()
+        for job_id in job_ids:
+            pipe.hgetall(self._key("job", job_id))
+        return [self._decode(job) for job in pipe.execute() if job]
+
+    def cancel(self, job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job outright; a running one stops at its next progress check"""
+        job = self.get(job_id, user_id)
+        if job is None:
+            return None
+        if job["status"] in FINISHED:
+            return job
+        if self.redis_client.zrem(self._key("queue"), job_id):
+            self.finish(job, "cancelled", running=False)
+        else:
+            self.redis_client.hset(self._key("job", job_id), "cancel", 1)
+            self.publish(job, "cancelling")
+        return self.get(job_id)
+
+    # Worker side ------------------------------------------------------------
+
+    def claim(self, worker_id: str, scan: int = 50) -> Optional[Dict[str, Any]]:
+        if self._claim is None:
+            self._claim = self.redis_client.register_script(CLAIM_SCRIPT)
+        job_id = self._claim(
+            keys=[self._key("queue"), self._key("running"), self._key("active")],
+            args=[self.prefix, self._now_ms(), settings.BACKTEST_JOB_LEASE_SECONDS * 1000,
+                  settings.BACKTEST_JOBS_PER_USER, scan, datetime.utcnow().isoformat(), worker_id]
+        )
+        if not job_id:
+            return None
+        job = self.get(job_id)
+        self.publish(job, "running")
+        return job
+
+    def heartbeat(self, job: Dict[str, Any]) -> bool:
+        """Extend the job's lease; returns True once cancellation was requested
+
+        Raises LeaseLost if the lease expired and the job was requeued, in
+        which case another attempt owns it and this one must stop.
+        """
+        if self._heartbeat is None:
+            self._heartbeat = self.redis_client.register_script(HEARTBEAT_SCRIPT)
+        state = self._heartbeat(
+            keys=[self._key("running"), self._key("job", job["job_id"])],
+            args=[job["job_id"], job.get("lease") or "", self._now_ms() + settings.BACKTEST_JOB_LEASE_SECONDS * 1000]
+        )
+        if int(state) < 0:
+            raise LeaseLost(job["job_id"])
+        return int(state) == 1
+
+    def progress(self, job: Dict[str, Any], fraction: float, message: Optional[str] = None) -> bool:
+        """Record and publish progress; returns True once cancellation was requested"""
+        fields = {"progress": round(float(fraction), 4)}
+        if message:
+            fields["message"] = message
+        pipe = self.redis_client.pipeline()
+        pipe.hset(self._key("job", job["job_id"]), mapping=fields)
+        pipe.hget(self._key("job", job["job_id"]), "cancel")
+        cancel = pipe.execute()[1] == "1"
+        self.publish(dict(job, **fields), "progress")
+        return cancel
+
+    def finish(self, job: Dict[str, Any], status: str, result: Optional[Dict[str, Any]] = None,
+               error: Optional[str] = None, running: bool = True) -> bool:
+        """Record a job's outcome; for a running job only while the claiming attempt still holds its lease"""
+        fields = {"status": status, "finished_at": datetime.utcnow().isoformat()}
+        if status == "completed":
+            fields["progress"] = 1.0
+        if result is not None:
+            fields["result"] = json.dumps(result, default=_json_default)
+        if error:
+            fields["error"] = error[:2000]
+
+        user_id = job["user_id"]
+        if running:
+            if self._finish is None:
+                self._finish = self.redis_client.register_script(FINISH_SCRIPT)
+            owned = self._finish(
+                keys=[self._key("job", job["job_id"]), self._key("running"), self._key("active"),
+                      self._key("user", user_id, "open")],
+                args=[job["job_id"], job.get("lease") or "", user_id, settings.BACKTEST_JOB_RETENTION_SECONDS]
+                + [item for pair in fields.items() for item in pair]
+            )
+            if not owned:
+                return False
+        else:
+            pipe = self.redis_client.pipeline()
+            pipe.hset(self._key("job", job["job_id"]), mapping=fields)
+            pipe.expire(self._key("job", job["job_id"]), settings.BACKTEST_JOB_RETENTION_SECONDS)
+            pipe.srem(self._key("user", user_id, "open"), job["job_id"])
+            pipe.execute()
+        self.publish(dict(job, **fields), status)
+        return True
+
+    def requeue_expired(self) -> int:
+        """Put jobs whose worker stopped heartbeating back on the queue (or fail them)"""
+        if self._reap is None:
+            self._reap = self.redis_client.register_script(REAP_SCRIPT)
+        requeued = 0
+        now = self._now_ms()
+        for job_id in self.redis_client.zrangebyscore(self._key("running"), "-inf", now):
+            if not self._reap(keys=[self._key("running"), self._key("job", job_id), self._key("active")],
+                              args=[job_id, now]):
+                continue
+            job = self.get(job_id)
+            if job is None:
+                continue
+            if job.get("cancel_requested"):
+                self.finish(job, "cancelled", running=False)
+            elif job["attempts"] >= settings.BACKTEST_JOB_MAX_ATTEMPTS:
+                self.finish(job, "failed", error="Worker stopped responding", running=False)
+            else:
+                pipe = self.redis_client.pipeline()
+                pipe.hset(self._key("job", job_id), mapping={"status": "queued", "progress": 0.0})
+                pipe.zadd(self._key("queue"), {job_id: self._score(job["priority"], time.time())})
+                pipe.execute()
+                self.publish(job, "queued")
+                requeued += 1
+        return requeued
+
+    def publish(self, job: Dict[str, Any], event: str):
+        try:
+            self.redis_client.publish(self._key("events", job["user_id"]), json.dumps({
+                "type": "backtest_job",
+                "event": event,
+                "job_id": job["job_id"],
+                "kind": job["kind"],
+                "strategy_id": int(job["strategy_id"]),
+                "backtest_id": int(job["backtest_id"]) if job.get("backtest_id") not in (None, "") else None,
+                "status": job.get("status"),
+                "progress": float(job.get("progress") or 0.0),
+                "message": job.get("message"),
+                "error": job.get("error"),
+                "timestamp": datetime.utcnow().isoformat()
+            }))
+        except Exception as e:
+            print(f"Error publishing backtest job event: {e}")
+
+    def events_channel(self, user_id: int) -> str:
+        return self._key("events", user_id)
+
+    # Helpers ----------------------------------------------------------------
+
+    def _score(self, priority: int, enqueued: float) -> float:
+        # Millisecond FIFO inside ten priority bands
+        return (9 - int(priority)) * 1e13 + enqueued * 1000
+
+    def _now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+    def _trim_history(self, user_id: int, keep: int = 200):
+        key = self._key("user", user_id, "jobs")
+        if self.redis_client.zcard(key) > keep:
+            self.redis_client.zremrangebyrank(key, 0, -keep - 1)
+
+    def _decode(self, job: Dict[str, str]) -> Dict[str, Any]:
+        decoded = dict(job)
+        decoded["user_id"] = int(job["user_id"])
+        decoded["strategy_id"] = int(job["strategy_id"])
+        decoded["backtest_id"] = int(job["backtest_id"]) if job.get("backtest_id") else None
+        decoded["priority"] = int(job.get("priority") or 0)
+        decoded["attempts"] = int(job.get("attempts") or 0)
+        decoded["progress"] = float(job.get("progress") or 0.0)
+        decoded["cancel_requested"] = job.get("cancel") == "1"
+        decoded["result"] = json.loads(job["result"]) if job.get("result") else None
+        decoded.pop("cancel", None)
+        return decoded
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+ProgressCallback = Callable[[float, Optional[str]], None]
+
+class BacktestWorker:
+    """Claims jobs from the queue and runs them, several at a time
+
+    Each running job has a heartbeat that extends its lease and picks up
+    cancellation; the job's progress callback then raises JobCancelled inside
+    whatever engine is running, including optimizer pools in executor threads.
+    """
+
+    def __init__(self, run_job: Callable[[Dict[str, Any], ProgressCallback], Awaitable[Optional[Dict[str, Any]]]],
+                 queue: Optional["BacktestQueue"] = None, concurrency: Optional[int] = None,
+                 poll_interval: float = 0.25):
+        self.run_job = run_job
+        self.queue = queue or backtest_queue
+        self.concurrency = concurrency or settings.BACKTEST_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.running: Dict[str, asyncio.Task] = {}
+        self.stopping = False
+
+    async def run(self):
+        reaped = 0.0
+        while not self.stopping:
+            try:
+                if time.monotonic() - reaped > 5:
+                    self.queue.requeue_expired()
+                    reaped = time.monotonic()
+
+                claimed = None
+                if len(self.running) < self.concurrency:
+                    claimed = self.queue.claim(self.worker_id)
+                    if claimed:
+                        task = asyncio.ensure_future(self.execute(claimed))
+                        self.running[claimed["job_id"]] = task
+                        task.add_done_callback(lambda _, job_id=claimed["job_id"]: self.running.pop(job_id, None))
+                if not claimed:
+                    await asyncio.sleep(self.poll_interval)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in backtest worker loop: {e}")
+                await asyncio.sleep(1)
+
+        if self.running:
+            await asyncio.gather(*self.running.values(), return_exceptions=True)
+
+    async def execute(self, job: Dict[str, Any]):
+        cancelled = threading.Event()
+        last = {"at": 0.0}
+
+        def progress(fraction: float, message: Optional[str] = None):
+            # Called from engine threads too; Redis writes are throttled to a few per second
+            if cancelled.is_set():
+                raise JobCancelled()
+            now = time.monotonic()
+            if now - last["at"] >= 0.5 or message:
+                last["at"] = now
+                if self.queue.progress(job, fraction, message):
+                    cancelled.set()
+                    raise JobCancelled()
+
+        task = asyncio.ensure_future(self.run_job(job, progress))
+        beat = max(settings.BACKTEST_JOB_LEASE_SECONDS / 6, 1)
+        try:
+            while not task.done():
+                await asyncio.wait([task], timeout=beat)
+                if not task.done() and self.queue.heartbeat(job):
+                    cancelled.set()
+            result = task.result()
+            if not self.queue.finish(job, "completed", result):
+                print(f"Backtest job {job['job_id']} lost its lease; result discarded")
+        except LeaseLost:
+            # The job was requeued after missed heartbeats; another attempt owns it now
+            print(f"Backtest job {job['job_id']} lost its lease; stopping this attempt")
+            cancelled.set()
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        except JobCancelled:
+            self.queue.finish(job, "cancelled")
+        except Exception as e:
+            print(f"Backtest job {job['job_id']} failed: {e}")
+            self.queue.finish(job, "failed", error=str(e))
+
+    def stop(self):
+        self.stopping = True
+
+# Create global backtest queue instance
+backtest_queue = BacktestQueue()
@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 from database import get_redis_client
 from config import settings
 
+# Published {symbol: price} whenever quotes are cached; live portfolio streams listen here
+QUOTES_CHANNEL = "quotes:updates"
+
 class CacheService:
     """Enhanced Redis cache service for trading application"""
     
@@ -64,14 +67,37 @@ class CacheService:
     # Market Data Caching
     def cache_stock_quote(self, symbol: str, quote_data: Dict[str, Any], ttl: int = 300) -> bool:
         """Cache stock quote data"""
-        key = f"quote:{symbol.upper()}"
-        return self.set(key, quote_data, ttl)
+        return self.cache_stock_quotes({symbol: quote_data}, ttl)
     
     def get_stock_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Get cached stock quote"""
         key = f"quote:{symbol.upper()}"
         return self.get(key)
     
+    def cache_stock_quotes(self, quotes: Dict[str, Dict[str, Any]], ttl: int = 300) -> bool:
+        """Cache many stock quotes in one round trip and announce their prices"""
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for symbol, quote_data in quotes.items():
+                pipeline.setex(f"quote:{symbol.upper()}", ttl, json.dumps(quote_data))
+            prices = {symbol: quote_data["price"] for symbol, quote_data in quotes.items() if quote_data.get("price")}
+            if prices:
+                pipeline.publish(QUOTES_CHANNEL, json.dumps(prices))
+            pipeline.execute()
+            return True
+        except Exception as e:
+            print(f"Cache set error: {e}")
+            return False
+    
+    def get_stock_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the cached quotes among `symbols` with one MGET"""
+        try:
+            values = self.redis_client.mget([f"quote:{symbol.upper()}" for symbol in symbols])
+            return {symbol: json.loads(value) for symbol, value in zip(symbols, values) if value}
+        except Exception as e:
+            print(f"Cache get error: {e}")
+            return {}
+    
     def cache_market_indices(self, indices_data: List[Dict[str, Any]], ttl: int = 600) -> bool:
         """Cache market indices data"""
         return self.set("market:indices", indices_data, ttl)
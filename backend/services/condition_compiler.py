@@ -0,0 +1,312 @@
+import re
+import ast
+import json
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from services.indicators import INDICATORS, IndicatorCache, shift, rising_edge
+
+PRICE_SERIES = {"open", "high", "low", "close", "volume"}
+ALIASES = {"price": "close"}
+# Named moving averages and the parameter that holds their period
+MOVING_AVERAGES = {"short_ma": ("short_period", 10), "long_ma": ("long_period", 20), "ma": ("ma_period", 20)}
+# Bare indicator names resolve to the strategy's own period parameter
+BARE_INDICATORS = {"rsi": ("rsi_period", 14), "momentum": ("momentum_period", 14)}
+INDICATOR_NAMES = {"sma", "rsi", "momentum"}
+FUNCTIONS = INDICATOR_NAMES | {"shift", "abs", "min", "max", "cross_above", "cross_below"}
+
+BINARY = {ast.Add: "add", ast.Sub: "sub", ast.Mult: "mul", ast.Div: "div"}
+COMPARE = {ast.Lt: "lt", ast.LtE: "le", ast.Gt: "gt", ast.GtE: "ge", ast.Eq: "eq", ast.NotEq: "ne"}
+# gt/ge are stored as lt/le with swapped operands so both spellings share a node
+FLIPPED = {"gt": "lt", "ge": "le"}
+COMMUTATIVE = {"add", "mul", "eq", "ne", "and", "or", "min", "max"}
+
+OPERATIONS = {
+    "add": np.add, "sub": np.subtract, "mul": np.multiply, "div": np.divide,
+    "lt": np.less, "le": np.less_equal, "eq": np.equal, "ne": np.not_equal,
+    "and": np.logical_and, "or": np.logical_or, "min": np.fmin, "max": np.fmax,
+    "not": np.logical_not, "neg": np.negative, "abs": np.abs, "edge": rising_edge
+}
+
+class Node:
+    """One operation in a plan; `key` is structural, so equal subtrees share it"""
+    __slots__ = ("op", "args", "key")
+
+    def __init__(self, op: str, args: Tuple, key: Tuple):
+        self.op = op
+        self.args = args
+        self.key = key
+
+class Plan:
+    """Compiled conditions: a DAG in topological order with named boolean outputs
+
+    Shared subexpressions (an indicator used by both entry and exit, say) are a
+    single node and are computed once. With an IndicatorCache, node results
+    are also memoized by structure, so other plans evaluated over the same
+    prices reuse them.
+    """
+
+    def __init__(self, nodes: List[Node], outputs: Dict[str, int]):
+        self.nodes = nodes
+        self.outputs = outputs
+
+    def evaluate(self, prices: Dict[str, np.ndarray],
+                 cache: Optional[IndicatorCache] = None) -> Dict[str, np.ndarray]:
+        close = prices["close"]
+        memo = cache.nodes if cache is not None else {}
+        values: List[Any] = []
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for node in self.nodes:
+                op, args = node.op, node.args
+                if op == "const":
+                    value = args[0]
+                elif op == "series":
+                    if args[0] not in prices:
+                        raise ValueError(f"Condition uses '{args[0]}' but no {args[0]} series was supplied")
+                    value = prices[args[0]]
+                elif node.key in memo:
+                    value = memo[node.key]
+                else:
+                    if op in INDICATOR_NAMES:
+                        source, period = args
+                        if cache is not None and self.nodes[source].key == ("series", "close"):
+                            value = cache.get(op, period)
+                        else:
+                            value = INDICATORS[op](np.asarray(values[source], dtype=float), period)
+                    elif op == "shift":
+                        value = shift(np.asarray(values[args[0]], dtype=float), args[1])
+                    else:
+                        value = OPERATIONS[op](*(values[index] for index in args))
+                    if cache is not None:
+                        cache.remember(node.key, value)
+                values.append(value)
+
+        results = {}
+        for name, index in self.outputs.items():
+            value = values[index]
+            if np.ndim(value) == 0:
+                value = np.full(close.shape, bool(value))
+            results[name] = np.asarray(value, dtype=bool)
+        return results
+
+class _Builder:
+    """Turns expression ASTs into hash-consed nodes, folding constants on the way"""
+
+    def __init__(self, parameters: Dict[str, Any]):
+        self.parameters = {
+            name: float(value) for name, value in (parameters or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        self.nodes: List[Node] = []
+        self.index: Dict[Tuple, int] = {}
+
+    def add(self, op: str, args: Tuple = (), params: Tuple = ()) -> int:
+        if op not in ("const", "series") and args and all(self.nodes[arg].op == "const" for arg in args):
+            return self.const(self._fold(op, args, params))
+
+        if op in FLIPPED:
+            op, args = FLIPPED[op], args[::-1]
+        if op in COMMUTATIVE:
+            args = tuple(sorted(args, key=lambda arg: repr(self.nodes[arg].key)))
+
+        key = (op,) + tuple(self.nodes[arg].key for arg in args) + params
+        existing = self.index.get(key)
+        if existing is not None:
+            return existing
+        self.nodes.append(Node(op, args + params, key))
+        self.index[key] = len(self.nodes) - 1
+        return len(self.nodes) - 1
+
+    def const(self, value: float) -> int:
+        key = ("const", value)
+        existing = self.index.get(key)
+        if existing is not None:
+            return existing
+        self.nodes.append(Node("const", (value,), key))
+        self.index[key] = len(self.nodes) - 1
+        return len(self.nodes) - 1
+
+    def series(self, name: str) -> int:
+        key = ("series", name)
+        existing = self.index.get(key)
+        if existing is not None:
+            return existing
+        self.nodes.append(Node("series", (name,), key))
+        self.index[key] = len(self.nodes) - 1
+        return len(self.nodes) - 1
+
+    def _fold(self, op: str, args: Tuple, params: Tuple) -> Any:
+        values = [self.nodes[arg].args[0] for arg in args]
+        if op in ("abs", "neg", "not"):
+            return OPERATIONS[op](values[0]).item()
+        if op in OPERATIONS:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return np.asarray(OPERATIONS[op](*values)).item()
+        raise ValueError(f"{op}() needs a price series, not a constant")
+
+    def indicator(self, name: str, source: int, period: Any) -> int:
+        try:
+            period = int(period)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name}() period must be a number")
+        if period < 1:
+            raise ValueError(f"{name}() period must be positive")
+        return self.add(name, (source,), (period,))
+
+    def build(self, tree: ast.AST) -> int:
+        if isinstance(tree, ast.Expression):
+            return self.build(tree.body)
+
+        if isinstance(tree, ast.BoolOp):
+            op = "and" if isinstance(tree.op, ast.And) else "or"
+            result = self.build(tree.values[0])
+            for value in tree.values[1:]:
+                result = self.add(op, (result, self.build(value)))
+            return result
+
+        if isinstance(tree, ast.UnaryOp):
+            operand = self.build(tree.operand)
+            if isinstance(tree.op, ast.Not):
+                return self.add("not", (operand,))
+            if isinstance(tree.op, ast.USub):
+                return self.add("neg", (operand,))
+            if isinstance(tree.op, ast.UAdd):
+                return operand
+
+        if isinstance(tree, ast.BinOp) and type(tree.op) in BINARY:
+            return self.add(BINARY[type(tree.op)], (self.build(tree.left), self.build(tree.right)))
+
+        if isinstance(tree, ast.Compare):
+            # a < b < c means (a < b) and (b < c)
+            result, left = None, self.build(tree.left)
+            for operator, comparator in zip(tree.ops, tree.comparators):
+                if type(operator) not in COMPARE:
+                    raise ValueError("Unsupported comparison in condition")
+                right = self.build(comparator)
+                comparison = self.add(COMPARE[type(operator)], (left, right))
+                result = comparison if result is None else self.add("and", (result, comparison))
+                left = right
+            return result
+
+        if isinstance(tree, ast.Constant) and isinstance(tree.value, (int, float)):
+            return self.const(float(tree.value))
+
+        if isinstance(tree, ast.Name):
+            return self.name(tree.id)
+
+        if isinstance(tree, ast.Call) and isinstance(tree.func, ast.Name) and not tree.keywords:
+            return self.call(tree.func.id, tree.args)
+
+        raise ValueError(f"Unsupported syntax in condition: {ast.dump(tree)[:60]}")
+
+    def name(self, name: str) -> int:
+        name = ALIASES.get(name, name)
+        if name in PRICE_SERIES:
+            return self.series(name)
+        if name in self.parameters:
+            return self.const(self.parameters[name])
+        if name in MOVING_AVERAGES:
+            period_key, default = MOVING_AVERAGES[name]
+            return self.indicator("sma", self.series("close"), self.parameters.get(period_key, default))
+        if name in BARE_INDICATORS:
+            period_key, default = BARE_INDICATORS[name]
+            return self.indicator(name, self.series("close"), self.parameters.get(period_key, default))
+        if name == "threshold":
+            # Templates write "threshold" for their single *_threshold parameter
+            candidates = [key for key in self.parameters if key.endswith("_threshold")]
+            if len(candidates) == 1:
+                return self.const(self.parameters[candidates[0]])
+
+        match = re.match(r"^(sma|rsi|momentum)_(\d+)$", name)
+        if match:
+            return self.indicator(match.group(1), self.series("close"), match.group(2))
+
+        raise ValueError(f"Unknown name in condition: {name}")
+
+    def call(self, function: str, arguments: List[ast.AST]) -> int:
+        if function not in FUNCTIONS:
+            raise ValueError(f"Unknown function in condition: {function}")
+
+        args = [self.build(argument) for argument in arguments]
+        if function in INDICATOR_NAMES or function == "shift":
+            if len(args) == 1 and function in INDICATOR_NAMES:
+                period_key, default = BARE_INDICATORS.get(function, ("ma_period", 20))
+                args.append(self.const(self.parameters.get(period_key, default)))
+            if len(args) != 2 or self.nodes[args[1]].op != "const":
+                raise ValueError(f"{function}() takes a series and a constant period")
+            period = self.nodes[args[1]].args[0]
+            if function == "shift":
+                return self.add("shift", (args[0],), (int(period),))
+            return self.indicator(function, args[0], period)
+
+        if function == "abs":
+            if len(args) != 1:
+                raise ValueError("abs() takes one argument")
+            return self.add("abs", (args[0],))
+
+        if len(args) != 2:
+            raise ValueError(f"{function}() takes two arguments")
+        if function == "cross_above":
+            return self.add("edge", (self.add("lt", (args[1], args[0])),))
+        if function == "cross_below":
+            return self.add("edge", (self.add("lt", (args[0], args[1])),))
+        return self.add(function, tuple(args))
+
+def _normalize(expression: str) -> str:
+    """Accept the spellings users type: AND/OR/NOT in any case and a single '=' for equality"""
+    expression = re.sub(r"\b(and|or|not)\b", lambda match: match.group(1).lower(), expression, flags=re.IGNORECASE)
+    return re.sub(r"(?<![<>=!])=(?!=)", "==", expression)
+
+class ConditionCompiler:
+    """Compiles Strategy.conditions into Plans, cached by content
+
+    The cache key is the condition strings plus the numeric parameters they can
+    reference, so every saved version of a strategy maps to one plan and an
+    edit simply compiles a new one.
+    """
+
+    def __init__(self, max_plans: int = 1024):
+        self.max_plans = max_plans
+        self.plans: "OrderedDict[str, Plan]" = OrderedDict()
+
+    def compile(self, conditions: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None,
+                names: Tuple[str, ...] = ("entry", "exit")) -> Plan:
+        expressions = {
+            name: conditions[name] for name in names
+            if isinstance(conditions.get(name), str) and conditions[name].strip()
+        }
+        numeric = {
+            key: value for key, value in (parameters or {}).items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        }
+        key = json.dumps([expressions, numeric], sort_keys=True)
+
+        plan = self.plans.get(key)
+        if plan is not None:
+            self.plans.move_to_end(key)
+            return plan
+
+        builder = _Builder(numeric)
+        outputs = {}
+        for name, expression in expressions.items():
+            try:
+                tree = ast.parse(_normalize(expression), mode="eval")
+            except SyntaxError:
+                raise ValueError(f"Invalid {name} condition: {expression}")
+            outputs[name] = builder.build(tree)
+        plan = Plan(builder.nodes, outputs)
+
+        self.plans[key] = plan
+        if len(self.plans) > self.max_plans:
+            self.plans.popitem(last=False)
+        return plan
+
+    def validate(self, conditions: Optional[Dict[str, Any]], parameters: Optional[Dict[str, Any]] = None):
+        """Raise ValueError if any entry/exit condition does not compile"""
+        if conditions:
+            self.compile(conditions, parameters)
+
+# Create global condition compiler instance
+condition_compiler = ConditionCompiler()
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import asyncio
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from config import settings
+
+PANEL_FIELDS = ("open", "high", "low", "close", "volume")
+
+class DataPanel:
+    """OHLCV for many symbols on one time axis
+
+    Every field is a (T, N) float64 array with one column per symbol, stored
+    column-major so a single symbol's series is contiguous. Panels loaded from
+    the PanelStore are read-only memory maps shared through the page cache.
+    """
+
+    def __init__(self, timestamps: np.ndarray, symbols: List[str], fields: Dict[str, np.ndarray],
+                 created: Optional[float] = None):
+        self.timestamps = timestamps
+        self.symbols = list(symbols)
+        self.fields = fields
+        self.created = created
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    def prices(self) -> Dict[str, np.ndarray]:
+        """The fields signal generation reads"""
+        return dict(self.fields)
+
+def align_panel(histories: Dict[str, Dict[str, np.ndarray]], fields=PANEL_FIELDS, fill: bool = True) -> DataPanel:
+    """Put per-symbol columns on the union of their timestamps
+
+    Gaps after a symbol's first bar are forward-filled (suspensions, holidays on
+    one exchange) unless `fill` is off; rows before it stay NaN, which signals
+    and the simulators treat as "not tradable".
+    """
+    histories = {symbol: history for symbol, history in histories.items() if history and len(history["timestamp"])}
+    if not histories:
+        return DataPanel(np.empty(0, dtype=np.int64), [], {field: np.empty((0, 0)) for field in fields})
+
+    timestamps = np.unique(np.concatenate([history["timestamp"] for history in histories.values()]))
+    length, width = len(timestamps), len(histories)
+    panel = {field: np.full((length, width), np.nan, order="F") for field in fields}
+
+    for column, history in enumerate(histories.values()):
+        rows = np.searchsorted(timestamps, history["timestamp"])
+        if not fill:
+            for field in fields:
+                if field in history:
+                    panel[field][rows, column] = history[field]
+            continue
+        # Index of the latest row this symbol actually traded on, per panel row
+        filled = np.full(length, -1)
+        filled[rows] = np.arange(len(rows))
+        filled = np.maximum.accumulate(filled)
+        listed = filled >= 0
+        for field in fields:
+            if field in history:
+                panel[field][listed, column] = history[field][filled[listed]]
+
+    return DataPanel(timestamps, list(histories.keys()), panel)
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """(T, N) array with NaN rows carrying the column's latest value; leading NaN stay"""
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+def with_quotes(panel: DataPanel, quotes: Dict[str, float], replace_last: bool,
+                volumes: Optional[Dict[str, float]] = None) -> Dict[str, np.ndarray]:
+    """The panel's price fields with live prices as the newest bar
+
+    `replace_last` updates the last bar in place (it is today's, still
+    forming), otherwise a new bar is appended. Symbols without a quote
+    carry their last close; the new bar's volume is the quoted session
+    volume where there is one. The shared panel is never modified.
+    """
+    close = panel["close"]
+    latest = np.array([quotes.get(symbol, np.nan) for symbol in panel.symbols], dtype=np.float64)
+    latest = np.where(np.isnan(latest), close[-1], latest)
+    quoted_volume = np.array([(volumes or {}).get(symbol) or np.nan for symbol in panel.symbols], dtype=np.float64)
+
+    if replace_last:
+        history = {field: values[:-1] for field, values in panel.prices().items()}
+        high = np.fmax(panel["high"][-1], latest)
+        low = np.fmin(panel["low"][-1], latest)
+        opening = panel["open"][-1]
+        volume = np.where(np.isnan(quoted_volume), panel["volume"][-1], quoted_volume)
+    else:
+        history = panel.prices()
+        high = low = opening = latest
+        volume = quoted_volume
+
+    row = {"open": opening, "high": high, "low": low, "close": latest, "volume": volume}
+    return {
+        field: np.vstack([values, row.get(field, values[-1])[None, :]])
+        for field, values in history.items()
+    }
+
+class PanelStore:
+    """Disk cache of aligned panels as .npy files opened with mmap
+
+    Each panel is a directory keyed by (symbols, date range, interval). Ranges
+    that end before today never change and are kept until pruned; ranges that
+    reach today are rebuilt after `ttl` seconds. Writes go to a scratch
+    directory and are renamed into place, so readers never see partial files.
+    """
+
+    def __init__(self, root: Optional[str] = None, ttl: Optional[int] = None,
+                 retention_days: Optional[int] = None, max_open: int = 32):
+        self.root = root or settings.BACKTEST_PANEL_DIR
+        self.ttl = ttl if ttl is not None else settings.BACKTEST_PANEL_TTL_SECONDS
+        self.retention = (retention_days if retention_days is not None
+                          else settings.BACKTEST_PANEL_RETENTION_DAYS) * 86400
+        self.max_open = max_open
+        self.open_panels: "OrderedDict[str, DataPanel]" = OrderedDict()
+        self.building: Dict[str, asyncio.Future] = {}
+
+    def key(self, symbols: List[str], start: datetime, end: datetime, interval: str = "1d",
+            fill: bool = True, adjusted: bool = True) -> str:
+        identity = [sorted(set(symbols)), _day(start), _day(end), interval, fill]
+        if not adjusted:
+            identity.append("unadjusted")
+        return hashlib.sha1(json.dumps(identity).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _fresh(self, meta: Dict[str, Any]) -> bool:
+        return meta["end"] < date.today().isoformat() or time.time() - meta["created"] < self.ttl
+
+    def load(self, key: str) -> Optional[DataPanel]:
+        """Memory-map a stored panel, or None when missing or stale"""
+        try:
+            panel = self.open_panels.get(key)
+            path = self._path(key)
+            with open(os.path.join(path, "meta.json")) as handle:
+                meta = json.load(handle)
+            if not self._fresh(meta):
+                self.open_panels.pop(key, None)
+                return None
+            # Re-map if the directory was replaced since we opened it
+            if panel is not None and panel.created == meta["created"]:
+                self.open_panels.move_to_end(key)
+                return panel
+
+            panel = DataPanel(
+                np.load(os.path.join(path, "timestamp.npy")),
+                meta["symbols"],
+                {field: np.load(os.path.join(path, f"{field}.npy"), mmap_mode="r") for field in meta["fields"]},
+                meta["created"]
+            )
+            os.utime(os.path.join(path, "meta.json"))
+            self._remember(key, panel)
+            return panel
+
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading data panel {key}: {e}")
+            return None
+
+    def save(self, key: str, panel: DataPanel, end: datetime) -> DataPanel:
+        """Write a panel and return the memory-mapped copy"""
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            scratch = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+            os.makedirs(scratch)
+            np.save(os.path.join(scratch, "timestamp.npy"), panel.timestamps)
+            for field, values in panel.fields.items():
+                np.save(os.path.join(scratch, f"{field}.npy"), np.asfortranarray(values))
+            with open(os.path.join(scratch, "meta.json"), "w") as handle:
+                json.dump({
+                    "symbols": panel.symbols,
+                    "fields": list(panel.fields.keys()),
+                    "end": _day(end),
+                    "created": time.time()
+                }, handle)
+
+            path = self._path(key)
+            if os.path.exists(path):
+                # Open maps of the old files stay valid after the unlink
+                stale = os.path.join(self.root, f".stale-{uuid.uuid4().hex}")
+                os.rename(path, stale)
+                shutil.rmtree(stale, ignore_errors=True)
+            os.rename(scratch, path)
+            self.prune()
+
+        except Exception as e:
+            print(f"Error saving data panel {key}: {e}")
+            return panel
+
+        return self.load(key) or panel
+
+    async def get_or_build(self, symbols: List[str], start: datetime, end: datetime,
+                           fetch: Callable[[str], Awaitable[Dict[str, np.ndarray]]],
+                           interval: str = "1d", fill: bool = True, adjusted: bool = True) -> DataPanel:
+        """Stored panel for the request, building it once (per process) on a miss
+
+        Columns come back in sorted symbol order so every request for the same
+        universe maps the same files; symbols without history are left out.
+        `adjusted` only keys the store: `fetch` must return matching prices.
+        """
+        key = self.key(symbols, start, end, interval, fill, adjusted)
+        panel = self.load(key)
+        if panel is not None:
+            return panel
+
+        pending = self.building.get(key)
+        if pending is not None:
+            panel = await asyncio.shield(pending)
+            if panel is None:
+                raise ValueError(f"Failed to build price panel for {', '.join(symbols)}")
+            return panel
+
+        future = asyncio.get_event_loop().create_future()
+        self.building[key] = future
+        try:
+            unique = sorted(set(symbols))
+            histories = await asyncio.gather(*[fetch(symbol) for symbol in unique])
+            panel = align_panel(dict(zip(unique, histories)), fill=fill)
+            if panel.symbols:
+                panel = self.save(key, panel, end)
+            return panel
+        finally:
+            self.building.pop(key, None)
+            future.set_result(panel)
+
+    def prune(self):
+        """Drop panels nobody has opened within the retention period"""
+        cutoff = time.time() - self.retention
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                # Scratch directories of crashed writers are only removed once clearly abandoned
+                marker = path if name.startswith(".") else os.path.join(path, "meta.json")
+                if os.path.getmtime(marker) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def _remember(self, key: str, panel: DataPanel):
+        self.open_panels[key] = panel
+        self.open_panels.move_to_end(key)
+        while len(self.open_panels) > self.max_open:
+            self.open_panels.popitem(last=False)
+
+def _day(value: datetime) -> str:
+    return value.date().isoformat() if isinstance(value, datetime) else value.isoformat()
+
+# Create global panel store instance
+panel_store = PanelStore()
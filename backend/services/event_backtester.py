@@ -0,0 +1,585 @@
+import time
+import heapq
+from bisect import bisect_left
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from services.backtest_engine import BacktestEngine, generate_signals, compute_metrics, monthly_returns
+
+IST_OFFSET_NS = (5 * 60 + 30) * 60 * 10**9
+DAY_NS = 86400 * 10**9
+BUY, SELL = 1, -1
+
+# Event kinds; when timestamps tie, lower kinds are handled first
+FILL, TRIGGER, SQUARE_OFF = 0, 1, 2
+_NEVER = np.iinfo(np.int64).max
+
+class Order:
+    """A working order; `remaining` shrinks as partial fills arrive"""
+    __slots__ = ("symbol", "side", "quantity", "remaining", "submitted", "reason", "cancelled")
+
+    def __init__(self, symbol: int, side: int, quantity: float, submitted: int, reason: str):
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.remaining = quantity
+        self.submitted = submitted
+        self.reason = reason
+        self.cancelled = False
+
+class Event:
+    """Heap payload; the heap itself orders (time, kind, sequence, event) tuples"""
+    __slots__ = ("symbol", "bar", "order", "version", "stop", "target")
+
+    def __init__(self, symbol: int, bar: int, order: Optional[Order] = None, version: int = 0,
+                 stop: float = -np.inf, target: float = np.inf):
+        self.symbol = symbol
+        self.bar = bar
+        self.order = order
+        self.version = version
+        self.stop = stop
+        self.target = target
+
+class FillModel:
+    """How orders meet the market: latency, slippage, liquidity and price bands
+
+    Prices are per share; percentages follow the settings conventions. Override
+    `price` or `quantity` for other impact or liquidity models.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None, slippage_percent: Optional[float] = None,
+                 impact_percent: float = 0.0, participation_percent: Optional[float] = None,
+                 circuit_percent: Optional[float] = None):
+        latency_ms = latency_ms if latency_ms is not None else settings.BACKTEST_LATENCY_MS
+        slippage_percent = slippage_percent if slippage_percent is not None else settings.BACKTEST_SLIPPAGE_PERCENT
+        participation_percent = (participation_percent if participation_percent is not None
+                                 else settings.BACKTEST_PARTICIPATION_PERCENT)
+        circuit_percent = circuit_percent if circuit_percent is not None else settings.BACKTEST_CIRCUIT_PERCENT
+
+        self.latency_ns = int(latency_ms * 10**6)
+        self.slippage = slippage_percent / 100
+        self.impact = impact_percent / 100
+        self.participation = participation_percent / 100
+        self.circuit = circuit_percent / 100
+
+    def price(self, side: int, reference: float, quantity: float, volume: float) -> float:
+        """Fill price: fixed slippage plus impact proportional to the share of bar volume taken"""
+        impact = self.impact * quantity / volume if self.impact and volume > 0 else 0.0
+        return reference * (1 + side * (self.slippage + impact))
+
+    def quantity(self, remaining: float, volume: float) -> float:
+        """Shares fillable on one bar; 0 participation means unlimited liquidity"""
+        if not self.participation:
+            return remaining
+        if not volume > 0:
+            return 0.0
+        return min(remaining, float(np.floor(volume * self.participation)))
+
+class EventStream:
+    """Bars (or ticks, as bars with zero width) for many symbols, indexed per symbol
+
+    Input is a (T, N) panel with NaN where a symbol has no bar; it is not
+    forward-filled, so every stream bar is a real print.
+    """
+
+    def __init__(self, timestamps: np.ndarray, close: np.ndarray, high: Optional[np.ndarray] = None,
+                 low: Optional[np.ndarray] = None, open: Optional[np.ndarray] = None,
+                 volume: Optional[np.ndarray] = None, interval_ns: int = 0, circuit: float = 0.0):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.close = np.asarray(close, dtype=float).reshape(len(self.timestamps), -1)
+        self.interval_ns = int(interval_ns)
+        width = self.close.shape[1]
+
+        def field(values: Optional[np.ndarray]) -> np.ndarray:
+            return self.close if values is None else np.asarray(values, dtype=float).reshape(self.close.shape)
+
+        fields = {"open": field(open), "high": field(high), "low": field(low), "close": self.close}
+        volume = np.full(self.close.shape, np.nan) if volume is None else field(volume)
+
+        # Per-symbol compact series: stream positions are indices into these
+        self.rows: List[np.ndarray] = []
+        self.series: List[Dict[str, np.ndarray]] = []
+        for column in range(width):
+            rows = np.flatnonzero(~np.isnan(self.close[:, column]))
+            series = {name: values[rows, column] for name, values in fields.items()}
+            series["volume"] = volume[rows, column]
+            series["time"] = self.timestamps[rows]
+            series["upper"], series["lower"] = self._bands(series["time"], series["close"], circuit)
+            self.rows.append(rows)
+            self.series.append(series)
+
+    @staticmethod
+    def _bands(times: np.ndarray, close: np.ndarray, circuit: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Price band per bar from the previous IST session's last close; NaN on the first day"""
+        upper = np.full(len(times), np.nan)
+        lower = np.full(len(times), np.nan)
+        if not circuit or len(times) == 0:
+            return upper, lower
+        days = (times + IST_OFFSET_NS) // DAY_NS
+        session = np.concatenate([[0], np.cumsum(days[1:] != days[:-1])])
+        last_of_session = np.flatnonzero(np.append(days[1:] != days[:-1], True))
+        later = session > 0
+        reference = close[last_of_session[session[later] - 1]]
+        # Bands are quoted in paise; unrounded, a bar locked at its band could read as just inside it
+        upper[later] = np.round(reference * (1 + circuit), 2)
+        lower[later] = np.round(reference * (1 - circuit), 2)
+        return upper, lower
+
+    def bars(self) -> int:
+        return int(sum(len(rows) for rows in self.rows))
+
+    def signals(self, category: str, parameters: Optional[Dict[str, Any]] = None,
+                conditions: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Strategy signals per symbol on its own gap-free series, scattered back onto the panel"""
+        entries = np.zeros(self.close.shape, dtype=bool)
+        exits = np.zeros(self.close.shape, dtype=bool)
+        for column, (rows, series) in enumerate(zip(self.rows, self.series)):
+            if len(rows) == 0:
+                continue
+            prices = {name: series[name][:, None] for name in ("open", "high", "low", "close", "volume")}
+            column_entries, column_exits = generate_signals(category, prices, parameters, conditions)
+            entries[rows, column] = column_entries[:, 0]
+            exits[rows, column] = column_exits[:, 0]
+        return entries, exits
+
+def _first_hit(low: np.ndarray, high: np.ndarray, start: int, stop_price: float, target_price: float) -> int:
+    """First bar at or after `start` that touches the stop or target, scanning in growing chunks"""
+    size, length = 256, len(low)
+    while start < length:
+        end = min(length, start + size)
+        hit = (low[start:end] <= stop_price) | (high[start:end] >= target_price)
+        if hit.any():
+            return start + int(hit.argmax())
+        start, size = end, size * 4
+    return -1
+
+class EventBacktester(BacktestEngine):
+    """Event-driven simulator for intraday strategies on ticks or minute bars
+
+    Signals are still computed vectorized; the event loop handles what bars
+    cannot: orders that reach the exchange after a latency, fill bar by bar as
+    liquidity allows, are refused at circuit limits, and stops or targets that
+    fill inside a bar. Bars are replayed from arrays rather than the heap, and
+    the bars between a position's entry and its stop or target are skipped with
+    a vectorized scan, so quiet stretches cost almost nothing.
+    """
+
+    def __init__(self, fill_model: Optional[FillModel] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.fill_model = fill_model or FillModel()
+
+    def run_stream(self, stream: EventStream, entries: np.ndarray, exits: np.ndarray, initial_capital: float,
+                   risk_management: Optional[Dict[str, Any]] = None,
+                   symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Replay signals through the fill model; returns the same result shape as BacktestEngine.simulate"""
+        started = time.perf_counter()
+        width = stream.close.shape[1]
+        symbols = symbols or [f"symbol_{index}" for index in range(width)]
+        options = self._options(risk_management)
+        weights = self.allocation(symbols, risk_management)
+        square_off = _square_off_ns((risk_management or {}).get("square_off"))
+
+        run = _Run(stream, self.fill_model, options, initial_capital * weights, square_off)
+        run.replay(entries, exits, weights > 0)
+        run.close_out()
+
+        equity = run.equity()
+        days = (stream.timestamps + IST_OFFSET_NS) // DAY_NS
+        day_end = np.append(days[1:] != days[:-1], True) if len(days) else np.zeros(0, dtype=bool)
+        daily_equity, daily_timestamps = equity[day_end], stream.timestamps[day_end]
+
+        trades = run.trades
+        for trade in trades:
+            trade["symbol"] = symbols[trade.pop("column")]
+        wins = sum(1 for trade in trades if trade["pnl"] > 0)
+        elapsed = time.perf_counter() - started
+
+        return dict(
+            compute_metrics(daily_equity, initial_capital, self.periods_per_year),
+            win_rate=float(wins / len(trades) * 100) if trades else 0.0,
+            total_trades=len(trades),
+            equity=daily_equity,
+            timestamps=daily_timestamps,
+            trades=trades,
+            monthly_returns=monthly_returns(daily_timestamps, daily_equity, initial_capital),
+            per_symbol={
+                symbols[column]: {
+                    "allocation": float(weights[column] * 100),
+                    "total_trades": sum(1 for trade in trades if trade["symbol"] == symbols[column]),
+                    "pnl": float(sum(trade["pnl"] for trade in trades if trade["symbol"] == symbols[column]))
+                }
+                for column in np.flatnonzero(weights)
+            },
+            bars=stream.bars(),
+            events=run.events,
+            elapsed_seconds=round(elapsed, 3),
+            bars_per_second=round(stream.bars() / elapsed) if elapsed > 0 else None
+        )
+
+    def run(self, timestamps: np.ndarray, close: np.ndarray, initial_capital: float,
+            category: str = "custom", parameters: Optional[Dict[str, Any]] = None,
+            conditions: Optional[Dict[str, Any]] = None, risk_management: Optional[Dict[str, Any]] = None,
+            high: Optional[np.ndarray] = None, low: Optional[np.ndarray] = None,
+            symbols: Optional[List[str]] = None, open: Optional[np.ndarray] = None,
+            volume: Optional[np.ndarray] = None, interval_ns: int = 60 * 10**9) -> Dict[str, Any]:
+        """Backtest a strategy over an unfilled (T, N) intraday panel"""
+        stream = EventStream(timestamps, close, high, low, open, volume, interval_ns, self.fill_model.circuit)
+        entries, exits = stream.signals(category, parameters, conditions)
+        return self.run_stream(stream, entries, exits, initial_capital, risk_management, symbols)
+
+class _Run:
+    """Mutable state of one replay; kept off the engine so engines can be shared"""
+
+    def __init__(self, stream: EventStream, fill_model: FillModel, options: Dict[str, float],
+                 sleeves: np.ndarray, square_off: Optional[int]):
+        self.stream = stream
+        self.model = fill_model
+        self.options = options
+        self.commission = options["commission"]
+        self.square_off = square_off
+        width = len(stream.series)
+
+        self.heap: List[Tuple[int, int, int, Event]] = []
+        self.sequence = 0
+        self.events = 0
+        # Symbols trade separate sleeves, so events of different symbols commute.
+        # A working order may run ahead of the heap until its own symbol's next
+        # signal (at or after `horizon`) or its stop/square-off alarm.
+        self.horizon = 0
+        self.signal_times: List[List[int]] = [[] for _ in range(width)]
+        self.alarm = [_NEVER] * width
+        self.cash = sleeves.astype(float).tolist()
+        self.shares = [0.0] * width
+        self.working: List[Optional[Order]] = [None] * width
+        self.version = [0] * width
+        self.open_trade: List[Optional[Dict[str, Any]]] = [None] * width
+        self.trades: List[Dict[str, Any]] = []
+        # (panel row, column, share delta, cash delta) for the equity curve
+        self.ledger: List[Tuple[int, int, float, float]] = []
+        self.initial_capital = float(sleeves.sum())
+
+    def push(self, when: int, kind: int, event: Event):
+        self.sequence += 1
+        heapq.heappush(self.heap, (when, kind, self.sequence, event))
+
+    def replay(self, entries: np.ndarray, exits: np.ndarray, tradable: np.ndarray):
+        """Merge the time-ordered signal cells with the event heap"""
+        stream = self.stream
+        # An exit wins over an entry on the same bar, and exits are often levels
+        # ("short_ma < long_ma" on every bar): only the first bar of a run can act,
+        # later ones find the position flat or a sell already working
+        entries = entries & ~exits & tradable[None, :]
+        exits = exits & tradable[None, :]
+        for column, column_rows in enumerate(stream.rows):
+            level = exits[column_rows, column]
+            exits[column_rows[1:], column] = level[1:] & ~level[:-1]
+        rows, columns = np.nonzero(entries | exits)
+        # Signals are known when their bar closes
+        signal_times = (stream.timestamps[rows] + stream.interval_ns).tolist()
+        is_exit = exits[rows, columns].tolist()
+        positions = self._positions(rows, columns).tolist()
+        columns = columns.tolist()
+        for when, column in zip(signal_times, columns):
+            self.signal_times[column].append(when)
+
+        heap, shares, working = self.heap, self.shares, self.working
+        handlers = (self.on_fill, self.on_trigger, self.on_square_off)
+        count, index = len(signal_times), 0
+        pop = heapq.heappop
+
+        while index < count or heap:
+            horizon = signal_times[index] if index < count else _NEVER
+            if heap and heap[0][0] <= horizon:
+                self.horizon = horizon
+                when, kind, _, event = pop(heap)
+                handlers[kind](when, event)
+                self.events += 1
+                continue
+
+            column = columns[index]
+            # Fast path: most signal cells change nothing
+            if is_exit[index]:
+                if shares[column] > 0 or working[column] is not None:
+                    self.on_exit_signal(horizon, column)
+                    self.events += 1
+            elif shares[column] == 0 and working[column] is None:
+                self.on_entry_signal(horizon, column, positions[index])
+                self.events += 1
+            index += 1
+
+    def _positions(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        """Position of each signal bar within its symbol's series"""
+        positions = np.empty(len(rows), dtype=np.int64)
+        for column in np.unique(columns):
+            selected = columns == column
+            positions[selected] = np.searchsorted(self.stream.rows[column], rows[selected])
+        return positions
+
+    def _limit(self, column: int) -> int:
+        """Latest time a handler may advance this symbol to without skipping one of its events"""
+        times = self.signal_times[column]
+        index = bisect_left(times, self.horizon)
+        return min(times[index] if index < len(times) else _NEVER, self.alarm[column])
+
+    def _cutoff(self, when: int) -> int:
+        """Square-off time of the IST session containing `when`"""
+        return (when + IST_OFFSET_NS) // DAY_NS * DAY_NS - IST_OFFSET_NS + self.square_off
+
+    # Order flow ---------------------------------------------------------------
+
+    def submit(self, when: int, column: int, side: int, quantity: float, reason: str):
+        if quantity <= 0:
+            return
+        order = Order(column, side, quantity, when, reason)
+        self.working[column] = order
+        arrival = when + self.model.latency_ns
+        bar = self._bar_at(column, arrival)
+        if bar >= 0:
+            self.push(max(arrival, self.stream.series[column]["time"].item(bar)), FILL, Event(column, bar, order))
+
+    def _bar_at(self, column: int, when: int) -> int:
+        """Bar in progress at `when`, else the next one; -1 past the end"""
+        times = self.stream.series[column]["time"]
+        interval = self.stream.interval_ns
+        bar = int(np.searchsorted(times, when - interval, side="right" if interval else "left"))
+        return bar if bar < len(times) else -1
+
+    def on_entry_signal(self, when: int, column: int, bar: int):
+        if self.square_off is not None and when >= self._cutoff(when):
+            return
+        price = self.stream.series[column]["close"].item(bar)
+        budget = self.cash[column] * self.options["position_size"]
+        quantity = float(np.floor(budget / (price * (1 + self.commission) * (1 + self.model.slippage))))
+        self.submit(when, column, BUY, quantity, "entry_signal")
+
+    def on_exit_signal(self, when: int, column: int):
+        order = self.working[column]
+        if order is not None and order.side == SELL:
+            return
+        self.flatten(when, column, "exit_signal")
+
+    def flatten(self, when: int, column: int, reason: str):
+        """Cancel any working order and send a market sell for the whole position"""
+        order = self.working[column]
+        if order is not None:
+            order.cancelled = True
+            self.working[column] = None
+        self.version[column] += 1
+        self.submit(when, column, SELL, self.shares[column], reason)
+
+    def on_fill(self, when: int, event: Event):
+        """Work an order bar by bar until it is done or another event is due first"""
+        order = event.order
+        if order.cancelled:
+            return
+        column, bar, side = event.symbol, event.bar, order.side
+        series = self.stream.series[column]
+        times, volume = series["time"], series["volume"]
+        low, high, upper, lower = series["low"], series["high"], series["upper"], series["lower"]
+        model = self.model
+        last = len(times) - 1
+        cutoff = self._cutoff(when) if side == BUY and self.square_off is not None else _NEVER
+        first_fill = self.open_trade[column] is None
+        limit = self._limit(column)
+
+        while True:
+            if when >= cutoff:
+                # Entries still working at square-off are pulled
+                order.cancelled = True
+                break
+
+            bar_volume = volume.item(bar)
+            # A bar locked at its band only trades on one side
+            if side == BUY:
+                blocked = low.item(bar) >= upper.item(bar)
+            else:
+                blocked = high.item(bar) <= lower.item(bar)
+            quantity = 0.0 if blocked else model.quantity(order.remaining, bar_volume)
+
+            if quantity > 0:
+                reference = self._reference_price(series, bar, when)
+                price = _clip(model.price(side, reference, quantity, bar_volume), lower.item(bar), upper.item(bar))
+                order.remaining -= quantity
+                arm = side == BUY and (first_fill or order.remaining <= 0)
+                self.execute(column, bar, side, quantity, price, order.reason, arm)
+                if arm:
+                    limit = min(limit, self.alarm[column])
+                first_fill = False
+
+            if order.remaining <= 0 or bar >= last:
+                break
+            bar += 1
+            when = times.item(bar)
+            if when > limit:
+                self.push(when, FILL, Event(column, bar, order))
+                return
+
+        if self.working[column] is order:
+            self.working[column] = None
+        # An entry that ends partly filled protects what it got
+        if side == BUY and order.remaining > 0 and self.shares[column] > 0:
+            self.arm(column, bar + 1, times.item(bar))
+
+    def _reference_price(self, series: Dict[str, np.ndarray], bar: int, when: int) -> float:
+        """Price at `when` inside the bar, interpolated from open to close"""
+        interval = self.stream.interval_ns
+        start = series["time"].item(bar)
+        opening = series["open"].item(bar)
+        if not interval or when <= start:
+            return opening
+        fraction = min((when - start) / interval, 1.0)
+        return opening + (series["close"].item(bar) - opening) * fraction
+
+    def execute(self, column: int, bar: int, side: int, quantity: float, price: float, reason: str,
+                arm: bool = False):
+        """Book a fill against the symbol's sleeve and the round-trip trade it belongs to"""
+        notional = quantity * price
+        cash_delta = -notional * (1 + self.commission) if side == BUY else notional * (1 - self.commission)
+        self.cash[column] += cash_delta
+        self.shares[column] += side * quantity
+        self.ledger.append((self.stream.rows[column].item(bar), column, side * quantity, cash_delta))
+
+        stamp = self.stream.series[column]["time"].item(bar)
+        trade = self.open_trade[column]
+        if trade is None:
+            trade = self.open_trade[column] = {
+                "column": column, "entry_time": stamp, "bought": 0.0, "sold": 0.0,
+                "buy_notional": 0.0, "sell_notional": 0.0, "cost": 0.0, "proceeds": 0.0, "fills": 0
+            }
+        trade["fills"] += 1
+        if side == BUY:
+            trade["bought"] += quantity
+            trade["buy_notional"] += notional
+            trade["cost"] -= cash_delta
+            if arm:
+                self.arm(column, bar + 1, stamp)
+            return
+
+        trade["sold"] += quantity
+        trade["sell_notional"] += notional
+        trade["proceeds"] += cash_delta
+        if self.shares[column] <= 1e-9:
+            self.shares[column] = 0.0
+            self.version[column] += 1
+            self.open_trade[column] = None
+            self.trades.append(_close_trade(trade, stamp, reason))
+
+    def arm(self, column: int, start: int, stamp: int):
+        """(Re)schedule the stop/target trigger and the square-off for the current position"""
+        self.version[column] += 1
+        version = self.version[column]
+        stop_loss, take_profit = self.options["stop_loss"], self.options["take_profit"]
+        self.alarm[column] = _NEVER
+
+        if stop_loss or take_profit:
+            trade = self.open_trade[column]
+            entry_price = trade["buy_notional"] / trade["bought"]
+            stop_price = entry_price * (1 - stop_loss) if stop_loss else -np.inf
+            target_price = entry_price * (1 + take_profit) if take_profit else np.inf
+            series = self.stream.series[column]
+            bar = _first_hit(series["low"], series["high"], start, stop_price, target_price)
+            if bar >= 0:
+                self.alarm[column] = series["time"].item(bar)
+                self.push(self.alarm[column], TRIGGER, Event(column, bar, None, version, stop_price, target_price))
+
+        if self.square_off is not None:
+            cutoff = self._cutoff(stamp)
+            if stamp < cutoff:
+                self.alarm[column] = min(self.alarm[column], cutoff)
+                self.push(cutoff, SQUARE_OFF, Event(column, -1, version=version))
+
+    def on_trigger(self, when: int, event: Event):
+        """Stop or target touched inside a bar: resting exchange orders fill without latency"""
+        column, bar = event.symbol, event.bar
+        if event.version != self.version[column] or self.shares[column] <= 0:
+            return
+        series = self.stream.series[column]
+        stop_price, target_price = event.stop, event.target
+
+        if series["high"].item(bar) <= series["lower"].item(bar):
+            # Locked at the lower band: nothing sells until the band opens
+            if bar + 1 < len(series["time"]):
+                self.push(series["time"].item(bar + 1), TRIGGER,
+                          Event(column, bar + 1, None, event.version, stop_price, target_price))
+            return
+
+        opening = series["open"].item(bar)
+        if series["low"].item(bar) <= stop_price:
+            # Gaps through the stop fill at the open; the stop becomes a market order
+            price = self.model.price(SELL, min(stop_price, opening), self.shares[column], series["volume"].item(bar))
+            reason = "stop_loss"
+        else:
+            price = max(target_price, opening)
+            reason = "take_profit"
+
+        order = self.working[column]
+        if order is not None:
+            order.cancelled = True
+            self.working[column] = None
+        price = _clip(price, series["lower"].item(bar), series["upper"].item(bar))
+        self.execute(column, bar, SELL, self.shares[column], price, reason)
+
+    def on_square_off(self, when: int, event: Event):
+        column = event.symbol
+        if event.version == self.version[column] and self.shares[column] > 0:
+            self.flatten(when, column, "square_off")
+
+    # Results ------------------------------------------------------------------
+
+    def close_out(self):
+        """Sell anything still open at the last bar's close"""
+        for column, shares in enumerate(self.shares):
+            if shares > 0:
+                series = self.stream.series[column]
+                bar = len(series["time"]) - 1
+                price = series["close"].item(bar) * (1 - self.model.slippage)
+                self.execute(column, bar, SELL, shares, price, "end_of_data")
+
+    def equity(self) -> np.ndarray:
+        """Cash plus positions marked at each row's last known price"""
+        stream = self.stream
+        length, width = stream.close.shape
+        held = np.zeros((length, width))
+        cash = np.zeros(length)
+        if self.ledger:
+            rows, columns, share_delta, cash_delta = (np.array(values) for values in zip(*self.ledger))
+            np.add.at(held, (rows.astype(np.int64), columns.astype(np.int64)), share_delta)
+            np.add.at(cash, rows.astype(np.int64), cash_delta)
+
+        seen = np.where(np.isnan(stream.close), 0, np.arange(length)[:, None])
+        np.maximum.accumulate(seen, axis=0, out=seen)
+        marks = np.nan_to_num(stream.close[seen, np.arange(width)])
+        return self.initial_capital + np.cumsum(cash) + (np.cumsum(held, axis=0) * marks).sum(axis=1)
+
+def _close_trade(trade: Dict[str, Any], stamp: int, reason: str) -> Dict[str, Any]:
+    pnl = trade["proceeds"] - trade["cost"]
+    return {
+        "column": trade["column"],
+        "entry_time": str(np.datetime64(trade["entry_time"], "ns")),
+        "exit_time": str(np.datetime64(stamp, "ns")),
+        "entry_price": float(trade["buy_notional"] / trade["bought"]),
+        "exit_price": float(trade["sell_notional"] / trade["sold"]),
+        "shares": float(trade["bought"]),
+        "pnl": float(pnl),
+        "return_percent": float((trade["proceeds"] / trade["cost"] - 1) * 100),
+        "exit_reason": reason,
+        "fills": trade["fills"]
+    }
+
+def _clip(price: float, lower: float, upper: float) -> float:
+    if upper == upper and price > upper:
+        return float(upper)
+    if lower == lower and price < lower:
+        return float(lower)
+    return float(price)
+
+def _square_off_ns(value: Optional[str]) -> Optional[int]:
+    """"HH:MM" IST as nanoseconds after midnight"""
+    if not value:
+        return None
+    hours, minutes = (int(part) for part in str(value).split(":"))
+    return (hours * 60 + minutes) * 60 * 10**9
+
+# Create global event backtester instance
+event_backtester = EventBacktester()
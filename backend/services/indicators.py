@@ -0,0 +1,81 @@
+import numpy as np
+from typing import Dict, Any, Tuple
+
+# All indicator helpers work along axis 0, so they accept a single price series
+# of shape (T,) or a panel of shape (T, N) with one column per symbol.
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """values shifted forward by `periods` rows, NaN-padded"""
+    result = np.full(values.shape, np.nan)
+    if periods < len(values):
+        result[periods:] = values[:len(values) - periods]
+    return result
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """Simple moving average from one running sum (NaN until the window holds `period` valid values)"""
+    result = np.full(values.shape, np.nan)
+    if period < 1 or period > len(values):
+        return result
+    # NaN rows (before a symbol lists in a panel) are summed as zero and counted
+    # out, so they do not poison the running sum for the rest of the column
+    valid = ~np.isnan(values)
+    padding = np.zeros((1,) + values.shape[1:])
+    running = np.cumsum(np.concatenate([padding, np.where(valid, values, 0.0)]), axis=0)
+    counts = np.cumsum(np.concatenate([padding, valid]), axis=0)
+    full = (counts[period:] - counts[:-period]) == period
+    result[period - 1:] = np.where(full, (running[period:] - running[:-period]) / period, np.nan)
+    return result
+
+def rsi(values: np.ndarray, period: int = 14) -> np.ndarray:
+    """RSI with simple-average gains and losses"""
+    changes = np.diff(values, axis=0, prepend=values[:1])
+    avg_gain = sma(np.maximum(changes, 0), period)
+    avg_loss = sma(np.maximum(-changes, 0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    result[:period] = np.nan
+    return result
+
+def momentum(values: np.ndarray, period: int) -> np.ndarray:
+    """Percentage change over `period` rows"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (values / shift(values, period) - 1) * 100
+
+def rising_edge(condition: np.ndarray) -> np.ndarray:
+    """True only on the row where a condition switches from False to True"""
+    previous = np.zeros(condition.shape, dtype=bool)
+    previous[1:] = condition[:-1]
+    return condition & ~previous
+
+INDICATORS = {"sma": sma, "rsi": rsi, "momentum": momentum}
+
+class IndicatorCache:
+    """Memoizes indicator arrays computed over one close-price panel
+
+    Parameter sweeps re-use the same few moving averages across many
+    combinations, so each (indicator, period) is computed once. Compiled
+    condition plans also keep their intermediate results here, keyed by
+    expression structure, so strategies sharing a panel share those too.
+    """
+
+    def __init__(self, close: np.ndarray, max_entries: int = 256):
+        self.close = close
+        self.max_entries = max_entries
+        self.arrays: Dict[Tuple[str, int], np.ndarray] = {}
+        self.nodes: Dict[Tuple, Any] = {}
+
+    def remember(self, key: Tuple, values: Any):
+        if len(self.nodes) >= self.max_entries:
+            self.nodes.pop(next(iter(self.nodes)))
+        self.nodes[key] = values
+
+    def get(self, name: str, period: int) -> np.ndarray:
+        key = (name, int(period))
+        values = self.arrays.get(key)
+        if values is None:
+            if len(self.arrays) >= self.max_entries:
+                self.arrays.pop(next(iter(self.arrays)))
+            values = INDICATORS[name](self.close, int(period))
+            self.arrays[key] = values
+        return values
+
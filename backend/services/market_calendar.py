@@ -0,0 +1,114 @@
+import bisect
+import numpy as np
+from datetime import datetime, date, time, timedelta, timezone
+from functools import lru_cache
+from typing import List, Optional, Tuple, Iterable
+
+from config import settings
+from services.timeseries_backends import INTERVALS
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+class MarketCalendar:
+    """Trading sessions of one exchange: weekdays minus holidays, fixed local hours
+
+    Intraday bars close on multiples of the interval since the epoch (the same
+    windows the time-series store aggregates into) plus the session close, so
+    a bar close always has a complete bar behind it in storage.
+    """
+
+    def __init__(self, holidays: Iterable[str] = (), open_time: str = "09:15", close_time: str = "15:30",
+                 tz: timezone = IST):
+        self.holidays = {date.fromisoformat(day) for day in holidays}
+        self.open_time = time.fromisoformat(open_time)
+        self.close_time = time.fromisoformat(close_time)
+        self.tz = tz
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """(open, close) in UTC, or None when the exchange is shut"""
+        if not self.is_trading_day(day):
+            return None
+        return (
+            datetime.combine(day, self.open_time, self.tz).astimezone(timezone.utc),
+            datetime.combine(day, self.close_time, self.tz).astimezone(timezone.utc)
+        )
+
+    def is_open(self, at: datetime) -> bool:
+        session = self.session(at.astimezone(self.tz).date())
+        return session is not None and session[0] <= at < session[1]
+
+    def bar_closes(self, day: date, interval: str) -> List[datetime]:
+        """Every bar close of the session in UTC; empty on holidays"""
+        return list(self._bar_closes(day, interval))
+
+    @lru_cache(maxsize=64)
+    def _bar_closes(self, day: date, interval: str) -> Tuple[datetime, ...]:
+        session = self.session(day)
+        if session is None:
+            return ()
+        opens, closes = (int(moment.timestamp()) for moment in session)
+        if interval == "1d":
+            return (session[1],)
+
+        step = int(INTERVALS[interval].total_seconds())
+        first = opens // step * step + step
+        moments = list(range(first, closes, step)) + [closes]
+        return tuple(datetime.fromtimestamp(moment, timezone.utc) for moment in moments)
+
+    def next_bar_close(self, after: datetime, interval: str, horizon_days: int = 30) -> Optional[datetime]:
+        """First bar close strictly after `after`"""
+        day = after.astimezone(self.tz).date()
+        for offset in range(horizon_days):
+            closes = self._bar_closes(day + timedelta(days=offset), interval)
+            index = bisect.bisect_right(closes, after)
+            if index < len(closes):
+                return closes[index]
+        return None
+
+    def last_bar_close(self, at: datetime, interval: str, horizon_days: int = 30) -> Optional[datetime]:
+        """Latest bar close at or before `at`"""
+        day = at.astimezone(self.tz).date()
+        for offset in range(horizon_days):
+            closes = self._bar_closes(day - timedelta(days=offset), interval)
+            index = bisect.bisect_right(closes, at)
+            if index:
+                return closes[index - 1]
+        return None
+
+    def session_date(self, at: datetime, horizon_days: int = 30) -> Optional[date]:
+        """Trading day of the latest session opened at or before `at`, i.e. the one a quote taken then prices"""
+        day = at.astimezone(self.tz).date()
+        for offset in range(horizon_days):
+            session = self.session(day - timedelta(days=offset))
+            if session is not None and session[0] <= at:
+                return day - timedelta(days=offset)
+        return None
+
+    def sessions_back(self, end: datetime, sessions: int) -> datetime:
+        """Open of the session `sessions` trading days before the one containing `end`"""
+        day = end.astimezone(self.tz).date()
+        counted = 0
+        while True:
+            if self.is_trading_day(day):
+                counted += 1
+                if counted > sessions:
+                    return self.session(day)[0]
+            day -= timedelta(days=1)
+
+    def sessions_between(self, start: date, end: date) -> int:
+        """Trading days from `start` to `end`, both included"""
+        if end < start:
+            return 0
+        return int(np.busday_count(start, end + timedelta(days=1), holidays=sorted(self.holidays)))
+
+    def bars_per_session(self, interval: str) -> int:
+        if interval == "1d":
+            return 1
+        minutes = (datetime.combine(date.min, self.close_time) - datetime.combine(date.min, self.open_time))
+        return max(int(minutes / INTERVALS[interval]), 1)
+
+# Create global NSE calendar instance
+nse_calendar = MarketCalendar(settings.NSE_HOLIDAYS)
@@ -7,7 +7,9 @@ import asyncio
 import httpx
 import json
 import os
+from functools import partial
 from config import settings
+from services.cache_service import cache_service
 
 class MarketDataService:
     """Service for fetching market data from various sources including Indian markets (NSE/BSE)"""
@@ -450,6 +452,73 @@ class MarketDataService:
             print(f"Error fetching batch quotes: {e}")
             return {"error": str(e)}
     
+    async def get_quote_snapshot(self, symbols: List[str], max_age: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Latest quote for every symbol from one bulk download
+        
+        Quotes younger than `max_age` seconds come from Redis; the rest are
+        fetched together in a single request, so a whole universe is priced
+        at (nearly) the same instant. Symbols without data are left out.
+        """
+        max_age = settings.QUOTE_SNAPSHOT_TTL if max_age is None else max_age
+        symbols = list(dict.fromkeys(symbols))
+        quotes = cache_service.get_stock_quotes(symbols) if max_age > 0 else {}
+        missing = [symbol for symbol in symbols if symbol not in quotes]
+        if not missing:
+            return quotes
+        
+        try:
+            loop = asyncio.get_running_loop()
+            fetched = await loop.run_in_executor(None, partial(self._download_quotes, missing))
+            if fetched and max_age > 0:
+                cache_service.cache_stock_quotes(fetched, ttl=max_age)
+            quotes.update(fetched)
+            
+        except Exception as e:
+            print(f"Error fetching quote snapshot for {len(missing)} symbols: {e}")
+        
+        return quotes
+    
+    def _download_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Quotes from the last few daily bars of each symbol; today's bar carries the live price"""
+        frame = yf.download(
+            symbols, period="5d", interval="1d", group_by="column",
+            auto_adjust=False, progress=False, threads=True
+        )
+        if frame is None or frame.empty:
+            return {}
+        
+        fetched_at = datetime.utcnow().isoformat()
+        quotes = {}
+        for symbol in symbols:
+            try:
+                bars = frame.xs(symbol, axis=1, level=1) if isinstance(frame.columns, pd.MultiIndex) else frame
+            except KeyError:
+                continue
+            bars = bars.dropna(subset=["Close"])
+            if bars.empty:
+                continue
+            
+            last = bars.iloc[-1]
+            price = float(last["Close"])
+            previous_close = float(bars["Close"].iloc[-2]) if len(bars) > 1 else float(last["Open"])
+            change = price - previous_close
+            quotes[symbol] = {
+                "symbol": symbol,
+                "price": price,
+                "change": change,
+                "change_percent": change / previous_close * 100 if previous_close else 0,
+                "volume": float(last["Volume"]),
+                "open": float(last["Open"]),
+                "high": float(last["High"]),
+                "low": float(last["Low"]),
+                "previous_close": previous_close,
+                "bar_date": bars.index[-1].strftime("%Y-%m-%d"),
+                "source": "Yahoo Finance",
+                "timestamp": fetched_at
+            }
+        
+        return quotes
+    
     async def get_chart_data(self, symbol: str, timeframe: str = "1d") -> Dict[str, Any]:
         """Get chart data for a symbol"""
         try:
@@ -495,6 +564,32 @@ class MarketDataService:
             print(f"Error fetching chart data for {symbol}: {e}")
             return {"error": str(e)}
     
+    async def get_history_columns(self, symbol: str, start: datetime, end: datetime,
+                                  interval: str = "1d", adjusted: bool = True) -> Dict[str, np.ndarray]:
+        """Get OHLCV history as numpy columns (timestamp in epoch ns) for vectorized consumers
+        
+        Prices are split/dividend adjusted unless `adjusted` is off; valuations
+        booked against real fill prices need the unadjusted ones.
+        """
+        try:
+            history = yf.Ticker(symbol).history(start=start, end=end, interval=interval, auto_adjust=adjusted)
+            if history.empty:
+                return {}
+            
+            index = history.index.tz_convert("UTC") if history.index.tz is not None else history.index
+            return {
+                "timestamp": index.to_numpy(dtype="datetime64[ns]").astype(np.int64),
+                "open": history["Open"].to_numpy(dtype=np.float64),
+                "high": history["High"].to_numpy(dtype=np.float64),
+                "low": history["Low"].to_numpy(dtype=np.float64),
+                "close": history["Close"].to_numpy(dtype=np.float64),
+                "volume": history["Volume"].to_numpy(dtype=np.float64)
+            }
+            
+        except Exception as e:
+            print(f"Error fetching history columns for {symbol}: {e}")
+            return {}
+    
     async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
         """Search for stocks by symbol or company name"""
         try:
@@ -0,0 +1,217 @@
+import csv
+import io
+import json
+import re
+from typing import Dict, Any, List, Optional, Sequence, Set
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from database import postgres_engine
+from config import settings
+
+# Column order used for COPY; matches models.market_data.MarketData
+MARKET_DATA_COLUMNS = [
+    "symbol", "timestamp", "price", "volume", "open_price", "high_price",
+    "low_price", "close_price", "change", "change_percent", "additional_data"
+]
+
+# Catches rows outside every monthly partition so inserts never fail on a missing month
+DEFAULT_PARTITION = "market_data_default"
+
+PARTITION_NAME = re.compile(r"^market_data_(\d{4})_(\d{2})$")
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+def _next_month(value: datetime) -> datetime:
+    return datetime(value.year + (value.month // 12), value.month % 12 + 1, 1)
+
+class MarketDataStore:
+    """Bulk ingestion and partition management for the PostgreSQL market_data table"""
+
+    def __init__(self, engine=postgres_engine):
+        self.engine = engine
+        self.known_partitions: Set[str] = set()
+
+    def partition_name(self, month: datetime) -> str:
+        return f"market_data_{month.year:04d}_{month.month:02d}"
+
+    def ensure_partitions(self, start: datetime, end: datetime) -> List[str]:
+        """Create monthly partitions covering [start, end]; returns the names created"""
+        created = []
+        month = _month_start(start)
+
+        with self.engine.begin() as conn:
+            if DEFAULT_PARTITION not in self.known_partitions:
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF market_data DEFAULT"
+                ))
+                self.known_partitions.add(DEFAULT_PARTITION)
+
+            while month <= end:
+                name = self.partition_name(month)
+                if name not in self.known_partitions:
+                    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None:
+                        self._create_partition(conn, name, month, _next_month(month))
+                        created.append(name)
+                    self.known_partitions.add(name)
+                month = _next_month(month)
+
+        return created
+
+    def _create_partition(self, conn, name: str, lower: datetime, upper: datetime):
+        """Create one month's partition, moving any rows the default partition holds for it
+
+        Postgres refuses a new partition while the default partition has rows in
+        its range, so the default is detached for the move and re-attached after.
+        """
+        bounds = {"lower": lower, "upper": upper}
+        in_range = "timestamp >= :lower AND timestamp < :upper"
+        stranded = conn.execute(
+            text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1"), bounds
+        ).first() is not None
+
+        if stranded:
+            conn.execute(text(f"ALTER TABLE market_data DETACH PARTITION {DEFAULT_PARTITION}"))
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF market_data "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        if stranded:
+            conn.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+            conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+            conn.execute(text(f"ALTER TABLE market_data ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+    def ensure_current_partitions(self) -> List[str]:
+        """Create partitions for this month plus the configured months ahead"""
+        now = datetime.utcnow()
+        end = now
+        for _ in range(settings.MARKET_DATA_PARTITIONS_AHEAD):
+            end = _next_month(end)
+        return self.ensure_partitions(now, end)
+
+    def list_partitions(self) -> List[str]:
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = 'market_data'"
+            ))
+            return [row[0] for row in rows]
+
+    def drop_partitions_before(self, cutoff: datetime) -> List[str]:
+        """Drop whole partitions that end on or before cutoff (retention without DELETE)"""
+        dropped = []
+
+        for name in self.list_partitions():
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            month = datetime(int(match.group(1)), int(match.group(2)), 1)
+            if _next_month(month) > cutoff:
+                continue
+
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE market_data DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+            self.known_partitions.discard(name)
+            dropped.append(name)
+
+        # Rows that never got a monthly partition expire with a plain DELETE
+        with self.engine.begin() as conn:
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": DEFAULT_PARTITION}).scalar() is not None:
+                conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff})
+
+        return dropped
+
+    def apply_retention(self, retention_days: Optional[int] = None) -> List[str]:
+        days = retention_days or settings.MARKET_DATA_RETENTION_DAYS
+        return self.drop_partitions_before(datetime.utcnow() - timedelta(days=days))
+
+    def _to_csv(self, columns: Dict[str, Sequence[Any]], row_count: int) -> io.StringIO:
+        """Serialize a columnar batch into an in-memory CSV buffer for COPY"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        ordered = []
+        for name in MARKET_DATA_COLUMNS:
+            values = columns.get(name)
+            if values is None:
+                ordered.append([None] * row_count)
+            elif name == "additional_data":
+                ordered.append([json.dumps(value) if value is not None else None for value in values])
+            elif name == "timestamp":
+                ordered.append([value.isoformat() for value in values])
+            else:
+                ordered.append(values)
+
+        writer.writerows(zip(*ordered))
+        buffer.seek(0)
+        return buffer
+
+    def bulk_insert(self, columns: Dict[str, Sequence[Any]], on_conflict: str = "update") -> int:
+        """Ingest a columnar batch with COPY
+
+        on_conflict: "error" COPYs straight into market_data (fastest, no duplicates
+        allowed); "update" / "ignore" COPY into a temp staging table and merge with a
+        single INSERT ... ON CONFLICT (symbol, timestamp).
+        """
+        timestamps = columns.get("timestamp")
+        if timestamps is None or columns.get("symbol") is None or len(timestamps) == 0:
+            return 0
+
+        row_count = len(timestamps)
+        self.ensure_partitions(min(timestamps), max(timestamps))
+        buffer = self._to_csv(columns, row_count)
+        column_list = ", ".join(MARKET_DATA_COLUMNS)
+
+        with self.engine.begin() as conn:
+            cursor = conn.connection.cursor()
+
+            if on_conflict == "error":
+                cursor.copy_expert(f"COPY market_data ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+                return row_count
+
+            cursor.execute(
+                "CREATE TEMP TABLE market_data_staging "
+                "(LIKE market_data INCLUDING DEFAULTS) ON COMMIT DROP"
+            )
+            cursor.copy_expert(f"COPY market_data_staging ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+            if on_conflict == "ignore":
+                action = "DO NOTHING"
+            else:
+                updates = ", ".join(
+                    f"{name} = EXCLUDED.{name}" for name in MARKET_DATA_COLUMNS[2:]
+                )
+                action = f"DO UPDATE SET {updates}"
+
+            cursor.execute(
+                f"INSERT INTO market_data ({column_list}) "
+                f"SELECT {column_list} FROM market_data_staging "
+                f"ON CONFLICT (symbol, timestamp) {action}"
+            )
+            return row_count
+
+    def bulk_insert_rows(self, rows: List[Dict[str, Any]], on_conflict: str = "update") -> int:
+        """Convenience wrapper for row-oriented callers; pivots to columns once"""
+        columns = {name: [row.get(name) for row in rows] for name in MARKET_DATA_COLUMNS}
+        return self.bulk_insert(columns, on_conflict=on_conflict)
+
+    def query_range(self, symbol: str, start: datetime, end: datetime) -> Dict[str, List[Any]]:
+        """Read one symbol's rows as columns; the timestamp bounds let the planner prune partitions"""
+        with self.engine.connect() as conn:
+            result = conn.execute(text(
+                "SELECT timestamp, price, volume, open_price, high_price, low_price, close_price "
+                "FROM market_data WHERE symbol = :symbol "
+                "AND timestamp >= :start AND timestamp < :end ORDER BY timestamp"
+            ), {"symbol": symbol, "start": start, "end": end})
+
+            keys = list(result.keys())
+            rows = result.fetchall()
+
+        return {key: [row[index] for row in rows] for index, key in enumerate(keys)}
+
+# Create global market data store instance
+market_data_store = MarketDataStore()
@@ -0,0 +1,284 @@
+import math
+import numpy as np
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from config import settings
+from models.portfolio import Portfolio, Holding, PortfolioNavSnapshot
+from models.trade import Trade
+from services.data_panel import panel_store
+from services.market_calendar import nse_calendar
+from services.market_data_service import MarketDataService
+
+PERIOD_DAYS = {"1m": 30, "3m": 91, "6m": 182, "1y": 365, "2y": 730, "5y": 1826}
+PERIODS = tuple(PERIOD_DAYS) + ("ytd", "all")
+
+def _ist_day(timestamp: datetime) -> date:
+    return timestamp.replace(tzinfo=timezone.utc).astimezone(nse_calendar.tz).date()
+
+def session_days(timestamps: np.ndarray) -> np.ndarray:
+    """Exchange-local dates (datetime64[D]) of epoch-ns bar timestamps"""
+    offset = int(nse_calendar.tz.utcoffset(None).total_seconds()) * 10**9
+    return (np.asarray(timestamps, dtype=np.int64) + offset).astype("datetime64[ns]").astype("datetime64[D]")
+
+def flow_adjusted_returns(nav: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """Return of each day after the first, with that day's net flow counted as invested at its open"""
+    invested = nav[:-1] + flows[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(invested > 0, (nav[1:] - invested) / invested, 0.0)
+
+def money_weighted_return(amounts: np.ndarray, years: np.ndarray) -> Optional[float]:
+    """Annual IRR of cash flows seen by the investor (contributions negative), by bisection"""
+    def npv(rate: float) -> float:
+        return float((amounts * (1 + rate) ** -years).sum())
+
+    low, high = -0.9999, 100.0
+    low_value = npv(low)
+    if not np.isfinite(low_value) or low_value * npv(high) > 0:
+        return None
+    for _ in range(200):
+        middle = (low + high) / 2
+        value = npv(middle)
+        if value * low_value > 0:
+            low, low_value = middle, value
+        else:
+            high = middle
+        if high - low < 1e-10:
+            break
+    return (low + high) / 2
+
+class NavEngine:
+    """Daily NAV of a portfolio rebuilt from its holdings, trades and daily closes
+
+    Quantities are rolled back from the current holdings through later filled
+    trades, one cumulative sum over a (day, symbol) matrix of signed fills, and
+    valued on the aligned panel of unadjusted closes, the prices fills happen
+    at (so dividends paid out are not part of the return). Trades carry no
+    portfolio, so a user's default portfolio takes all of their fills and any
+    other portfolio the fills on the symbols it holds; buys and sells are its
+    external cash flows.
+
+    Every closed day is persisted as a snapshot with its flow-adjusted return
+    and chained growth index. Later syncs only rebuild the days after the last
+    closed snapshot, so period queries are a range scan over stored rows.
+    """
+
+    def __init__(self):
+        self.market_service = MarketDataService()
+        self.periods_per_year = settings.BACKTEST_PERIODS_PER_YEAR
+
+    def _trades_query(self, portfolio: Portfolio, symbols: List[str], db: Session):
+        query = db.query(Trade).filter(
+            Trade.user_id == portfolio.user_id,
+            func.lower(Trade.status) == "filled"
+        )
+        if not portfolio.is_default:
+            query = query.filter(Trade.symbol.in_(symbols))
+        return query
+
+    async def reconstruct(self, holdings: List[Holding], trades: List[Trade], base_day: date) -> Optional[Dict[str, np.ndarray]]:
+        """NAV and net flow per session from the last session on or before `base_day` to today"""
+        symbols = sorted({holding.symbol for holding in holdings} | {trade.symbol for trade in trades})
+        if not symbols:
+            return None
+
+        start = datetime.combine(base_day - timedelta(days=7), time())
+        end = datetime.utcnow()
+        # Unadjusted closes: fills are booked at real prices, and adjusted closes
+        # would show the adjustment as a gain or loss on every day with a trade
+        panel = await panel_store.get_or_build(
+            symbols, start, end,
+            lambda symbol: self.market_service.get_history_columns(symbol, start, end, adjusted=False),
+            adjusted=False
+        )
+        if not panel.symbols:
+            return None
+        missing = [symbol for symbol in symbols if symbol not in panel.symbols]
+        if missing:
+            print(f"No daily closes for {', '.join(missing)}; left out of the NAV")
+
+        days = session_days(panel.timestamps)
+        count, width = len(days), len(panel.symbols)
+        columns = {symbol: index for index, symbol in enumerate(panel.symbols)}
+        close = np.nan_to_num(panel["close"], nan=0.0)
+
+        current = np.zeros(width)
+        for holding in holdings:
+            if holding.symbol in columns:
+                current[columns[holding.symbol]] += holding.quantity or 0
+
+        # Signed fills per (session, symbol); row `count` collects fills after the last bar
+        trades = [trade for trade in trades if trade.symbol in columns]
+        changes = np.zeros((count + 1, width))
+        flows = np.zeros(count + 1)
+        if trades:
+            rows = np.searchsorted(days, np.array([_ist_day(trade.timestamp) for trade in trades], dtype="datetime64[D]"))
+            cols = np.array([columns[trade.symbol] for trade in trades])
+            signed = np.array([
+                (trade.quantity or 0) * (1 if (trade.side or "").lower() == "buy" else -1) for trade in trades
+            ])
+            np.add.at(changes, (rows, cols), signed)
+            np.add.at(flows, rows, signed * np.array([trade.price or 0 for trade in trades]))
+
+        bought_after = changes.sum(axis=0) - np.cumsum(changes, axis=0)[:count]
+        quantity = np.maximum(current - bought_after, 0)
+        nav = (quantity * close).sum(axis=1)
+
+        base = max(int(np.searchsorted(days, np.datetime64(base_day, "D"), side="right")) - 1, 0)
+        return {"days": days[base:], "nav": nav[base:], "flows": flows[base:count]}
+
+    async def sync(self, portfolio: Portfolio, db: Session) -> int:
+        """Write snapshots for every session after the last closed one; returns rows written"""
+        today = datetime.now(nse_calendar.tz).date()
+        base = db.query(PortfolioNavSnapshot).filter(
+            PortfolioNavSnapshot.portfolio_id == portfolio.id,
+            PortfolioNavSnapshot.day < today
+        ).order_by(PortfolioNavSnapshot.day.desc()).first()
+
+        holdings = db.query(Holding).filter(Holding.portfolio_id == portfolio.id).all()
+        symbols = [holding.symbol for holding in holdings]
+        trades_query = self._trades_query(portfolio, symbols, db)
+
+        if base:
+            base_day, growth = base.day, base.growth
+        else:
+            base_day, growth = today - timedelta(days=settings.PORTFOLIO_NAV_BACKFILL_DAYS), 1.0
+            first_trade = trades_query.with_entities(func.min(Trade.timestamp)).scalar()
+            if first_trade:
+                base_day = max(base_day, _ist_day(first_trade) - timedelta(days=1))
+
+        since = datetime.combine(base_day + timedelta(days=1), time(), nse_calendar.tz)
+        trades = trades_query.filter(
+            Trade.timestamp >= since.astimezone(timezone.utc).replace(tzinfo=None)
+        ).order_by(Trade.timestamp).all()
+
+        series = await self.reconstruct(holdings, trades, base_day)
+        if series is None:
+            return 0
+        days, nav, flows = series["days"], series["nav"], series["flows"]
+        if base:
+            keep = days > np.datetime64(base_day, "D")
+        else:
+            # Start the history the session before the portfolio first held anything
+            active = np.flatnonzero((nav > 0) | (flows != 0))
+            if not len(active):
+                return 0
+            first = max(int(active[0]) - 1, 0)
+            days, nav, flows = days[first:], nav[first:], flows[first:].copy()
+            flows[0] = 0.0  # part of the opening value
+            keep = np.ones(len(days), dtype=bool)
+        if not keep.any():
+            return 0
+
+        returns = np.concatenate([[0.0], flow_adjusted_returns(nav, flows)])
+        index = growth * np.cumprod(1 + returns)
+
+        rows = [
+            {
+                "portfolio_id": portfolio.id,
+                "day": day,
+                "nav": float(value),
+                "net_flow": float(flow),
+                "daily_return": float(daily),
+                "growth": float(level)
+            }
+            for day, value, flow, daily, level in zip(
+                days[keep].astype(object), nav[keep], flows[keep], returns[keep], index[keep]
+            )
+        ]
+        snapshot = pg_insert(PortfolioNavSnapshot).values(rows)
+        snapshot = snapshot.on_conflict_do_update(
+            index_elements=[PortfolioNavSnapshot.portfolio_id, PortfolioNavSnapshot.day],
+            set_={
+                "nav": snapshot.excluded.nav,
+                "net_flow": snapshot.excluded.net_flow,
+                "daily_return": snapshot.excluded.daily_return,
+                "growth": snapshot.excluded.growth,
+                "updated_at": datetime.utcnow()
+            }
+        )
+        db.execute(snapshot)
+        db.commit()
+        return len(rows)
+
+    async def get_performance(self, portfolio: Portfolio, db: Session, period: str = "1y") -> Dict[str, Any]:
+        """TWR, MWR, volatility, Sharpe and drawdown over a period of stored snapshots"""
+        if period not in PERIODS:
+            raise ValueError(f"Unknown period '{period}'; use one of {', '.join(PERIODS)}")
+        await self.sync(portfolio, db)
+
+        today = datetime.now(nse_calendar.tz).date()
+        query = db.query(
+            PortfolioNavSnapshot.day, PortfolioNavSnapshot.nav, PortfolioNavSnapshot.net_flow,
+            PortfolioNavSnapshot.daily_return, PortfolioNavSnapshot.growth
+        ).filter(PortfolioNavSnapshot.portfolio_id == portfolio.id)
+        if period != "all":
+            start = date(today.year, 1, 1) if period == "ytd" else today - timedelta(days=PERIOD_DAYS[period])
+            # The last close before the period is its starting value
+            opening = db.query(func.max(PortfolioNavSnapshot.day)).filter(
+                PortfolioNavSnapshot.portfolio_id == portfolio.id,
+                PortfolioNavSnapshot.day < start
+            ).scalar()
+            query = query.filter(PortfolioNavSnapshot.day >= (opening or start))
+        rows = query.order_by(PortfolioNavSnapshot.day).all()
+
+        if len(rows) < 2:
+            return {
+                "period": period,
+                "total_return": 0,
+                "annualized_return": 0,
+                "money_weighted_return": None,
+                "volatility": 0,
+                "sharpe_ratio": 0,
+                "max_drawdown": 0,
+                "series": {"dates": [], "nav": [], "cumulative_return": []}
+            }
+
+        days = np.array([row.day for row in rows], dtype="datetime64[D]")
+        nav = np.array([row.nav for row in rows], dtype=np.float64)
+        flows = np.array([row.net_flow for row in rows], dtype=np.float64)
+        returns = np.array([row.daily_return for row in rows], dtype=np.float64)[1:]
+        growth = np.array([row.growth for row in rows], dtype=np.float64)
+
+        cumulative = growth / growth[0] - 1
+        total_return = float(cumulative[-1])
+        years = (days - days[0]).astype(np.int64) / 365.25
+        annualized = float((1 + total_return) ** (1 / years[-1])) - 1 if years[-1] > 0 and total_return > -1 else 0.0
+        volatility = float(returns.std(ddof=1)) if len(returns) > 1 else 0.0
+        sharpe = float(returns.mean()) / volatility * math.sqrt(self.periods_per_year) if volatility > 0 else 0.0
+        peaks = np.maximum.accumulate(growth)
+        drawdown = float(((peaks - growth) / peaks).max())
+
+        # Investor's cash flows: opening value in, net buys in, closing value out
+        amounts = -flows.copy()
+        amounts[0] = -nav[0]
+        amounts[-1] += nav[-1]
+        mwr = money_weighted_return(amounts, years) if years[-1] > 0 else None
+
+        return {
+            "period": period,
+            "start_date": str(days[0]),
+            "end_date": str(days[-1]),
+            "start_value": round(float(nav[0]), 2),
+            "end_value": round(float(nav[-1]), 2),
+            "net_flows": round(float(flows[1:].sum()), 2),
+            "total_pnl": round(float(nav[-1] - nav[0] - flows[1:].sum()), 2),
+            "total_return": round(total_return * 100, 2),
+            "annualized_return": round(annualized * 100, 2),
+            "money_weighted_return": round(mwr * 100, 2) if mwr is not None else None,
+            "volatility": round(volatility * math.sqrt(self.periods_per_year) * 100, 2),
+            "sharpe_ratio": round(sharpe, 2),
+            "max_drawdown": round(drawdown * 100, 2),
+            "trading_days": len(returns),
+            "series": {
+                "dates": np.datetime_as_string(days).tolist(),
+                "nav": np.round(nav, 2).tolist(),
+                "cumulative_return": np.round(cumulative * 100, 4).tolist()
+            }
+        }
+
+# Create global NAV engine instance
+nav_engine = NavEngine()
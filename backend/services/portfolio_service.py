@@ -1,7 +1,11 @@
-from typing import Dict, Any, Optional
+import numpy as np
+from typing import Dict, Any, List
+from sqlalchemy import update, values, column, Integer, Float
 from sqlalchemy.orm import Session
-from database import Portfolio, Holding
+from models.portfolio import Portfolio, Holding
 from services.market_data_service import MarketDataService
+from services.risk_engine import risk_engine
+from services.nav_engine import nav_engine
 from datetime import datetime
 
 class PortfolioService:
@@ -10,6 +14,51 @@ class PortfolioService:
     def __init__(self):
         self.market_service = MarketDataService()
     
+    async def _value_holdings(self, holdings: List[Holding], db: Session) -> Dict[str, np.ndarray]:
+        """Price holdings from one bulk quote snapshot as arrays aligned with `holdings`
+        
+        Fresh prices are written back with a single UPDATE ... FROM (VALUES ...);
+        holdings without a quote keep their last known price, and those with
+        neither come back as NaN.
+        """
+        quotes = await self.market_service.get_quote_snapshot(sorted({holding.symbol for holding in holdings}))
+        
+        quantity = np.array([holding.quantity or 0 for holding in holdings], dtype=np.float64)
+        avg_price = np.array([holding.avg_price or 0 for holding in holdings], dtype=np.float64)
+        live = np.array([quotes.get(holding.symbol, {}).get("price") or np.nan for holding in holdings], dtype=np.float64)
+        last_known = np.array([holding.current_price or np.nan for holding in holdings], dtype=np.float64)
+        quoted = ~np.isnan(live)
+        price = np.where(quoted, live, last_known)
+        
+        now = datetime.utcnow()
+        if quoted.any():
+            prices = values(column("id", Integer), column("price", Float), name="prices").data([
+                (holdings[index].id, float(live[index])) for index in np.flatnonzero(quoted)
+            ])
+            db.execute(
+                update(Holding)
+                .where(Holding.id == prices.c.id)
+                .values(current_price=prices.c.price, last_updated=now)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        
+        market_value = quantity * price
+        cost_value = quantity * avg_price
+        pnl = market_value - cost_value
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pnl_percent = np.where(cost_value > 0, pnl / cost_value * 100, 0.0)
+        
+        return {
+            "price": price,
+            "valued": ~np.isnan(price),
+            "market_value": market_value,
+            "cost_value": cost_value,
+            "pnl": pnl,
+            "pnl_percent": pnl_percent,
+            "updated_at": np.where(quoted, now, np.array([holding.last_updated for holding in holdings], dtype=object))
+        }
+    
     async def get_portfolio_with_values(self, portfolio_id: int, db: Session) -> Dict[str, Any]:
         """Get portfolio with calculated total value and P&L"""
         portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
@@ -18,42 +67,18 @@ class PortfolioService:
         
         holdings = db.query(Holding).filter(Holding.portfolio_id == portfolio_id).all()
         
-        total_value = 0
-        total_cost = 0
-        
-        # Calculate portfolio values
-        for holding in holdings:
-            try:
-                # Get current price
-                quote = await self.market_service.get_stock_quote(holding.symbol)
-                current_price = quote['price']
-                
-                # Update holding with current price
-                holding.current_price = current_price
-                holding.last_updated = datetime.utcnow()
-                
-                # Calculate values
-                market_value = holding.quantity * current_price
-                cost_value = holding.quantity * holding.avg_price
-                
-                total_value += market_value
-                total_cost += cost_value
-                
-            except Exception as e:
-                # If we can't get current price, use last known price
-                if holding.current_price:
-                    market_value = holding.quantity * holding.current_price
-                    cost_value = holding.quantity * holding.avg_price
-                    total_value += market_value
-                    total_cost += cost_value
+        # Holdings with no price at all are left out of both value and cost
+        total_value = total_cost = 0.0
+        if holdings:
+            valuation = await self._value_holdings(holdings, db)
+            valued = valuation["valued"]
+            total_value = float(valuation["market_value"][valued].sum())
+            total_cost = float(valuation["cost_value"][valued].sum())
         
         # Calculate total P&L
         total_pnl = total_value - total_cost
         total_pnl_percent = (total_pnl / total_cost * 100) if total_cost > 0 else 0
         
-        # Commit price updates
-        db.commit()
-        
         return {
             "id": portfolio.id,
             "name": portfolio.name,
@@ -67,67 +92,20 @@ class PortfolioService:
     
     async def update_holding_prices(self, holding: Holding, db: Session) -> Dict[str, Any]:
         """Update holding with current prices and calculate P&L"""
-        try:
-            # Get current price
-            quote = await self.market_service.get_stock_quote(holding.symbol)
-            current_price = quote['price']
-            
-            # Update holding
-            holding.current_price = current_price
-            holding.last_updated = datetime.utcnow()
-            
-            # Calculate values
-            market_value = holding.quantity * current_price
-            cost_value = holding.quantity * holding.avg_price
-            pnl = market_value - cost_value
-            pnl_percent = (pnl / cost_value * 100) if cost_value > 0 else 0
-            
-            # Commit updates
-            db.commit()
-            
-            return {
-                "id": holding.id,
-                "symbol": holding.symbol,
-                "quantity": holding.quantity,
-                "avg_price": holding.avg_price,
-                "current_price": current_price,
-                "market_value": round(market_value, 2),
-                "pnl": round(pnl, 2),
-                "pnl_percent": round(pnl_percent, 2),
-                "last_updated": holding.last_updated
-            }
-            
-        except Exception as e:
-            # Return holding with last known values if update fails
-            if holding.current_price:
-                market_value = holding.quantity * holding.current_price
-                cost_value = holding.quantity * holding.avg_price
-                pnl = market_value - cost_value
-                pnl_percent = (pnl / cost_value * 100) if cost_value > 0 else 0
-                
-                return {
-                    "id": holding.id,
-                    "symbol": holding.symbol,
-                    "quantity": holding.quantity,
-                    "avg_price": holding.avg_price,
-                    "current_price": holding.current_price,
-                    "market_value": round(market_value, 2),
-                    "pnl": round(pnl, 2),
-                    "pnl_percent": round(pnl_percent, 2),
-                    "last_updated": holding.last_updated
-                }
-            else:
-                return {
-                    "id": holding.id,
-                    "symbol": holding.symbol,
-                    "quantity": holding.quantity,
-                    "avg_price": holding.avg_price,
-                    "current_price": 0,
-                    "market_value": 0,
-                    "pnl": 0,
-                    "pnl_percent": 0,
-                    "last_updated": holding.last_updated
-                }
+        valuation = await self._value_holdings([holding], db)
+        valued = bool(valuation["valued"][0])
+        
+        return {
+            "id": holding.id,
+            "symbol": holding.symbol,
+            "quantity": holding.quantity,
+            "avg_price": holding.avg_price,
+            "current_price": float(valuation["price"][0]) if valued else 0,
+            "market_value": round(float(valuation["market_value"][0]), 2) if valued else 0,
+            "pnl": round(float(valuation["pnl"][0]), 2) if valued else 0,
+            "pnl_percent": round(float(valuation["pnl_percent"][0]), 2) if valued else 0,
+            "last_updated": valuation["updated_at"][0]
+        }
     
     async def calculate_portfolio_metrics(self, portfolio_id: int, db: Session) -> Dict[str, Any]:
         """Calculate comprehensive portfolio metrics"""
@@ -149,85 +127,33 @@ class PortfolioService:
                 "risk_metrics": {}
             }
         
-        total_value = 0
-        total_cost = 0
-        holding_metrics = []
+        valuation = await self._value_holdings(holdings, db)
+        valued = valuation["valued"]
+        symbols = np.array([holding.symbol for holding in holdings], dtype=object)[valued]
+        market_value = valuation["market_value"][valued]
+        pnl_percent = valuation["pnl_percent"][valued]
         sector_allocation = {}
         
-        # Calculate individual holding metrics
-        for holding in holdings:
-            try:
-                quote = await self.market_service.get_stock_quote(holding.symbol)
-                current_price = quote['price']
-                
-                # Update holding
-                holding.current_price = current_price
-                holding.last_updated = datetime.utcnow()
-                
-                # Calculate values
-                market_value = holding.quantity * current_price
-                cost_value = holding.quantity * holding.avg_price
-                pnl = market_value - cost_value
-                pnl_percent = (pnl / cost_value * 100) if cost_value > 0 else 0
-                
-                total_value += market_value
-                total_cost += cost_value
-                
-                holding_metrics.append({
-                    "symbol": holding.symbol,
-                    "pnl_percent": pnl_percent,
-                    "market_value": market_value,
-                    "weight": 0  # Will be calculated later
-                })
-                
-            except Exception as e:
-                # Use last known values
-                if holding.current_price:
-                    market_value = holding.quantity * holding.current_price
-                    cost_value = holding.quantity * holding.avg_price
-                    pnl = market_value - cost_value
-                    pnl_percent = (pnl / cost_value * 100) if cost_value > 0 else 0
-                    
-                    total_value += market_value
-                    total_cost += cost_value
-                    
-                    holding_metrics.append({
-                        "symbol": holding.symbol,
-                        "pnl_percent": pnl_percent,
-                        "market_value": market_value,
-                        "weight": 0
-                    })
-        
-        # Calculate weights and find best/worst performers
-        best_performer = None
-        worst_performer = None
-        best_pnl = float('-inf')
-        worst_pnl = float('inf')
+        total_value = float(market_value.sum())
+        total_cost = float(valuation["cost_value"][valued].sum())
         
-        for metric in holding_metrics:
-            metric["weight"] = (metric["market_value"] / total_value * 100) if total_value > 0 else 0
-            
-            if metric["pnl_percent"] > best_pnl:
-                best_pnl = metric["pnl_percent"]
-                best_performer = metric["symbol"]
-            
-            if metric["pnl_percent"] < worst_pnl:
-                worst_pnl = metric["pnl_percent"]
-                worst_performer = metric["symbol"]
+        # Best and worst performers by P&L percent
+        best_performer = symbols[int(np.argmax(pnl_percent))] if len(symbols) else None
+        worst_performer = symbols[int(np.argmin(pnl_percent))] if len(symbols) else None
         
         # Calculate total P&L
         total_pnl = total_value - total_cost
         total_pnl_percent = (total_pnl / total_cost * 100) if total_cost > 0 else 0
         
-        # Calculate risk metrics (simplified)
-        if len(holding_metrics) > 1:
-            pnl_percentages = [m["pnl_percent"] for m in holding_metrics]
-            volatility = (max(pnl_percentages) - min(pnl_percentages)) / 2
-        else:
-            volatility = 0
-        
-        # Commit updates
-        db.commit()
+        # Risk of the current positions from their daily return history
+        exposures = {}
+        for symbol, value in zip(symbols, market_value.tolist()):
+            exposures[symbol] = exposures.get(symbol, 0) + value
+        try:
+            risk_metrics = await risk_engine.analyze(exposures)
+        except Exception as e:
+            print(f"Error computing risk metrics for portfolio {portfolio_id}: {e}")
+            risk_metrics = {}
         
         return {
             "total_value": round(total_value, 2),
@@ -238,7 +164,7 @@ class PortfolioService:
             "worst_performer": worst_performer,
             "sector_allocation": sector_allocation,
             "risk_metrics": {
-                "volatility": round(volatility, 2),
+                **risk_metrics,
                 "holdings_count": len(holdings),
                 "diversification_score": min(len(holdings) / 10 * 100, 100)  # Simple diversification score
             }
@@ -263,6 +189,9 @@ class PortfolioService:
         rebalance_orders = []
         
         for holding in holdings:
+            if not holding.current_price:
+                continue  # never priced; nothing to size an order from
+            
             current_weight = (holding.quantity * holding.current_price / total_value * 100) if total_value > 0 else 0
             target_weight = target_weights.get(holding.symbol, 0)
             
@@ -289,54 +218,11 @@ class PortfolioService:
             "estimated_cost": sum(order["estimated_value"] for order in rebalance_orders)
         }
     
-    async def get_portfolio_performance(self, portfolio_id: int, period: str = "1y", 
-                                      db: Session) -> Dict[str, Any]:
-        """Get portfolio performance over time"""
+    async def get_portfolio_performance(self, portfolio_id: int, db: Session,
+                                      period: str = "1y") -> Dict[str, Any]:
+        """Get portfolio performance over time from its daily NAV snapshots"""
         portfolio = db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
         if not portfolio:
             return None
         
-        holdings = db.query(Holding).filter(Holding.portfolio_id == portfolio_id).all()
-        
-        if not holdings:
-            return {
-                "period": period,
-                "total_return": 0,
-                "annualized_return": 0,
-                "volatility": 0,
-                "sharpe_ratio": 0,
-                "max_drawdown": 0
-            }
-        
-        # This is a simplified performance calculation
-        # In production, you'd want to use historical price data
-        
-        total_return = 0
-        total_weight = 0
-        
-        for holding in holdings:
-            if holding.current_price and holding.avg_price:
-                weight = holding.quantity * holding.current_price
-                return_pct = (holding.current_price - holding.avg_price) / holding.avg_price
-                total_return += weight * return_pct
-                total_weight += weight
-        
-        if total_weight > 0:
-            portfolio_return = total_return / total_weight
-        else:
-            portfolio_return = 0
-        
-        # Simplified metrics
-        annualized_return = portfolio_return * 12  # Assuming monthly rebalancing
-        volatility = abs(portfolio_return) * 0.5  # Simplified volatility
-        sharpe_ratio = annualized_return / volatility if volatility > 0 else 0
-        max_drawdown = min(portfolio_return * 0.3, 0)  # Simplified max drawdown
-        
-        return {
-            "period": period,
-            "total_return": round(portfolio_return * 100, 2),
-            "annualized_return": round(annualized_return * 100, 2),
-            "volatility": round(volatility * 100, 2),
-            "sharpe_ratio": round(sharpe_ratio, 2),
-            "max_drawdown": round(max_drawdown * 100, 2)
-        }
+        return await nav_engine.get_performance(portfolio, db, period)
@@ -0,0 +1,291 @@
+import json
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from config import settings
+from database import PostgresSessionLocal, get_async_redis_client
+from models.portfolio import Portfolio, Holding
+from services.cache_service import cache_service, QUOTES_CHANNEL
+from services.market_data_service import MarketDataService
+
+# Published {"portfolio_id": ...} when holdings change, so every API process reloads it
+PORTFOLIO_CHANGES_CHANNEL = "portfolio:changes"
+
+class LiveHolding:
+    """A holding's quantity, cost and last seen price"""
+    __slots__ = ("id", "symbol", "quantity", "avg_price", "price")
+
+    def __init__(self, holding: Holding, price: Optional[float]):
+        self.id = holding.id
+        self.symbol = holding.symbol
+        self.quantity = float(holding.quantity or 0)
+        self.avg_price = float(holding.avg_price or 0)
+        self.price = price
+
+    def to_dict(self) -> Dict[str, Any]:
+        cost = self.quantity * self.avg_price
+        value = self.quantity * self.price if self.price is not None else None
+        return {
+            "id": self.id,
+            "symbol": self.symbol,
+            "quantity": self.quantity,
+            "avg_price": self.avg_price,
+            "price": self.price,
+            "market_value": round(value, 2) if value is not None else None,
+            "pnl": round(value - cost, 2) if value is not None else None,
+            "pnl_percent": round((value - cost) / cost * 100, 4) if value is not None and cost else None
+        }
+
+class LivePortfolio:
+    """Holdings of one watched portfolio with running totals over its priced holdings"""
+    __slots__ = ("id", "user_id", "holdings", "total_value", "total_cost", "subscribers")
+
+    def __init__(self, portfolio_id: int, user_id: int, holdings: List[LiveHolding]):
+        self.id = portfolio_id
+        self.user_id = user_id
+        self.holdings = {holding.id: holding for holding in holdings}
+        self.total_value = sum(h.quantity * h.price for h in holdings if h.price is not None)
+        self.total_cost = sum(h.quantity * h.avg_price for h in holdings if h.price is not None)
+        self.subscribers: Set[Any] = set()
+
+    def totals(self) -> Dict[str, Any]:
+        pnl = self.total_value - self.total_cost
+        return {
+            "total_value": round(self.total_value, 2),
+            "total_cost": round(self.total_cost, 2),
+            "total_pnl": round(pnl, 2),
+            "total_pnl_percent": round(pnl / self.total_cost * 100, 4) if self.total_cost else 0.0,
+            "priced_holdings": sum(1 for h in self.holdings.values() if h.price is not None),
+            "total_holdings": len(self.holdings)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": "portfolio_snapshot",
+            "portfolio_id": self.id,
+            "holdings": [holding.to_dict() for holding in self.holdings.values()],
+            "totals": self.totals(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+class PortfolioStream:
+    """Live P&L of the portfolios WebSocket clients are watching
+
+    Only subscribed portfolios are held in memory, with a symbol ->
+    (portfolio, holding) reverse index over them. A quote update touches just
+    the holdings of that symbol and moves each affected portfolio's totals by
+    quantity * price change, so the cost of a tick is independent of portfolio
+    size. Quotes arrive through the Redis channel every quote cache write
+    publishes on; a poll loop keeps the indexed symbols fresh when nothing
+    else is requesting them.
+    """
+
+    def __init__(self):
+        self.portfolios: Dict[int, LivePortfolio] = {}
+        self.index: Dict[str, Set[Tuple[int, int]]] = {}
+        self.market_service = MarketDataService()
+        self.running = False
+        self.tasks: List[asyncio.Task] = []
+
+    # Portfolios -----------------------------------------------------------
+
+    def _load(self, portfolio_id: int, user_id: int) -> Optional[LivePortfolio]:
+        db = PostgresSessionLocal()
+        try:
+            portfolio = db.query(Portfolio).filter(
+                Portfolio.id == portfolio_id,
+                Portfolio.user_id == user_id
+            ).first()
+            if not portfolio:
+                return None
+            holdings = db.query(Holding).filter(Holding.portfolio_id == portfolio_id).all()
+        finally:
+            db.close()
+
+        quotes = cache_service.get_stock_quotes([holding.symbol for holding in holdings])
+        return LivePortfolio(portfolio_id, user_id, [
+            LiveHolding(holding, (quotes.get(holding.symbol) or {}).get("price") or holding.current_price)
+            for holding in holdings
+        ])
+
+    async def load(self, portfolio_id: int, user_id: int) -> Optional[LivePortfolio]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(self._load, portfolio_id, user_id))
+
+    def _attach(self, live: LivePortfolio):
+        self.portfolios[live.id] = live
+        for holding in live.holdings.values():
+            self.index.setdefault(holding.symbol, set()).add((live.id, holding.id))
+
+    def _detach(self, portfolio_id: int) -> Optional[LivePortfolio]:
+        live = self.portfolios.pop(portfolio_id, None)
+        if live:
+            for holding in live.holdings.values():
+                entries = self.index.get(holding.symbol)
+                if entries is not None:
+                    entries.discard((live.id, holding.id))
+                    if not entries:
+                        del self.index[holding.symbol]
+        return live
+
+    async def subscribe(self, websocket, portfolio_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        """Watch a portfolio; returns its snapshot, or None if the user does not own it"""
+        live = self.portfolios.get(portfolio_id)
+        if live is None:
+            live = await self.load(portfolio_id, user_id)
+            if live is None:
+                return None
+            # Another subscriber may have loaded it while we waited
+            live = self.portfolios.get(portfolio_id) or live
+            if live.id not in self.portfolios:
+                self._attach(live)
+        elif live.user_id != user_id:
+            return None
+
+        live.subscribers.add(websocket)
+        self.start()
+        return live.snapshot()
+
+    def unsubscribe(self, websocket, portfolio_id: Optional[int] = None):
+        """Stop sending one (or, without an id, every) portfolio to a socket"""
+        ids = [portfolio_id] if portfolio_id is not None else list(self.portfolios)
+        for pid in ids:
+            live = self.portfolios.get(pid)
+            if live is None:
+                continue
+            live.subscribers.discard(websocket)
+            if not live.subscribers:
+                self._detach(pid)
+
+    async def reload(self, portfolio_id: int):
+        """Re-read a watched portfolio after its holdings changed and resend its snapshot"""
+        live = self.portfolios.get(portfolio_id)
+        if live is None:
+            return
+        fresh = await self.load(portfolio_id, live.user_id)
+        current = self.portfolios.get(portfolio_id)
+        if current is None:
+            return
+        self._detach(portfolio_id)
+        if fresh is None:
+            # Portfolio deleted
+            await self.broadcast(current.subscribers, {"type": "portfolio_removed", "portfolio_id": portfolio_id})
+            return
+        fresh.subscribers = current.subscribers
+        self._attach(fresh)
+        await self.broadcast(fresh.subscribers, fresh.snapshot())
+
+    def notify_changed(self, portfolio_id: int) -> bool:
+        """Tell every API process that a portfolio's holdings changed"""
+        return cache_service.publish_market_update(PORTFOLIO_CHANGES_CHANNEL, {"portfolio_id": portfolio_id})
+
+    # Quotes ---------------------------------------------------------------
+
+    def apply_quotes(self, prices: Dict[str, float]) -> List[Dict[str, Any]]:
+        """Move the affected holdings and totals to new prices; one delta message per touched portfolio"""
+        changed: Dict[int, List[LiveHolding]] = {}
+        for symbol, price in prices.items():
+            entries = self.index.get(symbol)
+            if not entries or not price:
+                continue
+            price = float(price)
+            for portfolio_id, holding_id in entries:
+                live = self.portfolios[portfolio_id]
+                holding = live.holdings[holding_id]
+                if holding.price == price:
+                    continue
+                if holding.price is None:
+                    live.total_value += holding.quantity * price
+                    live.total_cost += holding.quantity * holding.avg_price
+                else:
+                    live.total_value += holding.quantity * (price - holding.price)
+                holding.price = price
+                changed.setdefault(portfolio_id, []).append(holding)
+
+        timestamp = datetime.utcnow().isoformat()
+        return [
+            {
+                "type": "portfolio_pnl",
+                "portfolio_id": portfolio_id,
+                "holdings": [holding.to_dict() for holding in holdings],
+                "totals": self.portfolios[portfolio_id].totals(),
+                "timestamp": timestamp
+            }
+            for portfolio_id, holdings in changed.items()
+        ]
+
+    async def broadcast(self, subscribers: Set[Any], message: Dict[str, Any]):
+        text = json.dumps(message)
+        sockets = list(subscribers)
+        results = await asyncio.gather(*(socket.send_text(text) for socket in sockets), return_exceptions=True)
+        for socket, result in zip(sockets, results):
+            if isinstance(result, Exception):
+                self.unsubscribe(socket)
+
+    async def publish_quotes(self, prices: Dict[str, float]):
+        for delta in self.apply_quotes(prices):
+            live = self.portfolios.get(delta["portfolio_id"])
+            if live:
+                await self.broadcast(live.subscribers, delta)
+
+    # Loops ----------------------------------------------------------------
+
+    async def listen(self):
+        """Apply quote and holding-change messages from Redis, reconnecting on errors"""
+        while self.running:
+            pubsub = get_async_redis_client().pubsub()
+            try:
+                await pubsub.subscribe(QUOTES_CHANNEL, PORTFOLIO_CHANGES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if message["channel"] == QUOTES_CHANNEL:
+                        await self.publish_quotes(data)
+                    else:
+                        await self.reload(int(data["portfolio_id"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in portfolio stream listener: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def poll(self):
+        """Refresh quotes of every watched symbol; cached snapshots publish to the listener as well"""
+        while self.running:
+            try:
+                if self.index:
+                    quotes = await self.market_service.get_quote_snapshot(list(self.index))
+                    await self.publish_quotes({symbol: quote.get("price") for symbol, quote in quotes.items()})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error polling portfolio stream quotes: {e}")
+            await asyncio.sleep(settings.PORTFOLIO_STREAM_REFRESH_SECONDS)
+
+    def start(self):
+        if not self.tasks or any(task.done() for task in self.tasks):
+            for task in self.tasks:
+                task.cancel()
+            self.running = True
+            self.tasks = [asyncio.ensure_future(self.listen()), asyncio.ensure_future(self.poll())]
+
+    async def stop(self):
+        self.running = False
+        for task in self.tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.tasks = []
+
+# Create global portfolio stream instance
+portfolio_stream = PortfolioStream()
@@ -0,0 +1,162 @@
+import json
+import zlib
+import struct
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is always available
+    zstandard = None
+
+from config import settings
+
+# Blob layout: magic, format version, codec, then the compressed body
+MAGIC = b"BR"
+VERSION = 1
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+HEADER = struct.Struct("<2sBB")
+
+def _compress(body: bytes) -> bytes:
+    if zstandard is not None:
+        return HEADER.pack(MAGIC, VERSION, CODEC_ZSTD) + zstandard.ZstdCompressor(level=9).compress(body)
+    return HEADER.pack(MAGIC, VERSION, CODEC_ZLIB) + zlib.compress(body, 6)
+
+def _decompress(blob: bytes) -> bytes:
+    magic, version, codec = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a backtest result blob")
+    body = bytes(blob[HEADER.size:])
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body)
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed; install the zstandard package to read it")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"Unknown result codec {codec}")
+
+def _pack(meta: Dict[str, Any], arrays: List[np.ndarray]) -> bytes:
+    """Length-prefixed JSON metadata followed by the raw arrays"""
+    header = json.dumps(meta, separators=(",", ":")).encode()
+    return _compress(b"".join([struct.pack("<I", len(header)), header] + [array.tobytes() for array in arrays]))
+
+def _unpack(blob: bytes) -> Tuple[Dict[str, Any], memoryview]:
+    body = _decompress(blob)
+    (length,) = struct.unpack_from("<I", body)
+    return json.loads(body[4:4 + length]), memoryview(body)[4 + length:]
+
+def time_labels(timestamps: np.ndarray, index: Optional[np.ndarray] = None) -> List[str]:
+    """ISO labels for timestamps[index]; dates for daily-or-slower bars, seconds for intraday"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    daily = len(timestamps) < 2 or np.median(np.diff(timestamps)) >= 86400 * 10**9
+    selected = timestamps if index is None else timestamps[index]
+    return np.datetime_as_string(selected.astype("datetime64[ns]"), unit="D" if daily else "s").tolist()
+
+def encode_equity(timestamps: np.ndarray, equity: np.ndarray) -> bytes:
+    """int64 ns timestamps as first value plus deltas, equity as float32
+
+    Regular bar spacing makes the deltas almost constant, so they compress to
+    next to nothing; float32 keeps about seven significant digits, plenty for
+    a curve that was previously rounded to paise.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    deltas = np.diff(timestamps, prepend=np.int64(0))
+    return _pack({"count": len(timestamps)}, [deltas.astype("<i8"), np.asarray(equity, dtype="<f4")])
+
+def decode_equity(blob: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """(timestamps int64 ns, equity float64)"""
+    meta, body = _unpack(blob)
+    count = meta["count"]
+    timestamps = np.cumsum(np.frombuffer(body, dtype="<i8", count=count))
+    equity = np.frombuffer(body, dtype="<f4", count=count, offset=count * 8).astype(np.float64)
+    return timestamps, equity
+
+def encode_trades(trades: List[Dict[str, Any]], extra: Optional[Dict[str, Any]] = None) -> bytes:
+    """Trades column by column; `extra` holds small JSON-able siblings (per-symbol metrics, ...)
+
+    Numeric fields become int64/float64 arrays, string fields are
+    dictionary-encoded to int32 codes, anything else stays JSON.
+    """
+    names: List[str] = []
+    for trade in trades:
+        names.extend(name for name in trade if name not in names)
+
+    columns, arrays = [], []
+    for name in names:
+        values = [trade.get(name) for trade in trades]
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in values):
+            arrays.append(np.asarray(values, dtype="<i8"))
+            columns.append({"name": name, "kind": "array", "dtype": "<i8"})
+        elif all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            arrays.append(np.asarray(values, dtype="<f8"))
+            columns.append({"name": name, "kind": "array", "dtype": "<f8"})
+        elif all(isinstance(value, str) for value in values):
+            categories, codes = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+            arrays.append(codes.astype("<i4"))
+            columns.append({"name": name, "kind": "category", "dtype": "<i4", "categories": categories.tolist()})
+        else:
+            columns.append({"name": name, "kind": "json", "values": values})
+
+    return _pack({"count": len(trades), "columns": columns, "extra": extra or {}}, arrays)
+
+def decode_trades(blob: bytes) -> Dict[str, Any]:
+    """{"trades": [...], **extra}, the shape trade_history had as a JSON column"""
+    meta, body = _unpack(blob)
+    count, offset = meta["count"], 0
+    decoded = {}
+    for column in meta["columns"]:
+        if column["kind"] == "json":
+            decoded[column["name"]] = column["values"]
+            continue
+        values = np.frombuffer(body, dtype=column["dtype"], count=count, offset=offset)
+        offset += values.nbytes
+        if column["kind"] == "category":
+            values = np.asarray(column["categories"], dtype=object)[values]
+        decoded[column["name"]] = values.tolist()
+
+    trades = [
+        {name: values[index] for name, values in decoded.items()}
+        for index in range(count)
+    ]
+    return dict(meta["extra"], trades=trades)
+
+def equity_preview(timestamps: np.ndarray, equity: np.ndarray, points: Optional[int] = None) -> Dict[str, Any]:
+    """Downsampled curve for list views
+
+    Each bucket contributes its low and its high in time order, so drawdowns
+    and peaks survive the reduction.
+    """
+    points = points or settings.BACKTEST_PREVIEW_POINTS
+    equity = np.asarray(equity, dtype=np.float64)
+    length = len(equity)
+    if length <= points:
+        keep = np.arange(length)
+    else:
+        edges = np.linspace(0, length, max((points - 2) // 2, 1) + 1).astype(int)
+        keep = [0, length - 1]
+        for start, stop in zip(edges[:-1], edges[1:]):
+            if stop > start:
+                bucket = equity[start:stop]
+                keep += [start + int(np.argmin(bucket)), start + int(np.argmax(bucket))]
+        keep = np.unique(keep)
+
+    return {
+        "timestamps": time_labels(timestamps, keep),
+        "equity": np.round(equity[keep], 2).tolist()
+    }
+
+def encode_state(state: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> bytes:
+    """JSON engine state plus named arrays (the price tail an extension warms indicators on)"""
+    arrays = {name: np.ascontiguousarray(values, dtype="<f8") for name, values in arrays.items()}
+    layout = [{"name": name, "shape": list(values.shape)} for name, values in arrays.items()]
+    return _pack({"state": state, "arrays": layout}, list(arrays.values()))
+
+def decode_state(blob: bytes) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    meta, body = _unpack(blob)
+    arrays, offset = {}, 0
+    for entry in meta["arrays"]:
+        count = int(np.prod(entry["shape"]))
+        arrays[entry["name"]] = np.frombuffer(body, dtype="<f8", count=count, offset=offset).reshape(entry["shape"])
+        offset += count * 8
+    return meta["state"], arrays
@@ -0,0 +1,173 @@
+import math
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from services.data_panel import DataPanel, panel_store
+from services.market_calendar import nse_calendar
+from services.market_data_service import MarketDataService
+
+def daily_returns(close: np.ndarray) -> np.ndarray:
+    """(T-1, N) simple returns; bars before a symbol's first price count as flat"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = close[1:] / close[:-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+def max_drawdown(returns: np.ndarray) -> float:
+    """Deepest fall from a running peak of the compounded series, in percent"""
+    equity = np.cumprod(1 + returns)
+    peaks = np.maximum(np.maximum.accumulate(equity), 1.0)
+    return float(((peaks - equity) / peaks).max(initial=0) * 100)
+
+def historical_var(pnl: np.ndarray, confidence: float) -> Tuple[float, float]:
+    """VaR and CVaR of a P&L sample, as positive losses"""
+    cutoff = np.quantile(pnl, 1 - confidence)
+    return float(-cutoff), float(-pnl[pnl <= cutoff].mean())
+
+def parametric_var(mean: float, std: float, confidence: float) -> Tuple[float, float]:
+    """Normal VaR and CVaR (expected shortfall) of a P&L with the given moments"""
+    normal = NormalDist()
+    z = normal.inv_cdf(1 - confidence)
+    return -(mean + z * std), -(mean - std * normal.pdf(z) / (1 - confidence))
+
+class RiskEngine:
+    """VaR/CVaR, beta/alpha, Sortino and drawdown of a set of positions
+
+    Positions are priced on an aligned (T, N) daily close panel with the
+    benchmark as one more column. Mean and covariance of that return matrix
+    are cached per universe and window, so repeated requests on the same
+    holdings (other sizes, other confidence levels) reduce to a few
+    matrix-vector products.
+    """
+
+    def __init__(self, window_days: Optional[int] = None, confidence: Optional[float] = None,
+                 max_entries: int = 64):
+        self.window_days = window_days or settings.RISK_WINDOW_DAYS
+        self.confidence = confidence or settings.RISK_CONFIDENCE
+        self.periods_per_year = settings.BACKTEST_PERIODS_PER_YEAR
+        self.max_entries = max_entries
+        self.moments_cache: "OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self.market_service = MarketDataService()
+
+    async def _panel(self, symbols: List[str], start: datetime, end: datetime) -> DataPanel:
+        return await panel_store.get_or_build(
+            symbols, start, end,
+            lambda symbol: self.market_service.get_history_columns(symbol, start, end)
+        )
+
+    def moments(self, symbols: List[str], timestamps: np.ndarray, returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Column means and sample covariance of a return matrix, cached by universe and window"""
+        key = (tuple(symbols), int(timestamps[0]), int(timestamps[-1]), len(timestamps))
+        cached = self.moments_cache.get(key)
+        if cached is not None:
+            self.moments_cache.move_to_end(key)
+            return cached
+
+        mean = returns.mean(axis=0)
+        centered = returns - mean
+        covariance = centered.T @ centered / max(len(returns) - 1, 1)
+        if len(self.moments_cache) >= self.max_entries:
+            self.moments_cache.popitem(last=False)
+        self.moments_cache[key] = (mean, covariance)
+        return mean, covariance
+
+    async def analyze(self, exposures: Dict[str, float], panel: Optional[DataPanel] = None,
+                      window_days: Optional[int] = None, confidence: Optional[float] = None) -> Dict[str, Any]:
+        """Risk of holding `exposures` (symbol -> market value; negative for shorts) for one day
+
+        `panel` lets callers that already hold a daily panel of the symbols
+        reuse it; otherwise one is loaded for the window. VaR and CVaR are in
+        currency, returns-based figures in percent.
+        """
+        window_days = window_days or self.window_days
+        confidence = confidence or self.confidence
+        exposures = {symbol: float(value) for symbol, value in exposures.items() if value}
+        if not exposures:
+            return {}
+
+        end = datetime.utcnow()
+        if panel is None:
+            start = end - timedelta(days=int(window_days * 365 / 252) + 10)
+            panel = await self._panel(list(exposures), start, end)
+        else:
+            start = datetime.fromtimestamp(int(panel.timestamps[0]) / 1e9, timezone.utc).replace(tzinfo=None)
+        benchmark = await self._panel([settings.PERFORMANCE_BENCHMARK_SYMBOL], start, end)
+
+        symbols = [symbol for symbol in panel.symbols if symbol in exposures]
+        columns = [panel.symbols.index(symbol) for symbol in symbols]
+        if not symbols:
+            return {}
+
+        # Rows both series have, newest window_days + 1 of them
+        timestamps = panel.timestamps
+        rows = np.arange(len(timestamps))
+        if benchmark.symbols:
+            timestamps, rows, benchmark_rows = np.intersect1d(panel.timestamps, benchmark.timestamps, return_indices=True)
+        timestamps = timestamps[-(window_days + 1):]
+        if len(timestamps) < 3:
+            return {}
+
+        close = panel["close"][rows[-len(timestamps):]][:, columns]
+        if benchmark.symbols:
+            close = np.column_stack([close, benchmark["close"][benchmark_rows[-len(timestamps):], 0]])
+        returns = daily_returns(close)
+        mean, covariance = self.moments(symbols + benchmark.symbols, timestamps, returns)
+
+        count = len(symbols)
+        position = np.array([exposures[symbol] for symbol in symbols])
+        gross = float(np.abs(position).sum())
+        weights = position / gross
+        asset_returns = returns[:, :count]
+        asset_covariance = covariance[:count, :count]
+
+        pnl = asset_returns @ position
+        var_historical, cvar_historical = historical_var(pnl, confidence)
+        pnl_std = math.sqrt(max(float(position @ asset_covariance @ position), 0.0))
+        var_parametric, cvar_parametric = parametric_var(float(mean[:count] @ position), pnl_std, confidence)
+
+        portfolio = asset_returns @ weights
+        variance = max(float(weights @ asset_covariance @ weights), 0.0)
+        contributions = weights * (asset_covariance @ weights) / variance if variance > 0 else np.zeros(count)
+        downside = math.sqrt(float(np.mean(np.minimum(portfolio, 0) ** 2)))
+        annualize = math.sqrt(self.periods_per_year)
+
+        beta = alpha = None
+        betas = np.full(count, np.nan)
+        if benchmark.symbols and covariance[-1, -1] > 0:
+            betas = covariance[:count, -1] / covariance[-1, -1]
+            beta = float(weights @ betas)
+            alpha = (float(mean[:count] @ weights) - beta * float(mean[-1])) * self.periods_per_year * 100
+
+        return {
+            "confidence": confidence,
+            "window_days": len(returns),
+            "as_of": datetime.fromtimestamp(int(timestamps[-1]) / 1e9, timezone.utc).astimezone(nse_calendar.tz).date().isoformat(),
+            "exposure": round(gross, 2),
+            "var_historical": round(var_historical, 2),
+            "cvar_historical": round(cvar_historical, 2),
+            "var_parametric": round(var_parametric, 2),
+            "cvar_parametric": round(cvar_parametric, 2),
+            "var_percent": round(var_historical / gross * 100, 4),
+            "volatility": round(math.sqrt(variance) * annualize * 100, 4),
+            "sharpe_ratio": round(float(portfolio.mean()) / math.sqrt(variance) * annualize, 4) if variance > 0 else 0.0,
+            "sortino_ratio": round(float(portfolio.mean()) / downside * annualize, 4) if downside > 0 else 0.0,
+            "max_drawdown": round(max_drawdown(portfolio), 4),
+            "beta": round(beta, 4) if beta is not None else None,
+            "alpha": round(alpha, 4) if alpha is not None else None,
+            "benchmark": settings.PERFORMANCE_BENCHMARK_SYMBOL if benchmark.symbols else None,
+            "positions": {
+                symbol: {
+                    "weight": round(float(weights[index]) * 100, 4),
+                    "beta": round(float(betas[index]), 4) if not np.isnan(betas[index]) else None,
+                    "risk_contribution": round(float(contributions[index]) * 100, 4)
+                }
+                for index, symbol in enumerate(symbols)
+            },
+            "missing": [symbol for symbol in exposures if symbol not in symbols]
+        }
+
+# Create global risk engine instance
+risk_engine = RiskEngine()
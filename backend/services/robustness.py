@@ -0,0 +1,171 @@
+import math
+import multiprocessing
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Callable
+
+from config import settings
+
+ROBUSTNESS_METHODS = ("trades", "block_bootstrap")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+def trade_returns(trades: List[Dict[str, Any]], equity: np.ndarray, initial_capital: float) -> np.ndarray:
+    """Each trade's P&L as a fraction of portfolio equity on the bar before it opened"""
+    if not trades:
+        return np.empty(0)
+    equity = np.asarray(equity, dtype=np.float64)
+    before = np.concatenate([[initial_capital], equity])
+    entries = np.clip(np.array([trade["entry_index"] for trade in trades]), 0, len(equity))
+    return np.array([trade["pnl"] for trade in trades]) / before[entries]
+
+def bar_returns(equity: np.ndarray, initial_capital: float) -> np.ndarray:
+    equity = np.asarray(equity, dtype=np.float64)
+    previous = np.concatenate([[initial_capital], equity[:-1]])
+    return equity / previous - 1
+
+def simulate_paths(returns: np.ndarray, paths: int, rng: np.random.Generator, method: str,
+                   block_size: int, ruin_level: float) -> Dict[str, np.ndarray]:
+    """One vectorized batch of resampled equity paths, as per-path statistics
+
+    "trades" draws the trade sequence with replacement; "block_bootstrap"
+    concatenates randomly placed blocks of consecutive bar returns, which
+    keeps volatility clustering and the serial correlation of held positions.
+    """
+    length = len(returns)
+    if method == "trades":
+        index = rng.integers(0, length, (paths, length))
+    else:
+        block_size = min(block_size, length)
+        blocks = math.ceil(length / block_size)
+        starts = rng.integers(0, length - block_size + 1, (paths, blocks))
+        index = (starts[:, :, None] + np.arange(block_size)).reshape(paths, -1)[:, :length]
+
+    # Equity relative to the starting capital
+    equity = np.cumprod(1 + returns[index], axis=1)
+    peaks = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    return {
+        "total_return": (equity[:, -1] - 1) * 100,
+        "max_drawdown": ((peaks - equity) / peaks).max(axis=1) * 100,
+        "ruined": equity.min(axis=1) <= ruin_level
+    }
+
+# Worker side ----------------------------------------------------------------
+# The return series is shipped once per worker process; batches then carry
+# only their seed and size.
+
+_worker: Dict[str, Any] = {}
+
+def _init_worker(returns: np.ndarray, context: Dict[str, Any]):
+    _worker.clear()
+    _worker.update(context)
+    _worker["returns"] = returns
+
+def _run_batch(seed: np.random.SeedSequence, paths: int) -> Dict[str, np.ndarray]:
+    return simulate_paths(
+        _worker["returns"], paths, np.random.default_rng(seed), _worker["method"],
+        _worker["block_size"], _worker["ruin_level"]
+    )
+
+# Parent side ----------------------------------------------------------------
+
+def distribution(values: np.ndarray, bins: int = 30) -> Dict[str, Any]:
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "percentiles": {str(q): float(value) for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        "histogram": {"edges": np.round(edges, 4).tolist(), "counts": counts.tolist()}
+    }
+
+class RobustnessAnalyzer:
+    """Monte Carlo trade resampling and block bootstrap of a backtest's returns
+
+    Paths are simulated in vectorized batches; large runs spread batches over a
+    process pool. Every batch has its own child seed, so a seeded analysis gives
+    the same distributions whatever the worker count.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, batch_size: int = 500):
+        self.max_workers = max_workers or settings.OPTIMIZER_MAX_WORKERS or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def analyze(self, returns: np.ndarray, method: str = "trades", simulations: int = 5000,
+                block_size: Optional[int] = None, ruin_percent: float = 50.0, seed: Optional[int] = None,
+                observed: Optional[Dict[str, float]] = None,
+                progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Distributions of total return and max drawdown, plus risk of ruin
+
+        Ruin is equity falling to `ruin_percent` below the starting capital at
+        any point. `observed` (the backtest's own total_return / max_drawdown)
+        is placed within the simulated distributions.
+        """
+        if method not in ROBUSTNESS_METHODS:
+            raise ValueError(f"Unknown robustness method '{method}'")
+        returns = np.asarray(returns, dtype=np.float64)
+        returns = returns[np.isfinite(returns)]
+        if len(returns) < 2:
+            raise ValueError("Not enough trades or bars to resample")
+        progress = progress or (lambda fraction: None)
+
+        started = time.time()
+        block_size = max(int(block_size or round(len(returns) ** (1 / 3))), 1)
+        context = {"method": method, "block_size": block_size, "ruin_level": 1 - ruin_percent / 100}
+        sizes = [self.batch_size] * (simulations // self.batch_size)
+        if simulations % self.batch_size:
+            sizes.append(simulations % self.batch_size)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+        batches: List[Optional[Dict[str, np.ndarray]]] = [None] * len(sizes)
+        if self.max_workers <= 1 or len(sizes) < 4:
+            for index, (child, size) in enumerate(zip(seeds, sizes)):
+                batches[index] = simulate_paths(
+                    returns, size, np.random.default_rng(child), method, block_size, context["ruin_level"]
+                )
+                progress((index + 1) / len(sizes))
+        else:
+            # spawn rather than fork: the API process is multi-threaded
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(sizes)),
+                                     mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(returns, context)) as pool:
+                futures = {pool.submit(_run_batch, child, size): index for index, (child, size) in enumerate(zip(seeds, sizes))}
+                done = 0
+                try:
+                    for future in as_completed(futures):
+                        batches[futures[future]] = future.result()
+                        done += 1
+                        progress(done / len(sizes))
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+
+        total_return = np.concatenate([batch["total_return"] for batch in batches])
+        max_drawdown = np.concatenate([batch["max_drawdown"] for batch in batches])
+        ruined = np.concatenate([batch["ruined"] for batch in batches])
+
+        analysis = {
+            "method": method,
+            "simulations": int(len(total_return)),
+            "sample_size": int(len(returns)),
+            "block_size": block_size if method == "block_bootstrap" else None,
+            "ruin_percent": ruin_percent,
+            "seed": seed,
+            "total_return": distribution(total_return),
+            "max_drawdown": distribution(max_drawdown),
+            "risk_of_ruin": float(ruined.mean() * 100),
+            "probability_of_loss": float((total_return < 0).mean() * 100),
+            "elapsed_seconds": round(time.time() - started, 3)
+        }
+        if observed:
+            # Share of simulated paths that did worse than the backtest itself
+            analysis["observed"] = dict(
+                observed,
+                return_percentile=float((total_return < observed["total_return"]).mean() * 100),
+                drawdown_percentile=float((max_drawdown > observed["max_drawdown"]).mean() * 100)
+            )
+        return analysis
+
+# Create global robustness analyzer instance
+robustness_analyzer = RobustnessAnalyzer()
@@ -0,0 +1,376 @@
+import itertools
+import multiprocessing
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+from config import settings
+from services.backtest_engine import (
+    BacktestEngine, IndicatorCache, generate_signals, signal_prices, compute_metrics, monthly_returns
+)
+
+# Metrics where a smaller value ranks higher
+ASCENDING_METRICS = {"max_drawdown"}
+
+METRIC_KEYS = ["total_return", "annualized_return", "sharpe_ratio", "max_drawdown", "win_rate", "total_trades"]
+
+SharedSpec = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+def parameter_grid(parameters_template: Dict[str, Any], steps: int = 5) -> Dict[str, List[Any]]:
+    """Evenly spaced values across each template range; integer parameters stay integers"""
+    space = {}
+    for name, spec in (parameters_template or {}).items():
+        if not isinstance(spec, dict) or "min" not in spec or "max" not in spec:
+            continue
+        values = np.linspace(float(spec["min"]), float(spec["max"]), max(steps, 2))
+        if spec.get("type") == "number" and float(spec.get("default", 0)).is_integer() \
+                and float(spec["min"]).is_integer() and float(spec["max"]).is_integer():
+            space[name] = sorted({int(round(value)) for value in values})
+        else:
+            space[name] = [round(float(value), 4) for value in values]
+    return space
+
+def _valid(category: str, combination: Dict[str, Any]) -> bool:
+    """Drop combinations a template cannot use (e.g. short MA not shorter than long MA)"""
+    if category == "moving_average_crossover":
+        return combination.get("short_period", 0) < combination.get("long_period", float("inf"))
+    return True
+
+def grid_combinations(category: str, space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(space.keys())
+    combinations = (dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names)))
+    return [combination for combination in combinations if _valid(category, combination)]
+
+def random_combinations(category: str, space: Dict[str, List[Any]], samples: int,
+                        seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Distinct random draws from the grid (all of it when the grid is smaller than `samples`)"""
+    grid = grid_combinations(category, space)
+    if len(grid) <= samples:
+        return grid
+    return random.Random(seed).sample(grid, samples)
+
+def walk_forward_windows(length: int, in_sample: int, out_of_sample: int,
+                         anchored: bool = False) -> List[Tuple[int, int, int]]:
+    """(in-sample start, out-of-sample start, out-of-sample stop) row indices
+
+    Rolling windows slide by the out-of-sample length; anchored windows keep the
+    in-sample start at the first row. The last out-of-sample window may be short.
+    """
+    if in_sample < 1 or out_of_sample < 1:
+        return []
+    splits = []
+    split = in_sample
+    while split < length:
+        start = 0 if anchored else split - in_sample
+        splits.append((start, split, min(split + out_of_sample, length)))
+        split += out_of_sample
+    return splits
+
+def _day(timestamp: np.int64) -> str:
+    return str(np.datetime64(int(timestamp), "ns").astype("datetime64[D]"))
+
+# Worker side ----------------------------------------------------------------
+# Price arrays are attached once per worker process from shared memory; the
+# indicator cache then lives for the worker's lifetime, so consecutive chunks
+# re-use moving averages computed for earlier combinations.
+
+_worker: Dict[str, Any] = {}
+
+def _attach(spec: SharedSpec) -> Tuple[Dict[str, np.ndarray], List[shared_memory.SharedMemory]]:
+    arrays, handles = {}, []
+    for key, (name, shape, dtype) in spec.items():
+        # Pool workers share the parent's resource tracker, so attaching here does not
+        # take ownership; the parent unlinks the block when the sweep finishes
+        handle = shared_memory.SharedMemory(name=name)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=handle.buf)
+        handles.append(handle)
+    return arrays, handles
+
+def _init_worker(spec: SharedSpec, context: Dict[str, Any]):
+    arrays, handles = _attach(spec)
+    _worker.clear()
+    _worker.update(context)
+    _worker["arrays"] = arrays
+    _worker["handles"] = handles
+    _worker["engine"] = BacktestEngine(periods_per_year=context.get("periods_per_year"))
+    _worker["cache"] = IndicatorCache(arrays["close"])
+
+def evaluate_combination(arrays: Dict[str, np.ndarray], cache: IndicatorCache, engine: BacktestEngine,
+                         context: Dict[str, Any], combination: Dict[str, Any],
+                         window: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+    """Metrics for one parameter combination, optionally over a row window [start, stop)
+
+    Indicators are always computed on the full series (and cached), then sliced,
+    so windows see the same warmed-up values as a full-range run.
+    """
+    parameters = dict(context.get("base_parameters") or {}, **combination)
+    entries, exits = generate_signals(context["category"], signal_prices(arrays), parameters, context.get("conditions"), cache)
+
+    rows = slice(*window) if window else slice(None)
+    result = engine.simulate(
+        arrays["timestamp"][rows], arrays["close"][rows], entries[rows], exits[rows],
+        context["initial_capital"], context.get("risk_management"),
+        arrays["high"][rows], arrays["low"][rows], context.get("symbols"),
+        open=arrays["open"][rows] if "open" in arrays else None
+    )
+    return dict({key: result[key] for key in METRIC_KEYS}, parameters=combination)
+
+def _evaluate_chunk(chunk: List[Dict[str, Any]], window: Optional[Tuple[int, int]] = None) -> List[Dict[str, Any]]:
+    return [
+        evaluate_combination(_worker["arrays"], _worker["cache"], _worker["engine"], _worker, combination, window)
+        for combination in chunk
+    ]
+
+# Parent side ----------------------------------------------------------------
+
+def rank_results(results: List[Dict[str, Any]], metric: str) -> List[Dict[str, Any]]:
+    sign = 1 if metric in ASCENDING_METRICS else -1
+    ranked = sorted(results, key=lambda row: (np.isnan(row[metric]), sign * row[metric]))
+    for rank, row in enumerate(ranked, start=1):
+        row["rank"] = rank
+    return ranked
+
+class SharedPricePanel:
+    """Copies price arrays into shared memory blocks that worker processes attach to by name"""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.handles: List[shared_memory.SharedMemory] = []
+        self.spec: SharedSpec = {}
+        for key, values in arrays.items():
+            values = np.ascontiguousarray(values)
+            handle = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=values.dtype, buffer=handle.buf)[...] = values
+            self.handles.append(handle)
+            self.spec[key] = (handle.name, values.shape, values.dtype.str)
+
+    def close(self):
+        for handle in self.handles:
+            handle.close()
+            try:
+                handle.unlink()
+            except FileNotFoundError:
+                pass
+        self.handles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class StrategyOptimizer:
+    """Grid / random parameter search over a process pool
+
+    The price panel is placed in shared memory once; each worker attaches to it
+    at start-up, so only parameter dicts and metric rows cross process boundaries.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 16):
+        self.max_workers = max_workers or settings.OPTIMIZER_MAX_WORKERS or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def _chunks(self, combinations: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        # Sorted so neighbouring combinations (same periods) land in the same worker cache
+        ordered = sorted(combinations, key=lambda combination: sorted(combination.items()))
+        return [ordered[index:index + self.chunk_size] for index in range(0, len(ordered), self.chunk_size)]
+
+    def _arrays(self, timestamps: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                open: Optional[np.ndarray], volume: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        arrays = {"timestamp": timestamps, "close": close, "high": high, "low": low}
+        arrays.update(signal_prices({"open": open, "volume": volume}))
+        return arrays
+
+    def _context(self, category: str, initial_capital: float, base_parameters: Optional[Dict[str, Any]],
+                 conditions: Optional[Dict[str, Any]], risk_management: Optional[Dict[str, Any]],
+                 symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        return {
+            "category": category,
+            "symbols": symbols,
+            "initial_capital": initial_capital,
+            "base_parameters": base_parameters or {},
+            "conditions": conditions,
+            "risk_management": risk_management,
+            "periods_per_year": settings.BACKTEST_PERIODS_PER_YEAR
+        }
+
+    def evaluate(self, arrays: Dict[str, np.ndarray], combinations: List[Dict[str, Any]], context: Dict[str, Any],
+                 windows: Optional[List[Tuple[int, int]]] = None,
+                 progress: Optional[Callable[[float], None]] = None) -> List[List[Dict[str, Any]]]:
+        """Evaluate every combination on every window; returns one result list per window
+
+        `progress` is called with the completed fraction; an exception it raises
+        (a cancelled job, say) abandons the remaining work.
+        """
+        windows = windows or [None]
+        chunks = self._chunks(combinations)
+        total = len(combinations) * len(windows)
+        progress = progress or (lambda fraction: None)
+
+        # Small jobs are cheaper in-process than paying for worker start-up
+        if self.max_workers <= 1 or total < 2 * self.chunk_size:
+            cache = IndicatorCache(arrays["close"])
+            engine = BacktestEngine(periods_per_year=context.get("periods_per_year"))
+            results = []
+            for window in windows:
+                rows = []
+                for combination in combinations:
+                    rows.append(evaluate_combination(arrays, cache, engine, context, combination, window))
+                    progress((len(results) * len(combinations) + len(rows)) / total)
+                results.append(rows)
+            return results
+
+        with SharedPricePanel(arrays) as panel:
+            # spawn rather than fork: the API process is multi-threaded
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker, initargs=(panel.spec, context)) as pool:
+                futures = [[pool.submit(_evaluate_chunk, chunk, window) for chunk in chunks] for window in windows]
+                done = 0
+                try:
+                    for future in as_completed([future for window_futures in futures for future in window_futures]):
+                        done += len(future.result())
+                        progress(done / total)
+                except BaseException:
+                    for window_futures in futures:
+                        for future in window_futures:
+                            future.cancel()
+                    raise
+                return [[row for future in window_futures for row in future.result()] for window_futures in futures]
+
+    def _combinations(self, category: str, space: Dict[str, List[Any]], method: str,
+                      samples: int, seed: Optional[int]) -> List[Dict[str, Any]]:
+        if method == "random":
+            combinations = random_combinations(category, space, samples, seed)
+        else:
+            combinations = grid_combinations(category, space)
+
+        if not combinations:
+            raise ValueError("Parameter space is empty")
+        if len(combinations) > settings.OPTIMIZER_MAX_COMBINATIONS:
+            raise ValueError(
+                f"{len(combinations)} combinations exceeds the limit of {settings.OPTIMIZER_MAX_COMBINATIONS}; "
+                f"use random search or a coarser grid"
+            )
+        return combinations
+
+    def optimize(self, timestamps: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 initial_capital: float, category: str, space: Dict[str, List[Any]], method: str = "grid",
+                 samples: int = 50, metric: str = "sharpe_ratio", top_n: int = 20,
+                 base_parameters: Optional[Dict[str, Any]] = None, conditions: Optional[Dict[str, Any]] = None,
+                 risk_management: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                 symbols: Optional[List[str]] = None, open: Optional[np.ndarray] = None,
+                 volume: Optional[np.ndarray] = None,
+                 progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Search the parameter space and return the top_n combinations ranked by metric"""
+        combinations = self._combinations(category, space, method, samples, seed)
+        arrays = self._arrays(timestamps, close, high, low, open, volume)
+        context = self._context(category, initial_capital, base_parameters, conditions, risk_management, symbols)
+
+        started = time.perf_counter()
+        results = self.evaluate(arrays, combinations, context, progress=progress)[0]
+        elapsed = time.perf_counter() - started
+
+        return {
+            "method": method,
+            "metric": metric,
+            "evaluated": len(results),
+            "elapsed_seconds": round(elapsed, 3),
+            "results": rank_results(results, metric)[:top_n]
+        }
+
+    def walk_forward(self, timestamps: np.ndarray, close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                     initial_capital: float, category: str, space: Dict[str, List[Any]],
+                     in_sample: int, out_of_sample: int, anchored: bool = False, method: str = "grid",
+                     samples: int = 50, metric: str = "sharpe_ratio",
+                     base_parameters: Optional[Dict[str, Any]] = None, conditions: Optional[Dict[str, Any]] = None,
+                     risk_management: Optional[Dict[str, Any]] = None, seed: Optional[int] = None,
+                     symbols: Optional[List[str]] = None, open: Optional[np.ndarray] = None,
+                     volume: Optional[np.ndarray] = None,
+                     progress: Optional[Callable[[float], None]] = None) -> Dict[str, Any]:
+        """Optimize on rolling in-sample windows and trade each winner on the following out-of-sample window
+
+        All in-sample optimizations are submitted to the pool together. Indicators
+        are computed once on the full series, so overlapping windows share them and
+        each out-of-sample window starts with fully warmed-up indicators.
+        """
+        splits = walk_forward_windows(len(timestamps), in_sample, out_of_sample, anchored)
+        if not splits:
+            raise ValueError("Date range is too short for one in-sample plus out-of-sample window")
+
+        combinations = self._combinations(category, space, method, samples, seed)
+        arrays = self._arrays(timestamps, close, high, low, open, volume)
+        context = self._context(category, initial_capital, base_parameters, conditions, risk_management, symbols)
+
+        started = time.perf_counter()
+        in_sample_results = self.evaluate(
+            arrays, combinations, context, [(start, end) for start, end, _ in splits], progress
+        )
+
+        cache = IndicatorCache(close)
+        engine = BacktestEngine(periods_per_year=context["periods_per_year"])
+        prices = signal_prices(arrays)
+        capital = initial_capital
+        equity_parts: List[np.ndarray] = []
+        trades: List[Dict[str, Any]] = []
+        windows: List[Dict[str, Any]] = []
+
+        for (start, split, stop), results in zip(splits, in_sample_results):
+            best = rank_results(results, metric)[0]
+            parameters = dict(context["base_parameters"], **best["parameters"])
+            entries, exits = generate_signals(category, prices, parameters, conditions, cache)
+
+            # Each out-of-sample segment trades the capital the previous one ended with
+            rows = slice(split, stop)
+            result = engine.simulate(
+                timestamps[rows], close[rows], entries[rows], exits[rows],
+                capital, risk_management, high[rows], low[rows], symbols,
+                open=open[rows] if open is not None else None
+            )
+            capital = float(result["equity"][-1])
+            equity_parts.append(result["equity"])
+            # Indices are relative to the window; shift them onto the stitched curve
+            offset = split - splits[0][1]
+            trades.extend(
+                dict(trade, entry_index=trade["entry_index"] + offset, exit_index=trade["exit_index"] + offset)
+                for trade in result["trades"]
+            )
+
+            windows.append({
+                "in_sample": {"start": _day(timestamps[start]), "end": _day(timestamps[split - 1])},
+                "out_of_sample": {"start": _day(timestamps[split]), "end": _day(timestamps[stop - 1])},
+                "parameters": best["parameters"],
+                "in_sample_metrics": {key: best[key] for key in METRIC_KEYS},
+                "out_of_sample_metrics": {key: result[key] for key in METRIC_KEYS}
+            })
+
+        equity = np.concatenate(equity_parts)
+        oos_timestamps = timestamps[splits[0][1]:splits[-1][2]]
+        summary = compute_metrics(equity, initial_capital, context["periods_per_year"])
+        wins = sum(1 for trade in trades if trade["pnl"] > 0)
+
+        # Walk-forward efficiency: how much of the in-sample performance survives out of sample
+        in_sample_annualized = np.mean([window["in_sample_metrics"]["annualized_return"] for window in windows])
+        out_sample_annualized = np.mean([window["out_of_sample_metrics"]["annualized_return"] for window in windows])
+        efficiency = out_sample_annualized / in_sample_annualized if in_sample_annualized > 0 else None
+
+        return dict(
+            summary,
+            win_rate=float(wins / len(trades) * 100) if trades else 0.0,
+            total_trades=len(trades),
+            method=method,
+            metric=metric,
+            evaluated=len(combinations) * len(splits),
+            elapsed_seconds=round(time.perf_counter() - started, 3),
+            walk_forward_efficiency=float(efficiency) if efficiency is not None else None,
+            windows=windows,
+            equity=equity,
+            timestamps=oos_timestamps,
+            trades=trades,
+            monthly_returns=monthly_returns(oos_timestamps, equity, initial_capital)
+        )
+
+# Create global strategy optimizer instance
+strategy_optimizer = StrategyOptimizer()
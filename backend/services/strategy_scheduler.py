@@ -0,0 +1,419 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import asyncio
+import socket
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import settings
+from database import PostgresSessionLocal, get_redis_client
+from models.strategy import Strategy
+from services.backtest_engine import backtest_engine, generate_signals
+from services.indicators import IndicatorCache
+from services.condition_compiler import condition_compiler
+from services.market_calendar import MarketCalendar, nse_calendar
+from services.market_data_service import MarketDataService
+from services.strategy_service import SIGNAL_REASONS, signal_lookback_bars
+from services.timeseries_backends import INTERVALS
+from services.timeseries_service import TimeSeriesService
+
+# Replaces (ARGV[2]) or deletes (empty ARGV[2]) a shard lease only while
+# ARGV[1], our worker id, still holds it; replacing it with ARGV[1] renews it
+LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+else
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', tonumber(ARGV[3]))
+end
+return 1
+"""
+
+class ShardLeaseLost(Exception):
+    """Our shard lease expired and another worker took the shard over"""
+
+class ScheduledStrategy:
+    """The parts of an auto-execute strategy the scheduler needs, detached from the session"""
+    __slots__ = ("id", "user_id", "category", "parameters", "conditions", "interval",
+                 "lookback", "budgets", "reason")
+
+    def __init__(self, strategy: Strategy):
+        parameters = strategy.parameters or {}
+        symbols = parameters.get("symbols") or []
+        if not symbols:
+            raise ValueError("no parameters.symbols to trade")
+        self.interval = parameters.get("interval", "1d")
+        if self.interval not in INTERVALS:
+            raise ValueError(f"unknown interval '{self.interval}'")
+        if strategy.category == "custom":
+            if not (strategy.conditions or {}).get("entry"):
+                raise ValueError("custom strategy without an entry condition")
+            condition_compiler.validate(strategy.conditions, parameters)
+
+        self.id = strategy.id
+        self.user_id = strategy.user_id
+        self.category = strategy.category
+        self.parameters = parameters
+        self.conditions = strategy.conditions
+        self.lookback = signal_lookback_bars(parameters, strategy.conditions)
+        # Cash set aside per symbol, as _execute_strategy_logic sizes orders
+        capital = float(parameters.get("capital", settings.SCHEDULER_DEFAULT_CAPITAL))
+        weights = backtest_engine.allocation(symbols, strategy.risk_management)
+        size = backtest_engine.position_size(strategy.risk_management)
+        self.budgets = {symbol: capital * weight * size for symbol, weight in zip(symbols, weights)}
+        self.reason = SIGNAL_REASONS.get(strategy.category, "Custom Strategy Signal")
+
+def shard_of(symbol: str, shards: int) -> int:
+    """Stable across processes, unlike hash()"""
+    return zlib.crc32(symbol.encode()) % shards
+
+def evaluate_group(symbol: str, columns: Dict[str, np.ndarray], strategies: List[ScheduledStrategy],
+                   bar_close: datetime) -> List[Tuple[ScheduledStrategy, Dict[str, Any]]]:
+    """Orders fired on the last bar by every strategy trading one symbol
+
+    The strategies share one IndicatorCache, so an indicator or compiled
+    subexpression used by many of them is computed once for the group.
+    """
+    prices = {field: values[:, None] for field, values in columns.items() if field != "timestamp"}
+    cache = IndicatorCache(prices["close"])
+    price = float(prices["close"][-1, 0])
+    timestamp = bar_close.isoformat()
+
+    orders = []
+    for strategy in strategies:
+        try:
+            entries, exits = generate_signals(
+                strategy.category, prices, strategy.parameters, strategy.conditions, cache
+            )
+        except Exception as e:
+            print(f"Error evaluating strategy {strategy.id} on {symbol}: {e}")
+            continue
+        if not (entries[-1, 0] or exits[-1, 0]) or not price > 0:
+            continue
+        quantity = int(strategy.budgets[symbol] // price)
+        if quantity <= 0:
+            continue
+        orders.append((strategy, {
+            "symbol": symbol,
+            "action": "SELL" if exits[-1, 0] else "BUY",
+            "quantity": quantity,
+            "price": price,
+            "timestamp": timestamp,
+            "reason": strategy.reason
+        }))
+    return orders
+
+class StrategyScheduler:
+    """Runs active auto-execute strategies on every bar close of the NSE session
+
+    Strategies are grouped by (interval, symbol) so each symbol's bars are
+    fetched once per close however many strategies trade it, and the symbol
+    groups are split into shards. At each close every worker process (API
+    processes with SCHEDULER_ENABLED, or scheduler_worker.py) claims shards
+    with a Redis lease (SET NX PX), renewed while the shard runs, until all are
+    done, so load spreads across nodes and a crashed worker's shards are
+    retried once its lease expires.
+    """
+
+    def __init__(self, calendar: MarketCalendar = nse_calendar, redis_client=None):
+        self.calendar = calendar
+        self.redis_client = redis_client or get_redis_client()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.shards = settings.SCHEDULER_SHARDS
+        self.lease_ms = settings.SCHEDULER_LEASE_MS
+        self.delay = timedelta(milliseconds=settings.SCHEDULER_BAR_DELAY_MS)
+        self.market_service = MarketDataService()
+        self.timeseries_service: Optional[TimeSeriesService] = None
+        self._lease = None
+        # interval -> symbol -> strategies
+        self.groups: Dict[str, Dict[str, List[ScheduledStrategy]]] = {}
+        self.refreshed = 0.0
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+
+    # Registry -------------------------------------------------------------
+
+    def load_strategies(self) -> Dict[str, Dict[str, List[ScheduledStrategy]]]:
+        db = PostgresSessionLocal()
+        try:
+            strategies = db.query(Strategy).filter(
+                Strategy.is_active == True,
+                Strategy.auto_execute == True
+            ).all()
+            groups: Dict[str, Dict[str, List[ScheduledStrategy]]] = {}
+            for strategy in strategies:
+                try:
+                    scheduled = ScheduledStrategy(strategy)
+                except Exception as e:
+                    print(f"Skipping auto-execute strategy {strategy.id}: {e}")
+                    continue
+                for symbol in scheduled.budgets:
+                    groups.setdefault(scheduled.interval, {}).setdefault(symbol, []).append(scheduled)
+            return groups
+        finally:
+            db.close()
+
+    async def refresh(self, force: bool = False):
+        if not force and time.time() - self.refreshed < settings.SCHEDULER_REFRESH_SECONDS:
+            return
+        try:
+            loop = asyncio.get_event_loop()
+            self.groups = await loop.run_in_executor(None, self.load_strategies)
+            self.refreshed = time.time()
+        except Exception as e:
+            print(f"Error loading auto-execute strategies: {e}")
+
+    # Bar processing -------------------------------------------------------
+
+    async def fetch_bars(self, symbol: str, interval: str, bars: int, bar_close: datetime) -> Dict[str, np.ndarray]:
+        """Completed bars up to `bar_close`: live store for intraday, daily history otherwise"""
+        sessions = -(-bars // self.calendar.bars_per_session(interval))
+        start = self.calendar.sessions_back(bar_close, sessions)
+        if interval == "1d":
+            columns = await self.market_service.get_history_columns(
+                symbol, start.replace(tzinfo=None), bar_close.replace(tzinfo=None) + timedelta(days=1), interval
+            )
+        else:
+            if self.timeseries_service is None:
+                self.timeseries_service = TimeSeriesService()
+            columns = await self.timeseries_service.get_price_columns(
+                symbol, start.replace(tzinfo=None), bar_close.replace(tzinfo=None), interval
+            )
+        if not columns or not len(columns.get("timestamp", ())):
+            return {}
+
+        # Drop the bar that is still forming
+        step = 0 if interval == "1d" else int(INTERVALS[interval].total_seconds()) * 10**9
+        complete = np.asarray(columns["timestamp"]) + step <= int(bar_close.timestamp()) * 10**9
+        return {field: np.asarray(values)[complete] for field, values in columns.items()}
+
+    async def run_shard(self, interval: str, symbols: List[str], bar_close: datetime,
+                        lease: Optional[str] = None) -> int:
+        """Evaluate every strategy in one shard and publish the orders; returns (strategy, symbol) evaluations"""
+        groups = self.groups.get(interval, {})
+        histories = await asyncio.gather(*[
+            self.fetch_bars(symbol, interval, max(strategy.lookback for strategy in groups[symbol]), bar_close)
+            for symbol in symbols
+        ])
+
+        orders = []
+        evaluated = set()
+        evaluations = 0
+        for symbol, columns in zip(symbols, histories):
+            if not columns:
+                continue
+            orders += evaluate_group(symbol, columns, groups[symbol], bar_close)
+            evaluated.update(strategy.id for strategy in groups[symbol])
+            evaluations += len(groups[symbol])
+
+        # Publish only while we still hold the shard, so a worker that took it over can't double the orders
+        if lease and orders and self.renew(lease) is False:
+            raise ShardLeaseLost(lease)
+        self.publish(orders)
+        if evaluated:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.mark_executed, sorted(evaluated), bar_close)
+        return evaluations
+
+    async def run_leased(self, key: str, interval: str, symbols: List[str], bar_close: datetime) -> int:
+        """Run a shard, renewing its lease every third of SCHEDULER_LEASE_MS until it finishes"""
+        task = asyncio.ensure_future(self.run_shard(interval, symbols, bar_close, lease=key))
+        try:
+            while True:
+                done, _ = await asyncio.wait([task], timeout=self.lease_ms / 3000)
+                if done:
+                    return task.result()
+                if self.renew(key) is False:
+                    raise ShardLeaseLost(key)
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    def publish(self, orders: List[Tuple[ScheduledStrategy, Dict[str, Any]]]):
+        """Push each strategy's orders to its history list and its owner's signal channel"""
+        if not orders:
+            return
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for strategy, order in orders:
+                message = json.dumps(dict(order, strategy_id=strategy.id))
+                pipe.lpush(f"strategy:orders:{strategy.id}", message)
+                pipe.ltrim(f"strategy:orders:{strategy.id}", 0, 99)
+                pipe.publish(f"strategy:signals:{strategy.user_id}", message)
+            pipe.execute()
+        except Exception as e:
+            print(f"Error publishing strategy orders: {e}")
+
+    def mark_executed(self, strategy_ids: List[int], bar_close: datetime):
+        db = PostgresSessionLocal()
+        try:
+            db.query(Strategy).filter(Strategy.id.in_(strategy_ids)).update(
+                {Strategy.last_executed: bar_close}, synchronize_session=False
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating last_executed: {e}")
+        finally:
+            db.close()
+
+    async def run_bar(self, interval: str, bar_close: datetime) -> Dict[str, Any]:
+        """Claim and run shards for one bar close until every shard is done or the next bar is due"""
+        started = time.perf_counter()
+        shards: Dict[int, List[str]] = {}
+        for symbol in self.groups.get(interval, {}):
+            shards.setdefault(shard_of(symbol, self.shards), []).append(symbol)
+
+        prefix = f"scheduler:lease:{interval}:{int(bar_close.timestamp())}"
+        deadline = bar_close + INTERVALS[interval] if interval != "1d" else bar_close + timedelta(hours=1)
+        pending = set(shards)
+        running: Dict[asyncio.Task, int] = {}
+        failures: Dict[int, int] = {}
+        ran = evaluations = 0
+
+        while pending or running:
+            # Claim while there is capacity; each claim is one round trip, so
+            # workers that finish early pick up more shards
+            for shard in list(pending):
+                if len(running) >= settings.SCHEDULER_CONCURRENCY:
+                    break
+                status = self.claim(f"{prefix}:{shard}")
+                if status is None:
+                    continue
+                pending.discard(shard)
+                if status:
+                    task = asyncio.ensure_future(self.run_leased(f"{prefix}:{shard}", interval, shards[shard], bar_close))
+                    running[task] = shard
+
+            if running:
+                done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    shard = running.pop(task)
+                    try:
+                        evaluations += task.result()
+                        ran += 1
+                        self.settle(f"{prefix}:{shard}", done=True)
+                    except ShardLeaseLost:
+                        print(f"Scheduler shard {shard} for {interval} was taken over by another worker")
+                        # Wait it out like any shard held elsewhere, in case that worker dies too
+                        pending.add(shard)
+                    except Exception as e:
+                        print(f"Error running scheduler shard {shard} for {interval}: {e}")
+                        # Hand the shard back so this or another worker retries it
+                        self.settle(f"{prefix}:{shard}", done=False)
+                        failures[shard] = failures.get(shard, 0) + 1
+                        if failures[shard] < settings.SCHEDULER_SHARD_ATTEMPTS:
+                            pending.add(shard)
+            elif pending:
+                if datetime.now(timezone.utc) >= deadline:
+                    break
+                # Other workers hold the rest; wait in case one of them dies
+                await asyncio.sleep(self.lease_ms / 4000)
+
+        return {
+            "interval": interval,
+            "bar_close": bar_close.isoformat(),
+            "shards_run": ran,
+            "evaluations": evaluations,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+    def claim(self, key: str) -> Optional[bool]:
+        """True if we took the lease, False if the shard is already done, None if someone else holds it"""
+        try:
+            if self.redis_client.set(key, self.worker_id, nx=True, px=self.lease_ms):
+                return True
+            return False if self.redis_client.get(key) == "done" else None
+        except Exception as e:
+            print(f"Error claiming scheduler lease {key}: {e}")
+            return None
+
+    def renew(self, key: str) -> Optional[bool]:
+        """Extend our lease; False if another worker holds the shard now, None if Redis is unreachable"""
+        try:
+            return bool(self._lease_script()(keys=[key], args=[self.worker_id, self.worker_id, self.lease_ms]))
+        except Exception as e:
+            print(f"Error renewing scheduler lease {key}: {e}")
+            return None
+
+    def settle(self, key: str, done: bool) -> bool:
+        """Mark our lease done, or release it; a no-op if it expired and another worker took it"""
+        try:
+            value = "done" if done else ""
+            return bool(self._lease_script()(keys=[key], args=[self.worker_id, value, max(self.lease_ms, 3600000)]))
+        except Exception as e:
+            print(f"Error settling scheduler lease {key}: {e}")
+            return False
+
+    def _lease_script(self):
+        if self._lease is None:
+            self._lease = self.redis_client.register_script(LEASE_SCRIPT)
+        return self._lease
+
+    # Loop -----------------------------------------------------------------
+
+    async def run(self):
+        """Wait for each bar close of any scheduled interval and run it"""
+        self.running = True
+        cursor = datetime.now(timezone.utc)
+        while self.running:
+            try:
+                await self.refresh()
+                closes = {
+                    interval: self.calendar.next_bar_close(cursor, interval) for interval in self.groups
+                }
+                closes = {interval: close for interval, close in closes.items() if close is not None}
+                if not closes:
+                    await asyncio.sleep(settings.SCHEDULER_REFRESH_SECONDS)
+                    cursor = datetime.now(timezone.utc)
+                    continue
+
+                due = min(closes.values())
+                wait = (due + self.delay - datetime.now(timezone.utc)).total_seconds()
+                if wait > 0:
+                    # Wake up for registry refreshes even when the next close is hours away
+                    await asyncio.sleep(min(wait, settings.SCHEDULER_REFRESH_SECONDS))
+                    if wait > settings.SCHEDULER_REFRESH_SECONDS:
+                        continue
+
+                cursor = due
+                lag = datetime.now(timezone.utc) - due
+                for interval, close in closes.items():
+                    if close != due:
+                        continue
+                    # Closes missed while the process was suspended are not replayed
+                    if interval != "1d" and lag > INTERVALS[interval]:
+                        continue
+                    summary = await self.run_bar(interval, due)
+                    if summary["shards_run"]:
+                        print(f"Scheduler {self.worker_id}: {summary}")
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in strategy scheduler loop: {e}")
+                await asyncio.sleep(1)
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+# Create global strategy scheduler instance
+strategy_scheduler = StrategyScheduler()
@@ -1,23 +1,66 @@
+import re
+import math
 import asyncio
 import json
 import uuid
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+import numpy as np
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from datetime import datetime, timedelta, timezone, time
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, desc, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from models.strategy import Strategy, StrategyTrade, StrategyBacktest
+from config import settings
+from models.strategy import Strategy, StrategyTrade, StrategyPerformance, StrategyDailyPerformance, StrategyBacktest
+from models.trade import Trade
 from models.user import User
+from services.market_data_service import MarketDataService
+from services.backtest_engine import backtest_engine, generate_signals
+from services.data_panel import DataPanel, panel_store, forward_fill, with_quotes
+from services.condition_compiler import condition_compiler
+from services.event_backtester import EventBacktester, FillModel
+from services.timeseries_backends import INTERVALS
+from services.strategy_optimizer import strategy_optimizer, parameter_grid
+from services.backtest_queue import backtest_queue, JobCancelled
+from services.backtest_memo import backtest_memo
+from services.market_calendar import nse_calendar
+from services.risk_engine import risk_engine
+from services.robustness import robustness_analyzer, trade_returns, bar_returns, ROBUSTNESS_METHODS
+from services.result_codec import (
+    encode_equity, decode_equity, encode_trades, decode_trades, encode_state, decode_state, equity_preview, time_labels
+)
+
+OPTIMIZER_METRICS = {"sharpe_ratio", "total_return", "annualized_return", "max_drawdown", "win_rate"}
+SIGNAL_REASONS = {
+    "moving_average_crossover": "MA Crossover Signal",
+    "mean_reversion": "Mean Reversion Signal",
+    "momentum": "Momentum Signal"
+}
+
 from schemas.strategy import (
-    StrategyCreate, StrategyUpdate, StrategyBacktestCreate,
-    StrategyExecuteRequest, StrategyExecuteResponse
+    StrategyCreate, StrategyUpdate, StrategyTradeCreate, StrategyBacktestCreate, StrategyBacktestExtend, StrategyOptimizeRequest,
+    StrategyWalkForwardRequest, StrategyRobustnessRequest, StrategyExecuteRequest, StrategyExecuteResponse
 )
 
+def signal_lookback_bars(parameters: Optional[Dict[str, Any]], conditions: Optional[Dict[str, Any]]) -> int:
+    """Bars of history covering the longest indicator period, doubled for warm-up"""
+    periods = [
+        int(value) for key, value in (parameters or {}).items()
+        if key.endswith("_period") and isinstance(value, (int, float))
+    ]
+    periods += [
+        int(period) for expression in (conditions or {}).values() if isinstance(expression, str)
+        for period in re.findall(r"(?:_|\(\s*\w+\s*,\s*)(\d+)\b", expression)
+    ]
+    return max(periods, default=50) * 2
+
 class StrategyService:
     """Service for managing trading strategies"""
     
     def __init__(self, db: Session):
         self.db = db
+        self.market_service = MarketDataService()
     
     async def create_strategy(self, user_id: int, strategy_data: StrategyCreate) -> Strategy:
         """Create a new trading strategy"""
@@ -33,6 +76,8 @@ class StrategyService:
             if existing_strategy:
                 raise ValueError(f"Strategy with name '{strategy_data.name}' already exists")
             
+            condition_compiler.validate(strategy_data.conditions, strategy_data.parameters)
+            
             # Create new strategy
             db_strategy = Strategy(
                 user_id=user_id,
@@ -102,6 +147,11 @@ class StrategyService:
             
             # Update only provided fields
             update_data = strategy_data.dict(exclude_unset=True)
+            if "conditions" in update_data or "parameters" in update_data:
+                condition_compiler.validate(
+                    update_data.get("conditions", strategy.conditions),
+                    update_data.get("parameters", strategy.parameters)
+                )
             for field, value in update_data.items():
                 setattr(strategy, field, value)
             
@@ -154,28 +204,597 @@ class StrategyService:
         user_id: int, 
         backtest_data: StrategyBacktestCreate
     ) -> Optional[StrategyBacktest]:
-        """Create a new strategy backtest"""
+        """Queue a strategy backtest; the row is filled in by a backtest worker"""
         try:
             # Verify strategy belongs to user
             strategy = await self.get_strategy(backtest_data.strategy_id, user_id)
             if not strategy:
                 raise ValueError("Strategy not found or access denied")
             
+            symbols = backtest_data.symbols or (strategy.parameters or {}).get("symbols") or []
+            if not symbols:
+                raise ValueError("No symbols to backtest; pass symbols or set parameters.symbols")
+            if backtest_data.engine not in ("vectorized", "event"):
+                raise ValueError(f"Unknown backtest engine '{backtest_data.engine}'")
+            if backtest_data.engine == "event" and (backtest_data.interval not in INTERVALS or backtest_data.interval == "1d"):
+                raise ValueError(f"Event backtests need an intraday interval, got '{backtest_data.interval}'")
+            
+            input_hash = backtest_memo.input_hash(
+                strategy, symbols, backtest_data.start_date, backtest_data.end_date, backtest_data.initial_capital,
+                backtest_data.engine, backtest_data.interval, backtest_data.fill_model
+            )
+            data_version = backtest_memo.data_version(
+                backtest_data.end_date, backtest_data.interval if backtest_data.engine == "event" else "1d"
+            )
+            
+            # Identical run on the same data, finished or still in flight
+            if backtest_data.use_cache:
+                existing = self.db.query(StrategyBacktest).filter(
+                    and_(
+                        StrategyBacktest.strategy_id == strategy.id,
+                        StrategyBacktest.input_hash == input_hash,
+                        StrategyBacktest.data_version == data_version,
+                        StrategyBacktest.status.in_(("queued", "running", "completed"))
+                    )
+                ).order_by(desc(StrategyBacktest.created_at)).first()
+                if existing:
+                    return existing
+            
             # Create backtest
             db_backtest = StrategyBacktest(
-                **backtest_data.dict()
+                **backtest_data.dict(exclude={"symbols", "engine", "interval", "fill_model", "priority", "use_cache"}),
+                symbols=symbols,
+                input_hash=input_hash,
+                data_version=data_version,
+                status="queued",
+                job_id=str(uuid.uuid4())
             )
             
             self.db.add(db_backtest)
             self.db.commit()
             self.db.refresh(db_backtest)
             
+            self._enqueue(
+                db_backtest, user_id, "backtest", backtest_data.copy(update={"symbols": symbols}).json(),
+                backtest_data.priority
+            )
             return db_backtest
             
         except Exception as e:
             self.db.rollback()
             raise e
     
+    def _enqueue(self, backtest: Optional[StrategyBacktest], user_id: int, kind: str, payload: str,
+                 priority: int, strategy_id: Optional[int] = None) -> Dict[str, Any]:
+        """Put a job on the queue; a queued backtest row is removed again if Redis refuses it"""
+        try:
+            return backtest_queue.enqueue(
+                user_id, strategy_id or backtest.strategy_id, kind, payload, priority,
+                backtest_id=backtest.id if backtest else None,
+                job_id=backtest.job_id if backtest else None
+            )
+        except Exception:
+            if backtest is not None:
+                self.db.delete(backtest)
+                self.db.commit()
+            raise
+    
+    async def extend_backtest(
+        self, 
+        strategy_id: int, 
+        backtest_id: int, 
+        user_id: int, 
+        request: StrategyBacktestExtend
+    ) -> StrategyBacktest:
+        """Queue an extension of a finished backtest to a later end date"""
+        backtest = await self.get_backtest_results(backtest_id, user_id)
+        if not backtest or backtest.strategy_id != strategy_id:
+            raise ValueError("Backtest not found or access denied")
+        if backtest.status != "completed":
+            raise ValueError("Only completed backtests can be extended")
+        if backtest.state_blob is None:
+            raise ValueError("This backtest kept no state to extend from; run a new backtest instead")
+        if request.end_date.date() <= backtest.end_date.date():
+            raise ValueError("end_date must be after the backtest's current end date")
+        
+        backtest.status = "queued"
+        backtest.job_id = str(uuid.uuid4())
+        backtest.error = None
+        self.db.commit()
+        self.db.refresh(backtest)
+        
+        try:
+            backtest_queue.enqueue(
+                user_id, strategy_id, "extend", request.json(), request.priority,
+                backtest_id=backtest.id, job_id=backtest.job_id
+            )
+        except Exception:
+            # The stored results are untouched, so the row simply stays as it was
+            backtest.status = "completed"
+            self.db.commit()
+            raise
+        return backtest
+    
+    async def _run_backtest_job(self, backtest: StrategyBacktest, backtest_data: StrategyBacktestCreate,
+                                user_id: int, progress: Callable) -> Dict[str, Any]:
+        """Run a queued backtest and fill its row"""
+        strategy = await self.get_strategy(backtest_data.strategy_id, user_id)
+        if not strategy:
+            raise ValueError("Strategy not found or access denied")
+        
+        progress(0.05, "Running backtest")
+        if backtest_data.engine == "event":
+            result = await self.run_event_backtest(
+                strategy, backtest.symbols, backtest_data.start_date, backtest_data.end_date,
+                backtest_data.initial_capital, backtest_data.interval, backtest_data.fill_model
+            )
+        else:
+            result = await self.run_backtest(
+                strategy, backtest.symbols, backtest_data.start_date,
+                backtest_data.end_date, backtest_data.initial_capital
+            )
+        
+        progress(0.9, "Saving results")
+        self._apply_backtest_result(backtest, result)
+        return {"backtest_id": backtest.id, "total_return": result["total_return"], "total_trades": result["total_trades"]}
+    
+    async def _run_extend_job(self, backtest: StrategyBacktest, request: StrategyBacktestExtend,
+                              user_id: int, progress: Callable) -> Dict[str, Any]:
+        """Simulate only the bars after a backtest's end and append them to its row
+
+        The stored state resumes the run at its last bar, which is replayed (it
+        may have been a forming bar, and open positions were closed on it). The
+        stored price tail warms up indicators, so signals match a full re-run.
+        """
+        strategy = await self.get_strategy(backtest.strategy_id, user_id)
+        if not strategy:
+            raise ValueError("Strategy not found or access denied")
+        state, tail = decode_state(backtest.state_blob)
+        if state["strategy_hash"] != backtest_memo.strategy_hash(strategy):
+            raise ValueError("The strategy changed since this backtest ran; run a new backtest instead")
+        
+        progress(0.05, "Loading new bars")
+        # A day of slack: daily bars may be stamped on the previous UTC day
+        since = datetime.utcfromtimestamp(state["timestamp"] / 1e9) - timedelta(days=1)
+        panel = await self._load_price_panel(state["symbols"], since, request.end_date)
+        rows = panel.timestamps >= state["timestamp"]
+        if not rows.any() or panel.timestamps[rows][0] != state["timestamp"]:
+            raise ValueError("Stored backtest no longer lines up with market data; run a new backtest instead")
+        
+        # Stored column order; symbols without new bars stay NaN
+        timestamps = panel.timestamps[rows]
+        prices = {}
+        for field, values in tail.items():
+            fresh = np.full((len(timestamps), len(state["symbols"])), np.nan)
+            for column, symbol in enumerate(state["symbols"]):
+                if symbol in panel.symbols:
+                    fresh[:, column] = panel[field][rows, panel.symbols.index(symbol)]
+            prices[field] = forward_fill(np.concatenate([values, fresh]))
+        
+        progress(0.3, "Simulating new bars")
+        warmup = len(tail["close"])
+        entries, exits = generate_signals(strategy.category, prices, strategy.parameters, strategy.conditions)
+        result = backtest_engine.simulate(
+            timestamps, prices["close"][warmup:], entries[warmup:], exits[warmup:], backtest.initial_capital,
+            strategy.risk_management, prices["high"][warmup:], prices["low"][warmup:], state["symbols"],
+            resume=state, open=prices["open"][warmup:]
+        )
+        
+        progress(0.8, "Saving results")
+        previous_timestamps, previous_equity = decode_equity(backtest.equity_blob)
+        history = decode_trades(backtest.trade_blob)
+        if len(previous_equity) != state["offset"] + 1:
+            raise ValueError("Stored equity curve does not match the backtest state; run a new backtest instead")
+        
+        lookback = signal_lookback_bars(strategy.parameters, strategy.conditions)
+        length = len(prices["close"])
+        result["state"]["strategy_hash"] = state["strategy_hash"]
+        self._apply_backtest_result(backtest, dict(
+            result,
+            timestamps=np.concatenate([previous_timestamps[:-1], timestamps]),
+            equity=np.concatenate([previous_equity[:-1], result["equity"]]),
+            trades=sorted(
+                [trade for trade in history["trades"] if trade["exit_index"] < state["offset"]] + result["trades"],
+                key=lambda trade: trade["entry_index"]
+            ),
+            monthly_returns=dict(backtest.monthly_returns or {}, **result["monthly_returns"]),
+            tail={field: values[max(length - 1 - lookback, 0):length - 1] for field, values in prices.items()}
+        ))
+        backtest.end_date = request.end_date
+        backtest.input_hash = backtest_memo.input_hash(
+            strategy, backtest.symbols, backtest.start_date, request.end_date, backtest.initial_capital
+        )
+        backtest.data_version = backtest_memo.data_version(request.end_date)
+        return {
+            "backtest_id": backtest.id,
+            "bars_added": len(timestamps) - 1,
+            "total_return": result["total_return"],
+            "total_trades": result["total_trades"]
+        }
+    
+    async def run_job(self, job: Dict[str, Any], progress: Callable) -> Optional[Dict[str, Any]]:
+        """Worker entry point: run one queued job and persist its outcome"""
+        backtest = None
+        if job.get("backtest_id"):
+            backtest = self.db.query(StrategyBacktest).filter(StrategyBacktest.id == job["backtest_id"]).first()
+            if backtest is None:
+                raise ValueError("Backtest was deleted before it ran")
+            backtest.status = "running"
+            self.db.commit()
+        
+        try:
+            if job["kind"] == "backtest":
+                result = await self._run_backtest_job(
+                    backtest, StrategyBacktestCreate.parse_raw(job["payload"]), job["user_id"], progress
+                )
+            elif job["kind"] == "extend":
+                result = await self._run_extend_job(
+                    backtest, StrategyBacktestExtend.parse_raw(job["payload"]), job["user_id"], progress
+                )
+            elif job["kind"] == "optimize":
+                result = await self.optimize_strategy(
+                    job["strategy_id"], job["user_id"], StrategyOptimizeRequest.parse_raw(job["payload"]), progress
+                )
+            elif job["kind"] == "robustness":
+                result = await self.analyze_robustness(
+                    json.loads(job["payload"])["backtest_id"], job["user_id"],
+                    StrategyRobustnessRequest.parse_raw(job["payload"]), progress
+                )
+            elif job["kind"] == "walk_forward":
+                result = await self.walk_forward_backtest(
+                    job["strategy_id"], job["user_id"], StrategyWalkForwardRequest.parse_raw(job["payload"]),
+                    progress, backtest
+                )
+            else:
+                raise ValueError(f"Unknown job kind '{job['kind']}'")
+            
+            if backtest is not None:
+                backtest.status = "completed"
+                backtest.error = None
+                backtest.completed_at = datetime.utcnow()
+                self.db.commit()
+            return result
+            
+        except BaseException as e:
+            self.db.rollback()
+            if backtest is not None:
+                if job["kind"] == "extend":
+                    # Nothing was written, so the earlier results still stand
+                    backtest.status = "completed"
+                else:
+                    backtest.status = "cancelled" if isinstance(e, (JobCancelled, asyncio.CancelledError)) else "failed"
+                backtest.error = str(e) or None
+                backtest.completed_at = datetime.utcnow()
+                self.db.commit()
+            raise
+    
+    async def _load_price_panel(
+        self, 
+        symbols: List[str], 
+        start_date: datetime, 
+        end_date: datetime,
+        interval: str = "1d",
+        fill: bool = True
+    ) -> DataPanel:
+        """OHLCV for all symbols as one memory-mapped (T, N) panel shared across backtests"""
+        panel = await panel_store.get_or_build(
+            symbols, start_date, end_date,
+            lambda symbol: self.market_service.get_history_columns(symbol, start_date, end_date, interval),
+            interval=interval,
+            fill=fill
+        )
+        if not panel.symbols:
+            raise ValueError(f"No price history available for {', '.join(symbols)}")
+        return panel
+    
+    async def run_backtest(
+        self, 
+        strategy: Strategy, 
+        symbols: List[str], 
+        start_date: datetime, 
+        end_date: datetime, 
+        initial_capital: float
+    ) -> Dict[str, Any]:
+        """Backtest a strategy over daily history with the vectorized engine"""
+        panel = await self._load_price_panel(symbols, start_date, end_date)
+        # Signals depend only on the panel and the strategy, not on capital or risk settings
+        entries, exits = backtest_memo.signals(panel, strategy.category, strategy.parameters, strategy.conditions)
+        
+        result = backtest_engine.simulate(
+            panel.timestamps,
+            panel["close"],
+            entries,
+            exits,
+            initial_capital,
+            risk_management=strategy.risk_management,
+            high=panel["high"],
+            low=panel["low"],
+            symbols=panel.symbols,
+            open=panel["open"]
+        )
+        
+        # Price tail before the last bar, so an extension can warm up indicators
+        lookback = signal_lookback_bars(strategy.parameters, strategy.conditions)
+        length = len(panel)
+        result["state"]["strategy_hash"] = backtest_memo.strategy_hash(strategy)
+        result["tail"] = {
+            field: np.array(panel[field][max(length - 1 - lookback, 0):length - 1])
+            for field in ("open", "high", "low", "close", "volume")
+        }
+        return result
+    
+    async def run_event_backtest(
+        self, 
+        strategy: Strategy, 
+        symbols: List[str], 
+        start_date: datetime, 
+        end_date: datetime, 
+        initial_capital: float, 
+        interval: str = "1m", 
+        fill_model: Optional[Dict[str, float]] = None
+    ) -> Dict[str, Any]:
+        """Backtest a strategy over intraday bars with the event-driven engine"""
+        if interval not in INTERVALS or interval == "1d":
+            raise ValueError(f"Event backtests need an intraday interval, got '{interval}'")
+        
+        # Unfilled: every stream bar must be a real print with real volume
+        panel = await self._load_price_panel(symbols, start_date, end_date, interval, fill=False)
+        engine = EventBacktester(FillModel(**(fill_model or {})))
+        
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, partial(
+            engine.run,
+            panel.timestamps,
+            panel["close"],
+            initial_capital,
+            category=strategy.category,
+            parameters=strategy.parameters,
+            conditions=strategy.conditions,
+            risk_management=strategy.risk_management,
+            high=panel["high"],
+            low=panel["low"],
+            symbols=panel.symbols,
+            open=panel["open"],
+            volume=panel["volume"],
+            interval_ns=int(INTERVALS[interval].total_seconds()) * 10**9
+        ))
+    
+    async def _resolve_search(
+        self, 
+        strategy_id: int, 
+        user_id: int, 
+        request: StrategyOptimizeRequest
+    ) -> Tuple[Strategy, Dict[str, List[Any]], List[str]]:
+        """Strategy, parameter search space and symbols for an optimization request"""
+        if request.metric not in OPTIMIZER_METRICS:
+            raise ValueError(f"Unknown metric '{request.metric}'")
+        
+        strategy = await self.get_strategy(strategy_id, user_id)
+        if not strategy:
+            raise ValueError("Strategy not found or access denied")
+        
+        space = request.search_space
+        if not space:
+            templates = {template["category"]: template for template in await self.get_strategy_templates()}
+            template = templates.get(strategy.category)
+            if not template:
+                raise ValueError("Custom strategies need an explicit search_space")
+            space = parameter_grid(template["parameters_template"], request.grid_steps)
+        
+        symbols = request.symbols or (strategy.parameters or {}).get("symbols") or []
+        if not symbols:
+            raise ValueError("No symbols to optimize on; pass symbols or set parameters.symbols")
+        
+        return strategy, space, symbols
+    
+    async def enqueue_optimization(
+        self, 
+        strategy_id: int, 
+        user_id: int, 
+        request: StrategyOptimizeRequest
+    ) -> Dict[str, Any]:
+        """Queue a parameter search; the ranked results are stored on the job"""
+        await self._resolve_search(strategy_id, user_id, request)
+        return self._enqueue(None, user_id, "optimize", request.json(), request.priority, strategy_id)
+    
+    async def optimize_strategy(
+        self, 
+        strategy_id: int, 
+        user_id: int, 
+        request: StrategyOptimizeRequest,
+        progress: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """Rank parameter combinations for a strategy over a date range"""
+        progress = progress or (lambda fraction, message=None: None)
+        strategy, space, symbols = await self._resolve_search(strategy_id, user_id, request)
+        panel = await self._load_price_panel(symbols, request.start_date, request.end_date)
+        progress(0.05, "Evaluating parameter combinations")
+        
+        # The sweep blocks on worker processes; keep it off the event loop
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(None, partial(
+            strategy_optimizer.optimize,
+            panel.timestamps, panel["close"], panel["high"], panel["low"], request.initial_capital,
+            strategy.category, space, method=request.method, samples=request.samples,
+            metric=request.metric, top_n=request.top_n, base_parameters=strategy.parameters,
+            conditions=strategy.conditions, risk_management=strategy.risk_management, seed=request.seed,
+            symbols=panel.symbols, open=panel["open"], volume=panel["volume"],
+            progress=lambda fraction: progress(0.05 + 0.95 * fraction)
+        ))
+        
+        return dict(result, strategy_id=strategy_id, search_space=space)
+    
+    async def enqueue_walk_forward(
+        self, 
+        strategy_id: int, 
+        user_id: int, 
+        request: StrategyWalkForwardRequest
+    ) -> Dict[str, Any]:
+        """Queue a walk-forward run against a new backtest row"""
+        try:
+            _, _, symbols = await self._resolve_search(strategy_id, user_id, request)
+            db_backtest = StrategyBacktest(
+                strategy_id=strategy_id,
+                start_date=request.start_date,
+                end_date=request.end_date,
+                initial_capital=request.initial_capital,
+                symbols=symbols,
+                status="queued",
+                job_id=str(uuid.uuid4())
+            )
+            self.db.add(db_backtest)
+            self.db.commit()
+            self.db.refresh(db_backtest)
+            
+            return self._enqueue(db_backtest, user_id, "walk_forward", request.json(), request.priority)
+            
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    async def walk_forward_backtest(
+        self, 
+        strategy_id: int, 
+        user_id: int, 
+        request: StrategyWalkForwardRequest,
+        progress: Optional[Callable] = None,
+        db_backtest: Optional[StrategyBacktest] = None
+    ) -> Dict[str, Any]:
+        """Walk-forward optimization; the stitched out-of-sample run is stored as a backtest"""
+        progress = progress or (lambda fraction, message=None: None)
+        try:
+            strategy, space, symbols = await self._resolve_search(strategy_id, user_id, request)
+            panel = await self._load_price_panel(symbols, request.start_date, request.end_date)
+            progress(0.05, "Optimizing in-sample windows")
+            
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(None, partial(
+                strategy_optimizer.walk_forward,
+                panel.timestamps, panel["close"], panel["high"], panel["low"], request.initial_capital,
+                strategy.category, space, request.in_sample_bars, request.out_of_sample_bars,
+                anchored=request.anchored, method=request.method, samples=request.samples,
+                metric=request.metric, base_parameters=strategy.parameters,
+                conditions=strategy.conditions, risk_management=strategy.risk_management, seed=request.seed,
+                symbols=panel.symbols, open=panel["open"], volume=panel["volume"],
+                progress=lambda fraction: progress(0.05 + 0.9 * fraction)
+            ))
+            
+            progress(0.95, "Saving results")
+            if db_backtest is None:
+                db_backtest = StrategyBacktest(
+                    strategy_id=strategy_id,
+                    start_date=request.start_date,
+                    end_date=request.end_date,
+                    initial_capital=request.initial_capital
+                )
+                self.db.add(db_backtest)
+            db_backtest.symbols = panel.symbols
+            self._apply_backtest_result(db_backtest, dict(result, per_symbol={}), walk_forward={
+                "in_sample_bars": request.in_sample_bars,
+                "out_of_sample_bars": request.out_of_sample_bars,
+                "anchored": request.anchored,
+                "windows": result["windows"]
+            })
+            
+            self.db.commit()
+            self.db.refresh(db_backtest)
+            
+            summary_keys = [
+                "method", "metric", "evaluated", "elapsed_seconds", "total_return", "annualized_return",
+                "sharpe_ratio", "max_drawdown", "win_rate", "total_trades", "walk_forward_efficiency", "windows"
+            ]
+            return dict(
+                {key: result[key] for key in summary_keys},
+                strategy_id=strategy_id,
+                backtest_id=db_backtest.id
+            )
+            
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    async def enqueue_robustness(
+        self, 
+        strategy_id: int, 
+        backtest_id: int, 
+        user_id: int, 
+        request: StrategyRobustnessRequest
+    ) -> Dict[str, Any]:
+        """Queue a Monte Carlo / bootstrap analysis of a finished backtest"""
+        backtest = await self.get_backtest_results(backtest_id, user_id)
+        if not backtest or backtest.strategy_id != strategy_id:
+            raise ValueError("Backtest not found or access denied")
+        if backtest.status != "completed":
+            raise ValueError("Robustness analysis needs a completed backtest")
+        if request.method not in ROBUSTNESS_METHODS:
+            raise ValueError(f"Unknown robustness method '{request.method}'")
+        
+        # The job's own backtest_id would hand the row's status to the job, so it travels in the payload
+        payload = json.dumps(dict(json.loads(request.json()), backtest_id=backtest_id))
+        return self._enqueue(None, user_id, "robustness", payload, request.priority, strategy_id)
+    
+    async def analyze_robustness(
+        self, 
+        backtest_id: int, 
+        user_id: int, 
+        request: StrategyRobustnessRequest,
+        progress: Optional[Callable] = None
+    ) -> Dict[str, Any]:
+        """Resample a backtest's trade or bar returns and store the distributions on its row"""
+        progress = progress or (lambda fraction, message=None: None)
+        backtest = await self.get_backtest_results(backtest_id, user_id)
+        if not backtest:
+            raise ValueError("Backtest not found or access denied")
+        
+        results = self.decode_backtest_results(backtest)
+        equity = np.asarray((results["equity_curve"] or {}).get("equity") or [], dtype=float)
+        if request.method == "trades":
+            trades = (results["trade_history"] or {}).get("trades") or []
+            returns = trade_returns(trades, equity, backtest.initial_capital)
+        else:
+            returns = bar_returns(equity, backtest.initial_capital)
+        
+        progress(0.05, "Simulating paths")
+        loop = asyncio.get_event_loop()
+        analysis = await loop.run_in_executor(None, partial(
+            robustness_analyzer.analyze,
+            returns, request.method, request.simulations, request.block_size, request.ruin_percent, request.seed,
+            observed={"total_return": backtest.total_return, "max_drawdown": backtest.max_drawdown},
+            progress=lambda fraction: progress(0.05 + 0.9 * fraction)
+        ))
+        
+        backtest.robustness = dict(backtest.robustness or {}, **{request.method: analysis})
+        self.db.commit()
+        return dict(analysis, backtest_id=backtest_id)
+    
+    def _apply_backtest_result(self, backtest: StrategyBacktest, result: Dict[str, Any], **extra):
+        """Copy engine output onto the backtest row; `extra` is stored next to the trades"""
+        backtest.total_return = result["total_return"]
+        backtest.annualized_return = result["annualized_return"]
+        backtest.sharpe_ratio = result["sharpe_ratio"]
+        backtest.max_drawdown = result["max_drawdown"]
+        backtest.win_rate = result["win_rate"]
+        backtest.total_trades = result["total_trades"]
+        backtest.equity_preview = equity_preview(result["timestamps"], result["equity"])
+        backtest.equity_blob = encode_equity(result["timestamps"], result["equity"])
+        backtest.trade_blob = encode_trades(result["trades"], dict(extra, per_symbol=result["per_symbol"]))
+        backtest.state_blob = encode_state(result["state"], result["tail"]) if "tail" in result else None
+        backtest.monthly_returns = result["monthly_returns"]
+    
+    def decode_backtest_results(self, backtest: StrategyBacktest) -> Dict[str, Any]:
+        """Full-resolution equity curve and trade history, decoded from the blob columns"""
+        if backtest.equity_blob is None:
+            return {"equity_curve": backtest.equity_curve, "trade_history": backtest.trade_history}
+        
+        timestamps, equity = decode_equity(backtest.equity_blob)
+        return {
+            "equity_curve": {
+                "timestamps": time_labels(timestamps),
+                "equity": equity.round(2).tolist()
+            },
+            "trade_history": decode_trades(backtest.trade_blob) if backtest.trade_blob else None
+        }
+    
     async def get_backtest_results(self, backtest_id: int, user_id: int) -> Optional[StrategyBacktest]:
         """Get backtest results"""
         backtest = self.db.query(StrategyBacktest).join(Strategy).filter(
@@ -205,8 +824,8 @@ class StrategyService:
             # Generate execution ID
             execution_id = str(uuid.uuid4())
             
-            # Execute strategy logic (placeholder - implement actual strategy execution)
-            trades_generated = await self._execute_strategy_logic(strategy, execution_data)
+            # Signals, sizing and estimates from one market snapshot
+            execution = await self._execute_strategy_logic(strategy, execution_data)
             
             # Update strategy execution timestamp
             strategy.last_executed = datetime.utcnow()
@@ -216,9 +835,9 @@ class StrategyService:
                 strategy_id=execution_data.strategy_id,
                 execution_id=execution_id,
                 status="completed",
-                trades_generated=trades_generated,
-                estimated_pnl=0.0,  # Calculate based on strategy logic
-                risk_metrics={},  # Calculate risk metrics
+                trades_generated=execution["trades"],
+                estimated_pnl=execution["estimated_pnl"],
+                risk_metrics=execution["risk_metrics"],
                 execution_time=datetime.utcnow()
             )
             
@@ -229,163 +848,407 @@ class StrategyService:
         self, 
         strategy: Strategy, 
         execution_data: StrategyExecuteRequest
-    ) -> List[Dict[str, Any]]:
-        """Execute the actual strategy logic (placeholder implementation)"""
-        # This is a placeholder - implement actual strategy execution logic
-        # based on strategy.conditions, strategy.parameters, etc.
-        
-        trades = []
-        
-        # Example: Simple moving average crossover strategy
-        if strategy.category == "moving_average_crossover":
-            trades = await self._execute_ma_crossover(strategy, execution_data)
-        elif strategy.category == "mean_reversion":
-            trades = await self._execute_mean_reversion(strategy, execution_data)
-        elif strategy.category == "momentum":
-            trades = await self._execute_momentum(strategy, execution_data)
-        else:
-            # Custom strategy - implement based on strategy.conditions
-            trades = await self._execute_custom_strategy(strategy, execution_data)
+    ) -> Dict[str, Any]:
+        """Evaluate signals for all symbols on one market snapshot and size orders from it
         
-        return trades
-    
-    async def _execute_ma_crossover(
-        self, 
-        strategy: Strategy, 
-        execution_data: StrategyExecuteRequest
-    ) -> List[Dict[str, Any]]:
-        """Execute moving average crossover strategy"""
-        # Placeholder implementation
-        trades = []
-        
-        for symbol in execution_data.symbols:
-            # Get market data for symbol
-            # Calculate moving averages
-            # Generate buy/sell signals based on crossover
-            
-            trade = {
-                "symbol": symbol,
-                "action": "BUY",  # or "SELL"
-                "quantity": 100,
-                "price": 0.0,  # Current market price
-                "timestamp": datetime.utcnow().isoformat(),
-                "reason": "MA Crossover Signal"
+        History and a bulk quote snapshot are fetched concurrently. The quotes
+        become the newest bar of the (T, N) price panel, so every symbol's
+        signal, order price and estimate come from the same instant in one
+        vectorized pass. Symbols without a quote are not traded.
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=self._signal_lookback_days(strategy))
+        panel, quotes = await asyncio.gather(
+            self._load_price_panel(execution_data.symbols, start_date, end_date),
+            self.market_service.get_quote_snapshot(execution_data.symbols)
+        )
+        quotes = {symbol: quote for symbol, quote in quotes.items() if quote.get("price")}
+        if not quotes:
+            raise ValueError(f"No live quotes available for {', '.join(execution_data.symbols)}")
+        
+        # A daily bar from the snapshot's session is still forming; replace it rather than follow it
+        last_bar = datetime.fromtimestamp(int(panel.timestamps[-1]) / 1e9, timezone.utc).astimezone(nse_calendar.tz).date()
+        # Quotes cached by the quote endpoints carry no bar_date; they price the current session
+        now = datetime.now(timezone.utc)
+        current = (nse_calendar.session_date(now) or now.astimezone(nse_calendar.tz).date()).isoformat()
+        session = max(quote.get("bar_date") or current for quote in quotes.values())
+        prices = with_quotes(
+            panel, {symbol: quote["price"] for symbol, quote in quotes.items()},
+            replace_last=last_bar.isoformat() >= session,
+            volumes={symbol: quote.get("volume") for symbol, quote in quotes.items()}
+        )
+        
+        entries, exits = generate_signals(
+            strategy.category, prices, strategy.parameters, strategy.conditions
+        )
+        options = backtest_engine.risk_options(strategy.risk_management)
+        weights = backtest_engine.allocation(panel.symbols, strategy.risk_management)
+        budget = execution_data.capital * weights * options["position_size"]
+        
+        price = prices["close"][-1]
+        quoted = np.array([symbol in quotes for symbol in panel.symbols])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            quantity = np.where(quoted, np.floor(budget / price), 0)
+        sells = exits[-1] & (quantity > 0)
+        buys = entries[-1] & ~exits[-1] & (quantity > 0)
+        notional = quantity * price
+        
+        # Expectancy of a new position from its stops and the strategy's realized win rate
+        win_rate = (strategy.win_rate or 0) / 100 if strategy.total_trades else 0.5
+        expectancy = win_rate * options["take_profit"] - (1 - win_rate) * options["stop_loss"]
+        leg_cost = notional * (options["commission"] + options["slippage"])
+        estimated = np.where(buys, notional * expectancy - 2 * leg_cost, -leg_cost)
+        
+        reason = SIGNAL_REASONS.get(strategy.category, "Custom Strategy Signal")
+        trades = [
+            {
+                "symbol": panel.symbols[column],
+                "action": "SELL" if sells[column] else "BUY",
+                "quantity": int(quantity[column]),
+                "price": float(price[column]),
+                "notional": round(float(notional[column]), 2),
+                "estimated_pnl": round(float(estimated[column]), 2),
+                "timestamp": quotes[panel.symbols[column]].get("timestamp"),
+                "reason": reason
             }
-            trades.append(trade)
+            for column in np.flatnonzero(buys | sells)
+        ]
         
-        return trades
-    
-    async def _execute_mean_reversion(
-        self, 
-        strategy: Strategy, 
-        execution_data: StrategyExecuteRequest
-    ) -> List[Dict[str, Any]]:
-        """Execute mean reversion strategy"""
-        # Placeholder implementation
-        trades = []
-        
-        for symbol in execution_data.symbols:
-            # Get market data for symbol
-            # Calculate mean reversion indicators
-            # Generate signals based on deviation from mean
-            
-            trade = {
-                "symbol": symbol,
-                "action": "BUY",  # or "SELL"
-                "quantity": 100,
-                "price": 0.0,
-                "timestamp": datetime.utcnow().isoformat(),
-                "reason": "Mean Reversion Signal"
+        exposure = float(notional[buys].sum())
+        risk_metrics = {
+            "gross_exposure": round(exposure, 2),
+            "exposure_percent": round(exposure / execution_data.capital * 100, 4),
+            "largest_position_percent": round(float(notional[buys].max(initial=0)) / execution_data.capital * 100, 4),
+            "max_loss_at_stop": round(float((notional[buys] * options["stop_loss"]).sum()), 2) if options["stop_loss"] else None,
+            "max_gain_at_target": round(float((notional[buys] * options["take_profit"]).sum()), 2) if options["take_profit"] else None,
+            "estimated_costs": round(float(leg_cost[buys | sells].sum()), 2),
+            "win_rate_assumed": round(win_rate * 100, 2),
+            "snapshot": {
+                "session": session,
+                "quoted": len(quotes),
+                "missing": [symbol for symbol in execution_data.symbols if symbol not in quotes]
             }
-            trades.append(trade)
+        }
         
-        return trades
+        # VaR, beta and friends of the positions being opened, on the same price panel
+        try:
+            risk_metrics.update(await risk_engine.analyze(
+                {panel.symbols[column]: float(notional[column]) for column in np.flatnonzero(buys)}, panel=panel
+            ))
+        except Exception as e:
+            print(f"Error computing risk metrics for strategy {strategy.id}: {e}")
+        
+        return {
+            "trades": trades,
+            "estimated_pnl": round(float(estimated[buys | sells].sum()), 2),
+            "risk_metrics": risk_metrics
+        }
     
-    async def _execute_momentum(
-        self, 
-        strategy: Strategy, 
-        execution_data: StrategyExecuteRequest
-    ) -> List[Dict[str, Any]]:
-        """Execute momentum strategy"""
-        # Placeholder implementation
-        trades = []
-        
-        for symbol in execution_data.symbols:
-            # Get market data for symbol
-            # Calculate momentum indicators
-            # Generate signals based on momentum strength
-            
-            trade = {
-                "symbol": symbol,
-                "action": "BUY",  # or "SELL"
-                "quantity": 100,
-                "price": 0.0,
-                "timestamp": datetime.utcnow().isoformat(),
-                "reason": "Momentum Signal"
+    def _signal_lookback_days(self, strategy: Strategy) -> int:
+        """Calendar days of daily history covering the longest indicator period, with warm-up"""
+        return int(signal_lookback_bars(strategy.parameters, strategy.conditions) * 365 / 252) + 10
+    
+    async def record_strategy_trade(self, strategy_id: int, user_id: int,
+                                    trade_data: StrategyTradeCreate) -> StrategyTrade:
+        """Link a trade to a strategy; a closing trade also updates the running aggregates in the same transaction"""
+        try:
+            strategy = await self.get_strategy(strategy_id, user_id)
+            if not strategy:
+                raise ValueError("Strategy not found")
+            
+            trade = self.db.query(Trade).filter(
+                and_(Trade.id == trade_data.trade_id, Trade.user_id == user_id)
+            ).first()
+            if not trade:
+                raise ValueError("Trade not found")
+            
+            strategy_trade = StrategyTrade(
+                strategy_id=strategy_id,
+                trade_id=trade.id,
+                execution_reason=trade_data.execution_reason,
+                strategy_parameters=trade_data.strategy_parameters or strategy.parameters,
+                performance_metrics=trade_data.performance_metrics
+            )
+            self.db.add(strategy_trade)
+            
+            pnl = trade_data.pnl
+            if pnl is None:
+                pnl = (trade_data.performance_metrics or {}).get("pnl")
+            if pnl is not None:
+                closed_at = trade_data.closed_at or trade.timestamp or datetime.now(timezone.utc)
+                if closed_at.tzinfo is None:
+                    closed_at = closed_at.replace(tzinfo=timezone.utc)  # trades store naive UTC
+                self._accumulate_performance(strategy, float(pnl), trade_data.holding_seconds or 0.0, closed_at)
+            
+            self.db.commit()
+            self.db.refresh(strategy_trade)
+            
+            return strategy_trade
+            
+        except Exception as e:
+            self.db.rollback()
+            raise e
+    
+    def _accumulate_performance(self, strategy: Strategy, pnl: float, holding_seconds: float, closed_at: datetime):
+        """Fold one realized P&L into the daily row, the aggregate row and the strategy's counters
+        
+        Every write is an upsert or an UPDATE whose new values are expressions
+        over the stored ones, so concurrent recorders serialize on the row
+        locks instead of overwriting each other.
+        """
+        daily = pg_insert(StrategyDailyPerformance).values(
+            strategy_id=strategy.id,
+            day=closed_at.astimezone(nse_calendar.tz).date(),
+            pnl=pnl,
+            trades=1,
+            wins=int(pnl > 0)
+        )
+        daily = daily.on_conflict_do_update(
+            index_elements=[StrategyDailyPerformance.strategy_id, StrategyDailyPerformance.day],
+            set_={
+                "pnl": StrategyDailyPerformance.pnl + daily.excluded.pnl,
+                "trades": StrategyDailyPerformance.trades + 1,
+                "wins": StrategyDailyPerformance.wins + daily.excluded.wins
             }
-            trades.append(trade)
+        ).returning(StrategyDailyPerformance.pnl, StrategyDailyPerformance.trades)
+        day_pnl, day_trades = self.db.execute(daily).one()
+        previous = day_pnl - pnl  # the day's P&L before this trade
         
-        return trades
-    
-    async def _execute_custom_strategy(
-        self, 
-        strategy: Strategy, 
-        execution_data: StrategyExecuteRequest
-    ) -> List[Dict[str, Any]]:
-        """Execute custom strategy based on user-defined conditions"""
-        # Placeholder implementation
-        trades = []
-        
-        # Parse strategy.conditions and strategy.parameters
-        # Execute custom logic
-        
-        for symbol in execution_data.symbols:
-            trade = {
-                "symbol": symbol,
-                "action": "BUY",  # or "SELL"
-                "quantity": 100,
-                "price": 0.0,
-                "timestamp": datetime.utcnow().isoformat(),
-                "reason": "Custom Strategy Signal"
+        def daily_sums(capital):
+            # Changes to the daily-return sums when the day's return moves from previous to day_pnl
+            return {
+                "sum_daily_return": pnl / capital,
+                "sum_daily_return_sq": (day_pnl ** 2 - previous ** 2) / (capital * capital),
+                "sum_downside_sq": (min(day_pnl, 0.0) ** 2 - min(previous, 0.0) ** 2) / (capital * capital)
+            }
+        
+        capital = float((strategy.parameters or {}).get("capital", settings.SCHEDULER_DEFAULT_CAPITAL))
+        peak = max(pnl, 0.0)
+        aggregate = pg_insert(StrategyPerformance).values(
+            strategy_id=strategy.id,
+            capital=capital,
+            closed_trades=1,
+            wins=int(pnl > 0),
+            losses=int(pnl < 0),
+            gross_profit=max(pnl, 0.0),
+            gross_loss=max(-pnl, 0.0),
+            largest_win=max(pnl, 0.0),
+            largest_loss=min(pnl, 0.0),
+            total_holding_seconds=holding_seconds,
+            cum_pnl=pnl,
+            peak_pnl=peak,
+            max_drawdown=(peak - pnl) / (capital + peak) * 100,
+            trading_days=1,
+            first_trade_at=closed_at,
+            last_trade_at=closed_at,
+            **daily_sums(capital)
+        )
+        
+        current = StrategyPerformance
+        cum_pnl = current.cum_pnl + pnl
+        peak_pnl = func.greatest(current.peak_pnl, cum_pnl)
+        sums = daily_sums(current.capital)
+        aggregate = aggregate.on_conflict_do_update(
+            index_elements=[StrategyPerformance.strategy_id],
+            set_={
+                "closed_trades": current.closed_trades + 1,
+                "wins": current.wins + int(pnl > 0),
+                "losses": current.losses + int(pnl < 0),
+                "gross_profit": current.gross_profit + max(pnl, 0.0),
+                "gross_loss": current.gross_loss + max(-pnl, 0.0),
+                "largest_win": func.greatest(current.largest_win, pnl),
+                "largest_loss": func.least(current.largest_loss, pnl),
+                "total_holding_seconds": current.total_holding_seconds + holding_seconds,
+                "cum_pnl": cum_pnl,
+                "peak_pnl": peak_pnl,
+                "max_drawdown": func.greatest(
+                    current.max_drawdown, (peak_pnl - cum_pnl) / (current.capital + peak_pnl) * 100
+                ),
+                "trading_days": current.trading_days + int(day_trades == 1),
+                "sum_daily_return": current.sum_daily_return + sums["sum_daily_return"],
+                "sum_daily_return_sq": current.sum_daily_return_sq + sums["sum_daily_return_sq"],
+                "sum_downside_sq": current.sum_downside_sq + sums["sum_downside_sq"],
+                "first_trade_at": func.least(current.first_trade_at, closed_at),
+                "last_trade_at": func.greatest(current.last_trade_at, closed_at),
+                "updated_at": func.now()
             }
-            trades.append(trade)
+        )
+        self.db.execute(aggregate)
         
-        return trades
+        wins = int(pnl > 0)
+        self.db.query(Strategy).filter(Strategy.id == strategy.id).update({
+            Strategy.total_trades: Strategy.total_trades + 1,
+            Strategy.successful_trades: Strategy.successful_trades + wins,
+            Strategy.total_pnl: Strategy.total_pnl + pnl,
+            Strategy.win_rate: (Strategy.successful_trades + wins) * 100.0 / (Strategy.total_trades + 1)
+        }, synchronize_session=False)
+    
+    async def _backfill_benchmark_returns(self, strategy_id: int):
+        """Fill in the benchmark return of closed days that lack one, so each day is fetched only once"""
+        try:
+            today = datetime.now(nse_calendar.tz).date()
+            days = [
+                row.day for row in self.db.query(StrategyDailyPerformance.day).filter(
+                    and_(
+                        StrategyDailyPerformance.strategy_id == strategy_id,
+                        StrategyDailyPerformance.benchmark_return.is_(None),
+                        StrategyDailyPerformance.day < today
+                    )
+                ).all()
+            ]
+            if not days:
+                return
+            
+            history = await self.market_service.get_history_columns(
+                settings.PERFORMANCE_BENCHMARK_SYMBOL,
+                datetime.combine(min(days) - timedelta(days=10), time()),
+                datetime.combine(max(days) + timedelta(days=1), time())
+            )
+            if not history:
+                return
+            
+            sessions = [
+                datetime.fromtimestamp(int(ts) / 1e9, timezone.utc).astimezone(nse_calendar.tz).date()
+                for ts in history["timestamp"]
+            ]
+            closes = history["close"]
+            returns = dict(zip(sessions[1:], (closes[1:] / closes[:-1] - 1).tolist()))
+            
+            # Days inside the fetched range without a benchmark session had no benchmark move
+            self.db.bulk_update_mappings(StrategyDailyPerformance, [
+                {"strategy_id": strategy_id, "day": day, "benchmark_return": returns.get(day, 0.0)}
+                for day in days if day <= sessions[-1]
+            ])
+            self.db.commit()
+            
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error backfilling benchmark returns for strategy {strategy_id}: {e}")
     
     async def get_strategy_performance(self, strategy_id: int, user_id: int) -> Dict[str, Any]:
-        """Get comprehensive strategy performance metrics"""
+        """Get comprehensive strategy performance metrics
+        
+        Everything comes from the aggregate row and small indexed queries over
+        the daily rows, so the cost does not grow with the number of trades.
+        """
         strategy = await self.get_strategy(strategy_id, user_id)
         if not strategy:
             return {}
         
-        # Get recent trades
-        recent_trades = self.db.query(StrategyTrade).filter(
-            StrategyTrade.strategy_id == strategy_id
-        ).order_by(desc(StrategyTrade.created_at)).limit(100).all()
-        
-        # Calculate performance metrics
-        total_trades = len(recent_trades)
-        successful_trades = sum(1 for trade in recent_trades if trade.performance_metrics and 
-                              trade.performance_metrics.get('pnl', 0) > 0)
-        
-        win_rate = (successful_trades / total_trades * 100) if total_trades > 0 else 0
-        
-        # Get backtest results
-        backtests = self.db.query(StrategyBacktest).filter(
-            StrategyBacktest.strategy_id == strategy_id
-        ).order_by(desc(StrategyBacktest.created_at)).limit(5).all()
+        performance = self.db.query(StrategyPerformance).filter(
+            StrategyPerformance.strategy_id == strategy_id
+        ).first()
         
-        return {
+        summary = {
             "strategy_id": strategy_id,
             "strategy_name": strategy.name,
-            "total_trades": total_trades,
-            "successful_trades": successful_trades,
-            "win_rate": win_rate,
-            "total_pnl": strategy.total_pnl,
-            "recent_backtests": backtests,
-            "last_executed": strategy.last_executed,
-            "is_active": strategy.is_active
+            "total_pnl": strategy.total_pnl or 0.0,
+            "total_return": 0.0,
+            "annualized_return": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown": 0.0,
+            "win_rate": 0.0,
+            "total_trades": 0,
+            "daily_returns": [],
+            "monthly_returns": [],
+            "volatility": 0.0,
+            "beta": 0.0,
+            "alpha": 0.0,
+            "sortino_ratio": 0.0,
+            "avg_trade_duration": 0.0,
+            "avg_win": 0.0,
+            "avg_loss": 0.0,
+            "largest_win": 0.0,
+            "largest_loss": 0.0,
+            "last_updated": strategy.updated_at or strategy.created_at
         }
+        if not performance or not performance.closed_trades:
+            return summary
+        
+        await self._backfill_benchmark_returns(strategy_id)
+        
+        capital = performance.capital
+        periods_per_year = settings.BACKTEST_PERIODS_PER_YEAR
+        
+        # Days without a closed trade count as zero-return days
+        first_day = performance.first_trade_at.astimezone(nse_calendar.tz).date()
+        last_day = performance.last_trade_at.astimezone(nse_calendar.tz).date()
+        days = max(nse_calendar.sessions_between(first_day, last_day), performance.trading_days, 1)
+        
+        mean = performance.sum_daily_return / days
+        variance = max(performance.sum_daily_return_sq / days - mean ** 2, 0.0)
+        std = math.sqrt(variance * days / (days - 1)) if days > 1 else 0.0
+        downside = math.sqrt(performance.sum_downside_sq / days)
+        
+        total_return = performance.cum_pnl / capital
+        growth = 1 + total_return
+        annualized = growth ** (periods_per_year / days) - 1 if growth > 0 else -1.0
+        
+        daily_return = StrategyDailyPerformance.pnl / capital
+        beta, intercept = self.db.query(
+            func.regr_slope(daily_return, StrategyDailyPerformance.benchmark_return),
+            func.regr_intercept(daily_return, StrategyDailyPerformance.benchmark_return)
+        ).filter(
+            and_(
+                StrategyDailyPerformance.strategy_id == strategy_id,
+                StrategyDailyPerformance.benchmark_return.isnot(None)
+            )
+        ).one()
+        
+        recent_days = self.db.query(StrategyDailyPerformance).filter(
+            StrategyDailyPerformance.strategy_id == strategy_id
+        ).order_by(desc(StrategyDailyPerformance.day)).limit(30).all()
+        
+        month = func.date_trunc("month", StrategyDailyPerformance.day).label("month")
+        months = self.db.query(
+            month,
+            func.sum(StrategyDailyPerformance.pnl).label("pnl"),
+            func.sum(StrategyDailyPerformance.trades).label("trades"),
+            func.sum(StrategyDailyPerformance.wins).label("wins")
+        ).filter(
+            StrategyDailyPerformance.strategy_id == strategy_id
+        ).group_by(month).order_by(month).all()
+        
+        summary.update({
+            "total_return": round(total_return * 100, 4),
+            "annualized_return": round(annualized * 100, 4),
+            "sharpe_ratio": round(mean / std * math.sqrt(periods_per_year), 4) if std > 0 else 0.0,
+            "max_drawdown": round(performance.max_drawdown, 4),
+            "win_rate": round(performance.wins / performance.closed_trades * 100, 2),
+            "total_trades": performance.closed_trades,
+            "daily_returns": [
+                {
+                    "date": row.day.isoformat(),
+                    "pnl": round(row.pnl, 2),
+                    "return": round(row.pnl / capital * 100, 4),
+                    "trades": row.trades,
+                    "benchmark_return": round(row.benchmark_return * 100, 4) if row.benchmark_return is not None else None
+                }
+                for row in reversed(recent_days)
+            ],
+            "monthly_returns": [
+                {
+                    "month": row.month.strftime("%Y-%m"),
+                    "pnl": round(row.pnl, 2),
+                    "return": round(row.pnl / capital * 100, 4),
+                    "trades": int(row.trades),
+                    "wins": int(row.wins)
+                }
+                for row in months
+            ],
+            "volatility": round(std * math.sqrt(periods_per_year) * 100, 4),
+            "beta": round(beta, 4) if beta is not None else 0.0,
+            "alpha": round(intercept * periods_per_year * 100, 4) if intercept is not None else 0.0,
+            "sortino_ratio": round(mean / downside * math.sqrt(periods_per_year), 4) if downside > 0 else 0.0,
+            "avg_trade_duration": round(performance.total_holding_seconds / performance.closed_trades / 3600, 4),
+            "avg_win": round(performance.gross_profit / performance.wins, 2) if performance.wins else 0.0,
+            "avg_loss": round(-performance.gross_loss / performance.losses, 2) if performance.losses else 0.0,
+            "largest_win": performance.largest_win,
+            "largest_loss": performance.largest_loss,
+            "last_updated": performance.updated_at or performance.last_trade_at
+        })
+        
+        return summary
     
     async def get_strategy_templates(self) -> List[Dict[str, Any]]:
         """Get predefined strategy templates"""
@@ -0,0 +1,31 @@
+# Storage backends for TimeSeriesService
+
+from typing import Optional
+
+from config import settings
+from .columns import Columns
+from .base import TimeSeriesBackend, INTERVALS, ROLLUP_TIERS, FIELD_AGGREGATES, align_start, select_tier
+
+def get_timeseries_backend(name: Optional[str] = None) -> TimeSeriesBackend:
+    """Build the configured backend; InfluxDB is only imported when selected"""
+    name = (name or settings.TIMESERIES_BACKEND).lower()
+
+    if name == "embedded":
+        from .embedded import EmbeddedBackend
+        return EmbeddedBackend()
+    if name in ("influx", "influxdb"):
+        from .influx import InfluxBackend
+        return InfluxBackend()
+
+    raise ValueError(f"Unknown time-series backend: {name}")
+
+__all__ = [
+    "TimeSeriesBackend",
+    "Columns",
+    "get_timeseries_backend",
+    "INTERVALS",
+    "ROLLUP_TIERS",
+    "FIELD_AGGREGATES",
+    "align_start",
+    "select_tier"
+]
@@ -0,0 +1,151 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from services.timeseries_backends.columns import Columns, columns_to_points
+
+# Query intervals understood by get_stock_price_history
+INTERVALS = {
+    "1m": timedelta(minutes=1),
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1)
+}
+
+# Downsampled tiers, finest first: (name, resolution, source tier). Each tier is
+# folded from the tier below it as data arrives.
+ROLLUP_TIERS = [
+    ("1h", timedelta(hours=1), "raw"),
+    ("1d", timedelta(days=1), "1h")
+]
+
+# How a field is aggregated when points are folded into a coarser window
+FIELD_AGGREGATES = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+    "change": "last",
+    "change_percent": "last",
+    "price": "mean"
+}
+
+PRICE_FIELDS = list(FIELD_AGGREGATES.keys())
+
+def default_tier_retention() -> Dict[str, Optional[timedelta]]:
+    """Retention per tier; raw minute data is the first to age out"""
+    return {
+        "raw": timedelta(days=settings.TIMESERIES_RAW_RETENTION_DAYS),
+        "1h": timedelta(days=settings.TIMESERIES_HOURLY_RETENTION_DAYS),
+        "1d": None
+    }
+
+def align_start(start_time: datetime, interval: str) -> datetime:
+    """Floor start_time to its interval window so every backend returns whole windows"""
+    step = int(INTERVALS.get(interval, INTERVALS["1m"]).total_seconds())
+    aware = start_time if start_time.tzinfo is not None else start_time.replace(tzinfo=timezone.utc)
+    aligned = datetime.fromtimestamp(int(aware.timestamp()) // step * step, timezone.utc)
+    return aligned if start_time.tzinfo is not None else aligned.replace(tzinfo=None)
+
+def select_tier(interval: str, start_time: datetime,
+                tier_retention: Dict[str, Optional[timedelta]]) -> str:
+    """Pick the coarsest tier that still satisfies the interval and covers the range"""
+    requested = INTERVALS.get(interval, INTERVALS["1m"])
+    now = datetime.utcnow() if start_time.tzinfo is None else datetime.now(timezone.utc)
+
+    def covers(tier: str) -> bool:
+        retention = tier_retention.get(tier)
+        return retention is None or start_time >= now - retention
+
+    candidates = ["raw"] + [tier for tier, _, _ in ROLLUP_TIERS]
+    resolutions = {"raw": timedelta(0)}
+    resolutions.update({tier: resolution for tier, resolution, _ in ROLLUP_TIERS})
+
+    # Coarsest first: a tier satisfies the interval if its windows nest inside it
+    for tier in reversed(candidates):
+        if resolutions[tier] <= requested and covers(tier):
+            return tier
+
+    # Range reaches past every fine tier's retention: serve the finest tier that has it
+    for tier in candidates:
+        if covers(tier):
+            return tier
+    return candidates[-1]
+
+class TimeSeriesBackend(ABC):
+    """Storage interface behind TimeSeriesService
+
+    History is read as columns (see columns.py); query_history expands that into the
+    long format the API has always returned: one dict per (window, field) with
+    timestamp, price (the field value), field and symbol.
+    """
+
+    name = "abstract"
+    # Remote backends sit behind the Redis query cache; embedded ones are faster to hit directly
+    remote = False
+
+    def __init__(self, tier_retention: Optional[Dict[str, Optional[timedelta]]] = None):
+        self.tier_retention = tier_retention or default_tier_retention()
+
+    @abstractmethod
+    async def write_prices(self, symbol: str, fields: Dict[str, float], tags: Dict[str, str],
+                           timestamp: Optional[datetime] = None) -> None:
+        """Store one stock_price point"""
+
+    @abstractmethod
+    async def write_prices_batch(self, rows: List[Dict[str, Any]]) -> int:
+        """Store many stock_price points; each row has symbol, timestamp and price fields"""
+
+    @abstractmethod
+    async def write_market_data(self, rows: List[Dict[str, Any]]) -> int:
+        """Store generic market_data points (symbol, data_type, value, volume, timestamp)"""
+
+    @abstractmethod
+    async def write_index_values(self, rows: List[Dict[str, Any]]) -> int:
+        """Store market_index points (index_name, value, timestamp)"""
+
+    @abstractmethod
+    async def query_history_columns(self, symbol: str, start_time: datetime, end_time: datetime,
+                                    interval: str) -> Columns:
+        """Windowed OHLCV history for one symbol as column arrays; raises on failure
+
+        The window containing start_time is returned whole (see align_start), so a
+        rollup tier and the raw tier give the same answer for the same request.
+        """
+
+    async def query_history(self, symbol: str, start_time: datetime, end_time: datetime,
+                            interval: str) -> List[Dict[str, Any]]:
+        """Same as query_history_columns, expanded to one dict per (window, field)"""
+        columns = await self.query_history_columns(symbol, start_time, end_time, interval)
+        return columns_to_points(columns, symbol)
+
+    @abstractmethod
+    async def query_index_history(self, index_name: str, start_time: datetime,
+                                  end_time: datetime) -> List[Dict[str, Any]]:
+        """Raw market_index points"""
+
+    @abstractmethod
+    async def symbol_statistics(self, start_time: datetime, end_time: datetime,
+                                symbols: Optional[List[str]], field: str) -> Dict[str, Dict[str, Any]]:
+        """count/first/last/min/max/mean per symbol, aggregated inside the store"""
+
+    @abstractmethod
+    async def apply_retention(self) -> Dict[str, int]:
+        """Expire data past each tier's retention; returns rows removed per tier"""
+
+    @abstractmethod
+    async def health(self) -> Dict[str, str]:
+        """Backend health for the service health check"""
+
+    def settle_delay(self, interval: str) -> timedelta:
+        """How long after a window ends its stored values can still change (late points)"""
+        return timedelta(seconds=settings.TIMESERIES_LATE_POINT_SECONDS)
+
+    async def sync_rollups(self) -> None:
+        """Block until rollup tiers reflect every completed write (no-op if they are synchronous)"""
+
+    async def close(self) -> None:
+        """Release connections (optional)"""
@@ -0,0 +1,81 @@
+import base64
+import json
+import numpy as np
+from typing import Dict, Any, List, Sequence
+from datetime import datetime, timezone
+
+# Columnar query results: "timestamp" holds int64 epoch nanoseconds (UTC, sorted)
+# and every other key is a float64 array of the same length, NaN where missing.
+Columns = Dict[str, np.ndarray]
+
+def empty_columns(fields: Sequence[str] = ()) -> Columns:
+    columns: Columns = {"timestamp": np.empty(0, dtype=np.int64)}
+    for field in fields:
+        columns[field] = np.empty(0, dtype=np.float64)
+    return columns
+
+def column_length(columns: Columns) -> int:
+    return len(columns.get("timestamp", ()))
+
+def epoch_ns(value: datetime) -> int:
+    """Epoch nanoseconds; naive datetimes are treated as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp()) * 10**9 + value.microsecond * 1000
+
+def slice_columns(columns: Columns, lower_ns: int, upper_ns: int) -> Columns:
+    """Rows with lower_ns <= timestamp < upper_ns; views, not copies"""
+    timestamps = columns["timestamp"]
+    lo = np.searchsorted(timestamps, lower_ns, side="left")
+    hi = np.searchsorted(timestamps, upper_ns, side="left")
+    return {name: values[lo:hi] for name, values in columns.items()}
+
+def concat_columns(parts: List[Columns]) -> Columns:
+    """Concatenate time-ordered, non-overlapping column sets"""
+    parts = [part for part in parts if column_length(part)]
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+
+    names = set().union(*parts)
+    result: Columns = {}
+    for name in names:
+        dtype = np.int64 if name == "timestamp" else np.float64
+        result[name] = np.concatenate([
+            part[name] if name in part else np.full(column_length(part), np.nan, dtype=dtype)
+            for part in parts
+        ])
+    return result
+
+def columns_to_points(columns: Columns, symbol: str) -> List[Dict[str, Any]]:
+    """Expand to the long format (one dict per timestamp and field) used by the JSON API"""
+    timestamps = [
+        datetime.fromtimestamp(stamp / 10**9, timezone.utc) for stamp in columns["timestamp"].tolist()
+    ]
+    points = []
+    for index, timestamp in enumerate(timestamps):
+        for name, values in columns.items():
+            if name == "timestamp":
+                continue
+            value = values[index]
+            points.append({
+                "timestamp": timestamp,
+                "price": None if np.isnan(value) else float(value),
+                "field": name,
+                "symbol": symbol
+            })
+    return points
+
+def encode_columns(columns: Columns) -> str:
+    """Text-safe serialization (the Redis client decodes responses): base64 of the raw buffers"""
+    return json.dumps({
+        name: [str(values.dtype), base64.b64encode(np.ascontiguousarray(values).tobytes()).decode("ascii")]
+        for name, values in columns.items()
+    })
+
+def decode_columns(payload: str) -> Columns:
+    return {
+        name: np.frombuffer(base64.b64decode(data), dtype=np.dtype(dtype))
+        for name, (dtype, data) in json.loads(payload).items()
+    }
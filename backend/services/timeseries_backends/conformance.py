@@ -0,0 +1,147 @@
+"""
+Conformance checks and benchmarks shared by every TimeSeriesBackend.
+
+Run through timeseries_benchmark.py; each backend must produce identical
+results for the same synthetic data before it can be selected in settings.
+"""
+
+import math
+import random
+import time
+import uuid
+from typing import Dict, Any, List, Tuple
+from datetime import datetime, timedelta, timezone
+
+from services.timeseries_backends.base import TimeSeriesBackend, INTERVALS
+
+OHLCV_FIELDS = ["open", "high", "low", "close", "volume"]
+
+def _synthetic_bars(symbol: str, start: datetime, minutes: int, seed: int) -> List[Dict[str, Any]]:
+    """Random-walk one-minute bars"""
+    rng = random.Random(seed)
+    price = 100.0 + seed
+    rows = []
+    for i in range(minutes):
+        open_price = price
+        close_price = max(1.0, open_price * (1 + rng.uniform(-0.002, 0.002)))
+        rows.append({
+            "symbol": symbol,
+            "timestamp": start + timedelta(minutes=i),
+            "open": open_price,
+            "high": max(open_price, close_price) * 1.001,
+            "low": min(open_price, close_price) * 0.999,
+            "close": close_price,
+            "volume": float(rng.randint(100, 10000)),
+            "price": close_price,
+            "change": close_price - open_price,
+            "change_percent": (close_price - open_price) / open_price * 100
+        })
+        price = close_price
+    return rows
+
+def _expected_windows(rows: List[Dict[str, Any]], step: timedelta) -> Dict[datetime, Dict[str, float]]:
+    """Reference OHLCV aggregation in plain Python"""
+    step_seconds = int(step.total_seconds())
+    windows: Dict[datetime, Dict[str, float]] = {}
+    for row in rows:
+        epoch = int(row["timestamp"].timestamp())
+        key = datetime.fromtimestamp(epoch // step_seconds * step_seconds, timezone.utc)
+        window = windows.get(key)
+        if window is None:
+            windows[key] = {field: row[field] for field in OHLCV_FIELDS}
+        else:
+            window["high"] = max(window["high"], row["high"])
+            window["low"] = min(window["low"], row["low"])
+            window["close"] = row["close"]
+            window["volume"] += row["volume"]
+    return windows
+
+def _pivot(points: List[Dict[str, Any]]) -> Dict[datetime, Dict[str, float]]:
+    pivoted: Dict[datetime, Dict[str, float]] = {}
+    for point in points:
+        timestamp = point["timestamp"]
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        pivoted.setdefault(timestamp, {})[point["field"]] = point["price"]
+    return pivoted
+
+def _close(a: float, b: float) -> bool:
+    return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-6)
+
+async def run_conformance(backend: TimeSeriesBackend, minutes: int = 180) -> List[Tuple[str, bool, str]]:
+    """Write synthetic bars and verify every read path; returns (check, passed, detail)"""
+    results: List[Tuple[str, bool, str]] = []
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    start = now - timedelta(minutes=minutes + 1)
+    end = now
+    symbols = [f"CONF{uuid.uuid4().hex[:6].upper()}{i}" for i in range(3)]
+    bars = {symbol: _synthetic_bars(symbol, start, minutes, seed) for seed, symbol in enumerate(symbols)}
+
+    written = await backend.write_prices_batch([row for rows in bars.values() for row in rows])
+    results.append(("write_prices_batch", written == minutes * len(symbols), f"{written} points"))
+    await backend.sync_rollups()
+
+    for interval in ["1m", "5m", "1h", "1d"]:
+        symbol = symbols[0]
+        expected = _expected_windows(bars[symbol], INTERVALS[interval])
+        actual = _pivot(await backend.query_history(symbol, start, end, interval))
+        mismatches = [
+            f"{timestamp.isoformat()} {field}"
+            for timestamp, window in expected.items()
+            for field in OHLCV_FIELDS
+            if not _close(actual.get(timestamp, {}).get(field), window[field])
+        ]
+        passed = not mismatches and len(actual) == len(expected)
+        detail = f"{len(actual)}/{len(expected)} windows" + (f", first mismatch {mismatches[0]}" if mismatches else "")
+        results.append((f"query_history {interval}", passed, detail))
+
+    stats = await backend.symbol_statistics(start, end, symbols, "close")
+    stats_ok = True
+    for symbol in symbols:
+        closes = [row["close"] for row in bars[symbol]]
+        got = stats.get(symbol, {})
+        stats_ok = stats_ok and got.get("count") == len(closes) \
+            and _close(got.get("first"), closes[0]) and _close(got.get("last"), closes[-1]) \
+            and _close(got.get("min"), min(closes)) and _close(got.get("max"), max(closes)) \
+            and _close(got.get("mean"), sum(closes) / len(closes))
+    results.append(("symbol_statistics", stats_ok, f"{len(stats)} symbols"))
+
+    index_name = f"CONF_INDEX_{uuid.uuid4().hex[:6]}"
+    await backend.write_index_values([
+        {"index_name": index_name, "value": 1000.0 + i, "timestamp": start + timedelta(minutes=i)}
+        for i in range(10)
+    ])
+    index_points = await backend.query_index_history(index_name, start, end)
+    results.append(("index roundtrip", len(index_points) == 10, f"{len(index_points)} points"))
+
+    health = await backend.health()
+    results.append(("health", health.get("status") == "healthy", str(health)))
+    return results
+
+async def run_benchmark(backend: TimeSeriesBackend, symbols: int = 50, minutes: int = 375,
+                        batch_size: int = 5000) -> Dict[str, float]:
+    """Ingest one session of minute bars for `symbols` symbols and time the read paths"""
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    start = now - timedelta(minutes=minutes + 1)
+    names = [f"BENCH{uuid.uuid4().hex[:4].upper()}{i}" for i in range(symbols)]
+    rows = [row for seed, name in enumerate(names) for row in _synthetic_bars(name, start, minutes, seed)]
+
+    timings: Dict[str, float] = {}
+
+    began = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        await backend.write_prices_batch(rows[offset:offset + batch_size])
+    elapsed = time.perf_counter() - began
+    timings["ingest_points_per_sec"] = len(rows) / elapsed if elapsed else float("inf")
+    await backend.sync_rollups()
+
+    for interval in ["1m", "15m", "1d"]:
+        began = time.perf_counter()
+        for name in names[:10]:
+            await backend.query_history(name, start, now, interval)
+        timings[f"query_history_{interval}_avg_ms"] = (time.perf_counter() - began) * 1000 / min(10, len(names))
+
+    began = time.perf_counter()
+    await backend.symbol_statistics(start, now, None, "close")
+    timings["symbol_statistics_ms"] = (time.perf_counter() - began) * 1000
+    return timings
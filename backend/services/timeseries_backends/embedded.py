@@ -0,0 +1,263 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import numpy as np
+from typing import Dict, Any, List, Optional, Callable
+from datetime import datetime, timedelta, timezone
+
+from config import settings
+from services.timeseries_backends.base import (
+    TimeSeriesBackend, INTERVALS, ROLLUP_TIERS, FIELD_AGGREGATES, PRICE_FIELDS, align_start, select_tier
+)
+from services.timeseries_backends.columns import Columns, empty_columns
+
+PRICE_COLUMNS = ["symbol", "ts", "exchange"] + PRICE_FIELDS
+
+def _to_ms(value: datetime) -> int:
+    """Epoch milliseconds; naive datetimes are treated as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+def _from_ms(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1000, timezone.utc)
+
+def _tier_table(tier: str) -> str:
+    return "stock_price" if tier == "raw" else f"stock_price_{tier}"
+
+def _window_sql(table: str, step_ms: int, where: str) -> str:
+    """Fold rows of `table` into step_ms windows per symbol with per-field aggregates"""
+    aggregates = {
+        "first": "FIRST_VALUE({0}) OVER w",
+        "last": "LAST_VALUE({0}) OVER w",
+        "max": "MAX({0}) OVER w",
+        "min": "MIN({0}) OVER w",
+        "sum": "SUM({0}) OVER w",
+        "mean": "AVG({0}) OVER w"
+    }
+    columns = ", ".join(
+        f"{aggregates[fn].format(field)} AS {field}" for field, fn in FIELD_AGGREGATES.items()
+    )
+    return f'''
+        SELECT DISTINCT symbol, bucket AS ts, LAST_VALUE(exchange) OVER w AS exchange, {columns}
+        FROM (SELECT (ts / {step_ms}) * {step_ms} AS bucket, * FROM {table} WHERE {where})
+        WINDOW w AS (PARTITION BY symbol, bucket ORDER BY ts
+                     ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    '''
+
+class EmbeddedBackend(TimeSeriesBackend):
+    """In-process SQLite backend; no server to operate and no network hop per query
+
+    Rollup tables are refreshed in the same transaction as every write, for just
+    the windows the write touched, so they are always current.
+    """
+
+    name = "embedded"
+    remote = False
+
+    def __init__(self, path: Optional[str] = None,
+                 tier_retention: Optional[Dict[str, Optional[timedelta]]] = None):
+        super().__init__(tier_retention)
+        self.path = path or settings.TIMESERIES_EMBEDDED_PATH
+        if self.path != ":memory:" and os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        price_columns = ", ".join(f"{field} REAL" for field in PRICE_FIELDS)
+        with self.lock, self.conn:
+            for tier in ["raw"] + [tier for tier, _, _ in ROLLUP_TIERS]:
+                self.conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {_tier_table(tier)} ("
+                    f"symbol TEXT NOT NULL, ts INTEGER NOT NULL, exchange TEXT, {price_columns}, "
+                    f"PRIMARY KEY (symbol, ts)) WITHOUT ROWID"
+                )
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{_tier_table(tier)}_ts ON {_tier_table(tier)} (ts)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS market_data ("
+                "symbol TEXT NOT NULL, data_type TEXT NOT NULL, ts INTEGER NOT NULL, value REAL, volume REAL, "
+                "PRIMARY KEY (symbol, data_type, ts)) WITHOUT ROWID"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS market_index ("
+                "index_name TEXT NOT NULL, ts INTEGER NOT NULL, value REAL, "
+                "PRIMARY KEY (index_name, ts)) WITHOUT ROWID"
+            )
+
+    async def _run(self, fn: Callable, *args):
+        """Run a blocking SQLite call off the event loop"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    def _refresh_rollups(self, touched: Dict[str, List[int]]):
+        """Recompute the rollup windows covering the written timestamps (caller holds the lock)"""
+        for tier, resolution, source_tier in ROLLUP_TIERS:
+            step = int(resolution.total_seconds() * 1000)
+            source = _tier_table(source_tier)
+            target = _tier_table(tier)
+            for symbol, stamps in touched.items():
+                lower = min(stamps) // step * step
+                upper = max(stamps) // step * step + step
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO {target} ({', '.join(PRICE_COLUMNS)}) "
+                    f"SELECT {', '.join(PRICE_COLUMNS)} FROM "
+                    f"({_window_sql(source, step, 'symbol = ? AND ts >= ? AND ts < ?')})",
+                    (symbol, lower, upper)
+                )
+
+    def _write_prices(self, rows: List[Dict[str, Any]]) -> int:
+        now = datetime.utcnow()
+        records = []
+        touched: Dict[str, List[int]] = {}
+        for row in rows:
+            ts = _to_ms(row.get("timestamp") or now)
+            records.append(
+                [row["symbol"], ts, row.get("exchange", "NSE")] + [row.get(field) for field in PRICE_FIELDS]
+            )
+            touched.setdefault(row["symbol"], []).append(ts)
+
+        placeholders = ", ".join("?" for _ in PRICE_COLUMNS)
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO stock_price ({', '.join(PRICE_COLUMNS)}) VALUES ({placeholders})",
+                records
+            )
+            self._refresh_rollups(touched)
+        return len(records)
+
+    async def write_prices(self, symbol: str, fields: Dict[str, float], tags: Dict[str, str],
+                           timestamp: Optional[datetime] = None) -> None:
+        await self._run(self._write_prices, [dict(fields, symbol=symbol, timestamp=timestamp, **tags)])
+
+    async def write_prices_batch(self, rows: List[Dict[str, Any]]) -> int:
+        return await self._run(self._write_prices, rows)
+
+    def _write_market_data(self, rows: List[Dict[str, Any]]) -> int:
+        now = datetime.utcnow()
+        records = [
+            (row["symbol"], row.get("data_type", "price"), _to_ms(row.get("timestamp") or now),
+             row.get("value"), row.get("volume"))
+            for row in rows
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO market_data VALUES (?, ?, ?, ?, ?)", records)
+        return len(records)
+
+    async def write_market_data(self, rows: List[Dict[str, Any]]) -> int:
+        return await self._run(self._write_market_data, rows)
+
+    def _write_index_values(self, rows: List[Dict[str, Any]]) -> int:
+        now = datetime.utcnow()
+        records = [
+            (row["index_name"], _to_ms(row.get("timestamp") or now), row.get("value"))
+            for row in rows
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO market_index VALUES (?, ?, ?)", records)
+        return len(records)
+
+    async def write_index_values(self, rows: List[Dict[str, Any]]) -> int:
+        return await self._run(self._write_index_values, rows)
+
+    def _query_history_columns(self, symbol: str, start_time: datetime, end_time: datetime,
+                               interval: str) -> Columns:
+        tier = select_tier(interval, start_time, self.tier_retention)
+        start_time = align_start(start_time, interval)
+        step = int(INTERVALS.get(interval, INTERVALS["1m"]).total_seconds() * 1000)
+        sql = (
+            f"SELECT ts, {', '.join(PRICE_FIELDS)} FROM "
+            f"({_window_sql(_tier_table(tier), step, 'symbol = ? AND ts >= ? AND ts < ?')}) ORDER BY ts"
+        )
+
+        with self.lock:
+            rows = self.conn.execute(sql, (symbol, _to_ms(start_time), _to_ms(end_time))).fetchall()
+
+        if not rows:
+            return empty_columns(PRICE_FIELDS)
+
+        # One 2-D conversion for the whole result, then column views; NULL becomes NaN
+        matrix = np.array(rows, dtype=np.float64)
+        columns: Columns = {"timestamp": matrix[:, 0].astype(np.int64) * 1_000_000}
+        for index, field in enumerate(PRICE_FIELDS, start=1):
+            columns[field] = matrix[:, index]
+        return columns
+
+    async def query_history_columns(self, symbol: str, start_time: datetime, end_time: datetime,
+                                    interval: str) -> Columns:
+        return await self._run(self._query_history_columns, symbol, start_time, end_time, interval)
+
+    def _query_index_history(self, index_name: str, start_time: datetime,
+                             end_time: datetime) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT ts, value FROM market_index WHERE index_name = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (index_name, _to_ms(start_time), _to_ms(end_time))
+            ).fetchall()
+        return [{"timestamp": _from_ms(ts), "value": value, "index_name": index_name} for ts, value in rows]
+
+    async def query_index_history(self, index_name: str, start_time: datetime,
+                                  end_time: datetime) -> List[Dict[str, Any]]:
+        return await self._run(self._query_index_history, index_name, start_time, end_time)
+
+    def _symbol_statistics(self, start_time: datetime, end_time: datetime,
+                           symbols: Optional[List[str]], field: str) -> Dict[str, Dict[str, Any]]:
+        if field not in PRICE_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+
+        params: List[Any] = [_to_ms(start_time), _to_ms(end_time)]
+        symbol_filter = ""
+        if symbols:
+            symbol_filter = f"AND symbol IN ({', '.join('?' for _ in symbols)})"
+            params.extend(symbols)
+
+        sql = f'''
+            SELECT DISTINCT symbol, COUNT(*) OVER w, FIRST_VALUE({field}) OVER w, LAST_VALUE({field}) OVER w,
+                   MIN({field}) OVER w, MAX({field}) OVER w, AVG({field}) OVER w
+            FROM stock_price WHERE ts >= ? AND ts < ? {symbol_filter}
+            WINDOW w AS (PARTITION BY symbol ORDER BY ts
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+        '''
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        return {
+            symbol: {"count": count, "first": first, "last": last, "min": low, "max": high, "mean": mean}
+            for symbol, count, first, last, low, high, mean in rows
+        }
+
+    async def symbol_statistics(self, start_time: datetime, end_time: datetime,
+                                symbols: Optional[List[str]], field: str) -> Dict[str, Dict[str, Any]]:
+        return await self._run(self._symbol_statistics, start_time, end_time, symbols, field)
+
+    def _apply_retention(self) -> Dict[str, int]:
+        now = datetime.utcnow()
+        removed = {}
+        with self.lock, self.conn:
+            for tier, retention in self.tier_retention.items():
+                if retention is None:
+                    continue
+                cutoff = _to_ms(now - retention)
+                removed[tier] = self.conn.execute(
+                    f"DELETE FROM {_tier_table(tier)} WHERE ts < ?", (cutoff,)
+                ).rowcount
+                if tier == "raw":
+                    self.conn.execute("DELETE FROM market_data WHERE ts < ?", (cutoff,))
+        return removed
+
+    async def apply_retention(self) -> Dict[str, int]:
+        return await self._run(self._apply_retention)
+
+    async def health(self) -> Dict[str, str]:
+        with self.lock:
+            self.conn.execute("SELECT 1").fetchone()
+        return {"status": "healthy", "service": "embedded-timeseries", "path": self.path}
+
+    async def close(self) -> None:
+        with self.lock:
+            self.conn.close()
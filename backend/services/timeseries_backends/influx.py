@@ -0,0 +1,321 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+
+from influxdb_client import InfluxDBClient, Point, WritePrecision, BucketRetentionRules
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+from database import get_influx_client
+from config import settings
+from services.timeseries_backends.base import (
+    TimeSeriesBackend, INTERVALS, ROLLUP_TIERS, FIELD_AGGREGATES, PRICE_FIELDS, align_start, select_tier
+)
+from services.timeseries_backends.columns import Columns, empty_columns
+
+class InfluxBackend(TimeSeriesBackend):
+    """Remote InfluxDB 2.x backend; rollups are maintained by InfluxDB tasks"""
+
+    name = "influxdb"
+    remote = True
+
+    def __init__(self, tier_retention: Optional[Dict[str, Optional[timedelta]]] = None):
+        super().__init__(tier_retention)
+        self.influx_client: Optional[InfluxDBClient] = None
+        self.write_api: Optional[Any] = None
+        self.query_api: Optional[Any] = None
+        self.bucket = settings.INFLUXDB_BUCKET
+        self.org = settings.INFLUXDB_ORG
+        self.rollups_ready = False
+
+    async def _get_client(self) -> InfluxDBClient:
+        if self.influx_client is None:
+            self.influx_client = await get_influx_client()
+            self.write_api = self.influx_client.write_api(write_options=SYNCHRONOUS)
+            self.query_api = self.influx_client.query_api()
+            await self.ensure_rollups()
+        return self.influx_client
+
+    def _tier_bucket(self, tier: str) -> str:
+        """Bucket that holds a given rollup tier"""
+        return self.bucket if tier == "raw" else f"{self.bucket}_{tier}"
+
+    def _downsample_flux(self, source_bucket: str, start: str, stop: Optional[str],
+                         every: str, symbol: Optional[str] = None) -> str:
+        """Flux that folds stock_price points into `every` windows with per-field aggregates"""
+        stop_clause = f", stop: {stop}" if stop else ""
+        symbol_filter = f'|> filter(fn: (r) => r["symbol"] == {json.dumps(symbol)})' if symbol else ""
+
+        streams = []
+        for field, fn in FIELD_AGGREGATES.items():
+            streams.append(
+                f'data |> filter(fn: (r) => r["_field"] == "{field}") '
+                f'|> aggregateWindow(every: {every}, fn: {fn}, timeSrc: "_start", createEmpty: false)'
+            )
+
+        return f'''
+            data = from(bucket: "{source_bucket}")
+                |> range(start: {start}{stop_clause})
+                |> filter(fn: (r) => r["_measurement"] == "stock_price")
+                {symbol_filter}
+            union(tables: [
+                {", ".join(streams)}
+            ])
+        '''
+
+    async def ensure_rollups(self) -> bool:
+        """Create rollup buckets and the InfluxDB tasks that keep them current"""
+        if self.rollups_ready:
+            return True
+
+        try:
+            buckets_api = self.influx_client.buckets_api()
+            tasks_api = self.influx_client.tasks_api()
+            organization = self.influx_client.organizations_api().find_organizations(org=self.org)[0]
+            existing_tasks = {task.name for task in tasks_api.find_tasks()}
+
+            for tier, resolution, source_tier in ROLLUP_TIERS:
+                bucket_name = self._tier_bucket(tier)
+                if buckets_api.find_bucket_by_name(bucket_name) is None:
+                    retention = self.tier_retention.get(tier)
+                    rules = []
+                    if retention:
+                        rules = [BucketRetentionRules(type="expire", every_seconds=int(retention.total_seconds()))]
+                    buckets_api.create_bucket(bucket_name=bucket_name, retention_rules=rules, org=self.org)
+
+                task_name = f"rollup_{bucket_name}"
+                if task_name in existing_tasks:
+                    continue
+
+                # Re-read two windows each run so late points are folded in; rewriting a
+                # window is idempotent because the point key (time + tags) is unchanged.
+                every = tier
+                lookback = f"-{2 * int(resolution.total_seconds())}s"
+                flux = self._downsample_flux(self._tier_bucket(source_tier), lookback, None, every) + f'''
+                    |> to(bucket: "{bucket_name}", org: "{self.org}")
+                '''
+                tasks_api.create_task_every(name=task_name, flux=flux, every=every, organization=organization)
+
+            self.rollups_ready = True
+            return True
+
+        except Exception as e:
+            print(f"Error ensuring rollup tasks: {e}")
+            return False
+
+    def settle_delay(self, interval: str) -> timedelta:
+        """Late points plus one run of every rollup task a query at `interval` may read through"""
+        requested = INTERVALS.get(interval, INTERVALS["1m"])
+        tasks = sum((resolution for _, resolution, _ in ROLLUP_TIERS if resolution <= requested), timedelta(0))
+        return super().settle_delay(interval) + tasks
+
+    async def sync_rollups(self, timeout: float = 60.0) -> None:
+        """Run the rollup tasks now, finest tier first, and wait for each to finish"""
+        await self._get_client()
+        tasks_api = self.influx_client.tasks_api()
+        tasks = {task.name: task for task in tasks_api.find_tasks()}
+
+        for tier, _, _ in ROLLUP_TIERS:
+            task = tasks.get(f"rollup_{self._tier_bucket(tier)}")
+            if task is None:
+                continue
+            run = tasks_api.run_manually(task.id)
+            waited = 0.0
+            while waited < timeout:
+                status = tasks_api.get_run(task.id, run.id).status
+                if status in ("success", "failed", "canceled"):
+                    break
+                await asyncio.sleep(0.5)
+                waited += 0.5
+
+    async def write_prices(self, symbol: str, fields: Dict[str, float], tags: Dict[str, str],
+                           timestamp: Optional[datetime] = None) -> None:
+        await self.write_prices_batch([dict(fields, symbol=symbol, timestamp=timestamp, **tags)])
+
+    async def write_prices_batch(self, rows: List[Dict[str, Any]]) -> int:
+        if not self.write_api:
+            await self._get_client()
+
+        points = []
+        for row in rows:
+            point = Point("stock_price") \
+                .tag("symbol", row["symbol"]) \
+                .tag("exchange", row.get("exchange", "NSE"))
+            for field in FIELD_AGGREGATES:
+                point.field(field, row.get(field))
+            if row.get("timestamp"):
+                point.time(row["timestamp"], WritePrecision.NS)
+            points.append(point)
+
+        if points:
+            self.write_api.write(bucket=self.bucket, org=self.org, record=points)
+        return len(points)
+
+    async def write_market_data(self, rows: List[Dict[str, Any]]) -> int:
+        if not self.write_api:
+            await self._get_client()
+
+        points = []
+        for data in rows:
+            point = Point("market_data") \
+                .tag("symbol", data["symbol"]) \
+                .tag("data_type", data.get("data_type", "price")) \
+                .field("value", data.get("value")) \
+                .field("volume", data.get("volume"))
+
+            if data.get("timestamp"):
+                point.time(data["timestamp"], WritePrecision.NS)
+
+            points.append(point)
+
+        if points:
+            self.write_api.write(bucket=self.bucket, org=self.org, record=points)
+        return len(points)
+
+    async def write_index_values(self, rows: List[Dict[str, Any]]) -> int:
+        if not self.write_api:
+            await self._get_client()
+
+        points = []
+        for data in rows:
+            point = Point("market_index") \
+                .tag("index_name", data["index_name"]) \
+                .field("value", data.get("value"))
+            if data.get("timestamp"):
+                point.time(data["timestamp"], WritePrecision.NS)
+            points.append(point)
+
+        if points:
+            self.write_api.write(bucket=self.bucket, org=self.org, record=points)
+        return len(points)
+
+    async def query_history_columns(self, symbol: str, start_time: datetime, end_time: datetime,
+                                    interval: str) -> Columns:
+        if not self.query_api:
+            await self._get_client()
+
+        # Long ranges read pre-aggregated rollups instead of scanning raw points
+        tier = select_tier(interval, start_time, self.tier_retention) if self.rollups_ready else "raw"
+        start_time = align_start(start_time, interval)
+        keep = ", ".join(json.dumps(column) for column in ["_time"] + PRICE_FIELDS)
+        query = self._downsample_flux(
+            self._tier_bucket(tier), start_time.isoformat(), end_time.isoformat(),
+            interval, symbol=symbol
+        ) + f'''
+            |> group()
+            |> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value")
+            |> keep(columns: [{keep}])
+            |> sort(columns: ["_time"])
+            |> yield(name: "history")
+        '''
+
+        # The dataframe path decodes the annotated CSV stream column-wise instead of
+        # building a FluxRecord per point
+        frame = self.query_api.query_data_frame(query, org=self.org)
+        if isinstance(frame, list):
+            frame = pd.concat(frame, ignore_index=True) if frame else pd.DataFrame()
+        if frame.empty:
+            return empty_columns(PRICE_FIELDS)
+
+        columns: Columns = {
+            "timestamp": frame["_time"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        }
+        for field in PRICE_FIELDS:
+            if field in frame:
+                columns[field] = frame[field].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                columns[field] = np.full(len(frame), np.nan)
+        return columns
+
+    async def query_index_history(self, index_name: str, start_time: datetime,
+                                  end_time: datetime) -> List[Dict[str, Any]]:
+        if not self.query_api:
+            await self._get_client()
+
+        query = f'''
+        from(bucket: "{self.bucket}")
+            |> range(start: {start_time.isoformat()}, stop: {end_time.isoformat()})
+            |> filter(fn: (r) => r["_measurement"] == "market_index")
+            |> filter(fn: (r) => r["index_name"] == {json.dumps(index_name)})
+            |> yield(name: "index_data")
+        '''
+
+        result = self.query_api.query(query, org=self.org)
+
+        data_points = []
+        for table in result:
+            for record in table.records:
+                data_points.append({
+                    "timestamp": record.get_time(),
+                    "value": record.get_value(),
+                    "index_name": record.values.get("index_name")
+                })
+
+        return data_points
+
+    async def symbol_statistics(self, start_time: datetime, end_time: datetime,
+                                symbols: Optional[List[str]], field: str) -> Dict[str, Dict[str, Any]]:
+        if not self.query_api:
+            await self._get_client()
+
+        symbol_filter = ""
+        if symbols:
+            symbol_set = ", ".join(json.dumps(symbol) for symbol in symbols)
+            symbol_filter = f'|> filter(fn: (r) => contains(value: r["symbol"], set: [{symbol_set}]))'
+
+        # One reduce() pass per symbol table; only the aggregated rows leave the server
+        query = f'''
+        from(bucket: "{self.bucket}")
+            |> range(start: {start_time.isoformat()}, stop: {end_time.isoformat()})
+            |> filter(fn: (r) => r["_measurement"] == "stock_price")
+            |> filter(fn: (r) => r["_field"] == {json.dumps(field)})
+            {symbol_filter}
+            |> group(columns: ["symbol"])
+            |> sort(columns: ["_time"])
+            |> reduce(
+                identity: {{count: 0, first: 0.0, last: 0.0, min: 0.0, max: 0.0, sum: 0.0}},
+                fn: (r, accumulator) => ({{
+                    count: accumulator.count + 1,
+                    first: if accumulator.count == 0 then float(v: r._value) else accumulator.first,
+                    last: float(v: r._value),
+                    min: if accumulator.count == 0 or float(v: r._value) < accumulator.min then float(v: r._value) else accumulator.min,
+                    max: if accumulator.count == 0 or float(v: r._value) > accumulator.max then float(v: r._value) else accumulator.max,
+                    sum: accumulator.sum + float(v: r._value)
+                }})
+            )
+            |> map(fn: (r) => ({{r with mean: if r.count > 0 then r.sum / float(v: r.count) else 0.0}}))
+            |> yield(name: "symbol_stats")
+        '''
+
+        result = self.query_api.query(query, org=self.org)
+
+        statistics = {}
+        for table in result:
+            for record in table.records:
+                symbol = record.values.get("symbol")
+                if not symbol:
+                    continue
+
+                statistics[symbol] = {
+                    "count": int(record.values.get("count", 0)),
+                    "first": record.values.get("first"),
+                    "last": record.values.get("last"),
+                    "min": record.values.get("min"),
+                    "max": record.values.get("max"),
+                    "mean": record.values.get("mean")
+                }
+
+        return statistics
+
+    async def apply_retention(self) -> Dict[str, int]:
+        # Bucket retention rules expire data server-side
+        return {}
+
+    async def health(self) -> Dict[str, str]:
+        client = await self._get_client()
+        health = client.health()
+        if health.status == "pass":
+            return {"status": "healthy", "service": "influxdb-timeseries"}
+        return {"status": "unhealthy", "service": "influxdb-timeseries", "error": health.message}
@@ -0,0 +1,151 @@
+from typing import Dict, List, Optional, Callable, Awaitable, Tuple
+from datetime import datetime, timedelta, timezone
+
+from database import get_redis_client
+from services.timeseries_backends.columns import (
+    Columns, slice_columns, concat_columns, encode_columns, decode_columns, epoch_ns
+)
+
+# Span of one cache bucket per query interval. Spans are whole multiples of the
+# interval, so an aggregation window never straddles two buckets.
+BUCKET_SPANS = {
+    "1m": timedelta(days=1),
+    "5m": timedelta(days=1),
+    "15m": timedelta(days=7),
+    "1h": timedelta(days=30),
+    "1d": timedelta(days=365)
+}
+
+Fetcher = Callable[[datetime, datetime], Awaitable[Columns]]
+
+def _epoch(value: datetime) -> float:
+    """Seconds since epoch; naive datetimes are treated as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _from_epoch(seconds: float, like: datetime) -> datetime:
+    """Inverse of _epoch, matching the tz-awareness of `like`"""
+    value = datetime.fromtimestamp(seconds, timezone.utc)
+    return value if like.tzinfo is not None else value.replace(tzinfo=None)
+
+class TimeSeriesQueryCache:
+    """Redis cache of time-series query results keyed by (symbol, interval, aligned bucket)
+
+    A bucket is closed once it ended more than the backend's settle delay ago
+    (late points landed, rollup tasks ran); closed buckets are cached without
+    expiry and dropped by invalidate_range when history inside them is
+    rewritten. Later buckets are always queried live, so a request for any
+    range costs at most one live query plus one query per run of uncached
+    closed buckets.
+    """
+
+    def __init__(self, redis_client=None, prefix: str = "ts"):
+        self.redis_client = redis_client or get_redis_client()
+        self.prefix = prefix
+
+    def _key(self, namespace: str, symbol: str, interval: str, bucket_start: int) -> str:
+        return f"{self.prefix}:{namespace}:{symbol.upper()}:{interval}:{bucket_start}"
+
+    def _buckets(self, interval: str, start: datetime, end: datetime) -> List[Tuple[int, int]]:
+        """Aligned [start, end) bucket bounds, in epoch seconds, covering the range"""
+        span = int(BUCKET_SPANS.get(interval, BUCKET_SPANS["1m"]).total_seconds())
+        first = int(_epoch(start)) // span * span
+        last = _epoch(end)
+
+        buckets = []
+        bucket_start = first
+        while bucket_start < last:
+            buckets.append((bucket_start, bucket_start + span))
+            bucket_start += span
+        return buckets
+
+    async def get_range(self, namespace: str, symbol: str, interval: str,
+                        start: datetime, end: datetime, fetch: Fetcher,
+                        settle: timedelta = timedelta(0)) -> Columns:
+        """Serve [start, end) from cached closed buckets plus live queries for the rest
+
+        `settle` is how long after a bucket ends its stored values may still
+        change; younger buckets are not cached yet.
+        """
+        buckets = self._buckets(interval, start, end)
+        if not buckets:
+            return concat_columns([])
+
+        horizon = _epoch(datetime.utcnow()) - settle.total_seconds()
+        closed = [bucket for bucket in buckets if bucket[1] <= horizon]
+        keys = [self._key(namespace, symbol, interval, bucket_start) for bucket_start, _ in closed]
+
+        try:
+            cached = self.redis_client.mget(keys) if keys else []
+        except Exception as e:
+            print(f"Time-series cache read error: {e}")
+            cached = [None] * len(closed)
+
+        by_bucket: Dict[int, Columns] = {}
+        missing: List[Tuple[int, int]] = []
+        for bucket, payload in zip(closed, cached):
+            if payload is None:
+                missing.append(bucket)
+            else:
+                by_bucket[bucket[0]] = decode_columns(payload)
+
+        # One query per contiguous run of missing closed buckets
+        runs: List[List[Tuple[int, int]]] = []
+        for bucket in missing:
+            if runs and runs[-1][-1][1] == bucket[0]:
+                runs[-1].append(bucket)
+            else:
+                runs.append([bucket])
+
+        for run in runs:
+            run_start, run_end = run[0][0], run[-1][1]
+            columns = await fetch(_from_epoch(run_start, start), _from_epoch(run_end, start))
+
+            # Rows are time-sorted, so each bucket is a contiguous slice
+            split: Dict[int, Columns] = {
+                bucket_start: slice_columns(columns, bucket_start * 10**9, bucket_end * 10**9)
+                for bucket_start, bucket_end in run
+            }
+
+            try:
+                pipeline = self.redis_client.pipeline()
+                for bucket_start, bucket_columns in split.items():
+                    pipeline.set(self._key(namespace, symbol, interval, bucket_start), encode_columns(bucket_columns))
+                pipeline.execute()
+            except Exception as e:
+                print(f"Time-series cache write error: {e}")
+
+            by_bucket.update(split)
+
+        # Trailing buckets may still change: query only the part we need, never cache it
+        open_buckets = [bucket for bucket in buckets if bucket[1] > horizon]
+        if open_buckets:
+            live_start = max(_epoch(start), open_buckets[0][0])
+            by_bucket[open_buckets[0][0]] = await fetch(_from_epoch(live_start, start), end)
+
+        stitched = concat_columns([by_bucket[bucket_start] for bucket_start, _ in buckets if bucket_start in by_bucket])
+        return slice_columns(stitched, epoch_ns(start), epoch_ns(end))
+
+    def invalidate_range(self, namespace: str, symbol: str, start: datetime, end: datetime) -> int:
+        """Drop the cached buckets of every interval that overlap [start, end]"""
+        keys = [
+            self._key(namespace, symbol, interval, bucket_start)
+            for interval in BUCKET_SPANS
+            for bucket_start, _ in self._buckets(interval, start, end + timedelta(microseconds=1))
+        ]
+        try:
+            return self.redis_client.delete(*keys) if keys else 0
+        except Exception as e:
+            print(f"Time-series cache invalidate error: {e}")
+            return 0
+
+    def invalidate(self, namespace: str, symbol: str, interval: Optional[str] = None) -> int:
+        """Drop cached buckets for a symbol, e.g. after a historical backfill"""
+        pattern = f"{self.prefix}:{namespace}:{symbol.upper()}:{interval or '*'}:*"
+        try:
+            keys = list(self.redis_client.scan_iter(match=pattern))
+            return self.redis_client.delete(*keys) if keys else 0
+        except Exception as e:
+            print(f"Time-series cache invalidate error: {e}")
+            return 0
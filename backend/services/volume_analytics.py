@@ -0,0 +1,226 @@
+import numpy as np
+from typing import Dict, Any, Optional, Sequence
+from datetime import datetime, timezone
+
+from services.timeseries_backends.columns import Columns
+
+# NSE sessions are defined in IST; sessions and time-of-day slots are cut in this zone
+IST_OFFSET_NS = np.int64((5 * 60 + 30) * 60 * 10**9)
+DAY_NS = np.int64(24 * 60 * 60 * 10**9)
+MINUTE_NS = np.int64(60 * 10**9)
+
+def _session_ids(timestamps: np.ndarray) -> np.ndarray:
+    """IST calendar day of each timestamp, as days since epoch"""
+    return (timestamps + IST_OFFSET_NS) // DAY_NS
+
+def _group_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum that restarts at every index where starts is True"""
+    total = np.cumsum(values)
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(values)), 0))
+    return total - (total - values)[group_start]
+
+def typical_price(columns: Columns) -> np.ndarray:
+    """(high + low + close) / 3, falling back to close when the range is missing"""
+    close = columns["close"]
+    high = columns.get("high", close)
+    low = columns.get("low", close)
+    return np.where(np.isnan(high) | np.isnan(low), close, (high + low + close) / 3)
+
+def session_vwap(columns: Columns, band_multipliers: Sequence[float] = (1.0, 2.0)) -> Dict[str, np.ndarray]:
+    """Session-anchored VWAP with volume-weighted standard deviation bands"""
+    timestamps = columns["timestamp"]
+    price = typical_price(columns)
+    volume = np.nan_to_num(columns["volume"])
+
+    sessions = _session_ids(timestamps)
+    starts = np.empty(len(sessions), dtype=bool)
+    if len(sessions):
+        starts[0] = True
+        starts[1:] = sessions[1:] != sessions[:-1]
+
+    cum_volume = _group_cumsum(volume, starts)
+    cum_pv = _group_cumsum(price * volume, starts)
+    cum_p2v = _group_cumsum(price * price * volume, starts)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.where(cum_volume > 0, cum_pv / cum_volume, price)
+        variance = np.where(cum_volume > 0, cum_p2v / cum_volume - vwap * vwap, 0.0)
+    deviation = np.sqrt(np.maximum(variance, 0.0))
+
+    result = {"timestamp": timestamps, "vwap": vwap, "deviation": deviation}
+    for multiplier in band_multipliers:
+        result[f"upper_{multiplier:g}"] = vwap + multiplier * deviation
+        result[f"lower_{multiplier:g}"] = vwap - multiplier * deviation
+    return result
+
+def volume_profile(columns: Columns, bins: int = 24, value_area: float = 0.70) -> Dict[str, Any]:
+    """Volume-by-price histogram with point of control and value area"""
+    price = typical_price(columns)
+    volume = np.nan_to_num(columns["volume"])
+    valid = ~np.isnan(price)
+    if not valid.any():
+        return {}
+
+    histogram, edges = np.histogram(price[valid], bins=bins, weights=volume[valid])
+    total = histogram.sum()
+    poc = int(np.argmax(histogram))
+
+    # Grow the value area outward from the POC, taking the heavier neighbour each step
+    low, high = poc, poc
+    covered = histogram[poc]
+    while total > 0 and covered / total < value_area and (low > 0 or high < bins - 1):
+        below = histogram[low - 1] if low > 0 else -1.0
+        above = histogram[high + 1] if high < bins - 1 else -1.0
+        if above >= below:
+            high += 1
+            covered += above
+        else:
+            low -= 1
+            covered += below
+
+    centers = (edges[:-1] + edges[1:]) / 2
+    return {
+        "price_levels": centers,
+        "volume": histogram,
+        "point_of_control": float(centers[poc]),
+        "value_area_low": float(edges[low]),
+        "value_area_high": float(edges[high + 1]),
+        "total_volume": float(total)
+    }
+
+def relative_volume(columns: Columns, lookback_days: int = 20, slot_minutes: int = 5) -> Dict[str, Any]:
+    """Cumulative volume at each time-of-day slot against the average of the previous N sessions"""
+    timestamps = columns["timestamp"]
+    volume = np.nan_to_num(columns["volume"])
+    if len(timestamps) == 0:
+        return {}
+
+    local = timestamps + IST_OFFSET_NS
+    day_ids = local // DAY_NS
+    slot_ns = np.int64(slot_minutes) * MINUTE_NS
+    slots = (local % DAY_NS) // slot_ns
+    days, day_index = np.unique(day_ids, return_inverse=True)
+
+    # days x slots matrix of volume, then cumulative through each session
+    grid = np.zeros((len(days), int(DAY_NS // slot_ns)))
+    np.add.at(grid, (day_index, slots), volume)
+    cumulative = np.cumsum(grid, axis=1)
+
+    # Baseline for day d: mean cumulative volume of days d-N .. d-1 at the same slot
+    running = np.vstack([np.zeros((1, grid.shape[1])), np.cumsum(cumulative, axis=0)])
+    day_numbers = np.arange(len(days))
+    window_start = np.maximum(day_numbers - lookback_days, 0)
+    window_size = (day_numbers - window_start)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        baseline = (running[day_numbers] - running[window_start]) / window_size
+        ratio = np.where(baseline > 0, cumulative / baseline, np.nan)
+
+    # Report the latest session up to the last slot that traded
+    last_slot = int(slots[day_index == len(days) - 1].max())
+    return {
+        "session": datetime.fromtimestamp(int(days[-1]) * 86400, timezone.utc).date().isoformat(),
+        "baseline_days": int(min(lookback_days, len(days) - 1)),
+        "slot_minutes": slot_minutes,
+        "relative_volume": float(ratio[-1, last_slot]) if not np.isnan(ratio[-1, last_slot]) else None,
+        "cumulative_volume": cumulative[-1, :last_slot + 1],
+        "baseline_volume": baseline[-1, :last_slot + 1],
+        "slot_ratio": ratio[-1, :last_slot + 1]
+    }
+
+def rolling_slope(values: np.ndarray, window: int) -> np.ndarray:
+    """Least-squares slope of each trailing window (NaN until the window fills)
+
+    Uses running sums, so the cost is O(n) regardless of window length.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    slopes = np.full(n, np.nan)
+    if window < 2 or n < window:
+        return slopes
+
+    index = np.arange(n, dtype=float)
+    sum_y = np.concatenate([[0.0], np.cumsum(values)])
+    sum_iy = np.concatenate([[0.0], np.cumsum(index * values)])
+
+    ends = np.arange(window, n + 1)
+    starts = ends - window
+    window_y = sum_y[ends] - sum_y[starts]
+    # x runs 0..window-1 inside every window, so shift i*y by the window start
+    window_xy = (sum_iy[ends] - sum_iy[starts]) - starts * window_y
+
+    sum_x = window * (window - 1) / 2
+    sum_x2 = (window - 1) * window * (2 * window - 1) / 6
+    slopes[window - 1:] = (window * window_xy - sum_x * window_y) / (window * sum_x2 - sum_x * sum_x)
+    return slopes
+
+def volume_summary(volume: np.ndarray) -> Dict[str, Any]:
+    """Average/max/min and overall least-squares trend of a volume series"""
+    volume = np.asarray(volume, dtype=float)
+    volume = volume[~np.isnan(volume)]
+    if len(volume) == 0:
+        return {}
+
+    slope = rolling_slope(volume, len(volume))[-1] if len(volume) > 1 else 0.0
+    return {
+        "average_volume": float(volume.mean()),
+        "max_volume": float(volume.max()),
+        "min_volume": float(volume.min()),
+        "slope": float(slope),
+        "volume_trend": "increasing" if slope > 0 else "decreasing" if slope < 0 else "stable"
+    }
+
+def _jsonable(value: Any) -> Any:
+    """Arrays to lists and numpy scalars to Python ones, with NaN/inf as None (JSON has neither)"""
+    if isinstance(value, np.ndarray):
+        return [float(item) if np.isfinite(item) else None for item in value.astype(float)]
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+class VolumeAnalytics:
+    """Vectorized volume analytics over columnar price/volume arrays"""
+
+    def __init__(self, profile_bins: int = 24, lookback_days: int = 20,
+                 slot_minutes: int = 5, slope_window: int = 20):
+        self.profile_bins = profile_bins
+        self.lookback_days = lookback_days
+        self.slot_minutes = slot_minutes
+        self.slope_window = slope_window
+
+    def analyze(self, columns: Columns, sections: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+        """Run the requested analyses (all by default) for one symbol"""
+        if len(columns.get("timestamp", [])) == 0 or "volume" not in columns:
+            return {}
+
+        sections = sections or ["summary", "vwap", "profile", "relative_volume", "slope"]
+        result: Dict[str, Any] = {}
+
+        if "summary" in sections:
+            result["summary"] = volume_summary(columns["volume"])
+        if "vwap" in sections and "close" in columns:
+            vwap = session_vwap(columns)
+            result["vwap"] = {key: value[-1] for key, value in vwap.items() if key != "timestamp"}
+            result["vwap"]["series"] = vwap["vwap"]
+        if "profile" in sections and "close" in columns:
+            result["volume_profile"] = volume_profile(columns, bins=self.profile_bins)
+        if "relative_volume" in sections:
+            result["relative_volume"] = relative_volume(
+                columns, lookback_days=self.lookback_days, slot_minutes=self.slot_minutes
+            )
+        if "slope" in sections:
+            result["volume_slope"] = rolling_slope(
+                np.nan_to_num(columns["volume"]), min(self.slope_window, len(columns["volume"]))
+            )
+
+        return _jsonable(result)
+
+    def analyze_many(self, columns_by_symbol: Dict[str, Columns],
+                     sections: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return {symbol: self.analyze(columns, sections) for symbol, columns in columns_by_symbol.items()}
+
+# Create global volume analytics instance
+volume_analytics = VolumeAnalytics()
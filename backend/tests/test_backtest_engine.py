@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from services.backtest_engine import BacktestEngine
+
+def _simulate(bar, open_known: bool = True, slippage: float = 0.0):
+    """Enter at bar 0's close of 100 with a 5% stop and 10% target, then trade through `bar`"""
+    opens, highs, lows, closes = (np.array(column, dtype=float) for column in zip(
+        (100, 100, 100, 100), (100, 101, 99, 100), bar, (100, 100, 100, 100)
+    ))
+    entries = np.array([True, False, False, False])
+    engine = BacktestEngine(commission_percent=0, slippage_percent=slippage)
+    result = engine.simulate(
+        np.arange(4, dtype=np.int64) * 86400 * 10**9, closes, entries, np.zeros(4, dtype=bool), 10000.0,
+        {"stop_loss": 5, "take_profit": 10}, highs, lows, open=opens if open_known else None
+    )
+    return result["trades"][0]
+
+@pytest.mark.parametrize("bar, price, reason", [
+    ((99, 100, 94, 96), 95.0, "stop_loss"),
+    # Gapping through a level fills at the open, not at the level
+    ((93, 94, 92, 93), 93.0, "stop_loss"),
+    ((104, 111, 103, 108), 110.0, "take_profit"),
+    ((112, 113, 111, 112), 112.0, "take_profit"),
+])
+def test_stops_and_targets_fill_at_the_level_or_the_gap_open(bar, price, reason):
+    trade = _simulate(bar)
+
+    assert trade["exit_reason"] == reason
+    assert trade["exit_index"] == 2
+    assert trade["exit_price"] == pytest.approx(price)
+
+def test_stop_and_target_exits_pay_slippage():
+    stop = _simulate((93, 94, 92, 93), slippage=1)
+    target = _simulate((104, 112, 103, 108), slippage=1)
+
+    # Levels are set off the slipped entry price of 101
+    assert stop["entry_price"] == pytest.approx(101.0)
+    assert stop["exit_price"] == pytest.approx(93 * 0.99)
+    assert target["exit_price"] == pytest.approx(101 * 1.1 * 0.99)
+
+def test_without_opens_a_gap_fills_at_the_level():
+    assert _simulate((93, 94, 92, 93), open_known=False)["exit_price"] == pytest.approx(95.0)
@@ -0,0 +1,74 @@
+import json
+
+import numpy as np
+import pytest
+
+from services.backtest_engine import BacktestEngine, generate_signals
+
+def _trade_order(trade):
+    # Symbols entering on the same bar may come out in either order
+    return trade["entry_index"], trade["symbol"]
+
+METRICS = ["total_return", "annualized_return", "sharpe_ratio", "max_drawdown", "win_rate", "total_trades"]
+
+def _panel(length: int = 300, symbols: int = 3, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, (length, symbols)), axis=0))
+    return {
+        "timestamps": np.datetime64("2023-01-02", "ns").astype(np.int64) + np.arange(length, dtype=np.int64) * 86400 * 10**9,
+        "close": close,
+        "high": close * (1 + rng.uniform(0, 0.02, close.shape)),
+        "low": close * (1 - rng.uniform(0, 0.02, close.shape))
+    }
+
+def _extend(engine, panel, entries, exits, split, risk_management):
+    """Run rows [0, split], then resume from the stored state over [split, end) the way the extend job does"""
+    symbols = ["A", "B", "C"]
+    first = engine.simulate(
+        panel["timestamps"][:split + 1], panel["close"][:split + 1], entries[:split + 1], exits[:split + 1],
+        100000, risk_management, panel["high"][:split + 1], panel["low"][:split + 1], symbols
+    )
+    # The state is persisted as JSON, so it must survive the round trip
+    state = json.loads(json.dumps(first["state"]))
+    second = engine.simulate(
+        panel["timestamps"][split:], panel["close"][split:], entries[split:], exits[split:],
+        100000, risk_management, panel["high"][split:], panel["low"][split:], symbols, resume=state
+    )
+    trades = sorted(
+        [trade for trade in first["trades"] if trade["exit_index"] < state["offset"]] + second["trades"],
+        key=lambda trade: trade["entry_index"]
+    )
+    return dict(
+        second,
+        equity=np.concatenate([first["equity"][:-1], second["equity"]]),
+        trades=trades,
+        monthly_returns=dict(first["monthly_returns"], **second["monthly_returns"])
+    )
+
+@pytest.mark.parametrize("risk_management", [None, {"stop_loss": 4, "take_profit": 8, "position_size": 50}])
+@pytest.mark.parametrize("split", [60, 150, 298])
+def test_extend_matches_full_run(split, risk_management):
+    engine = BacktestEngine()
+    panel = _panel()
+    entries, exits = generate_signals(
+        "moving_average_crossover", panel, {"short_period": 5, "long_period": 20}
+    )
+    full = engine.simulate(
+        panel["timestamps"], panel["close"], entries, exits, 100000, risk_management,
+        panel["high"], panel["low"], ["A", "B", "C"]
+    )
+
+    extended = _extend(engine, panel, entries, exits, split, risk_management)
+
+    assert full["total_trades"] > 0
+    np.testing.assert_allclose(extended["equity"], full["equity"], rtol=1e-9)
+    for metric in METRICS:
+        assert extended[metric] == pytest.approx(full[metric], rel=1e-9, abs=1e-9), metric
+    assert extended["monthly_returns"] == pytest.approx(full["monthly_returns"])
+    assert len(extended["trades"]) == len(full["trades"])
+    for ours, theirs in zip(sorted(extended["trades"], key=_trade_order), sorted(full["trades"], key=_trade_order)):
+        assert ours.keys() == theirs.keys()
+        for key, value in theirs.items():
+            assert ours[key] == (pytest.approx(value) if isinstance(value, float) else value), key
+    for symbol, metrics in full["per_symbol"].items():
+        assert extended["per_symbol"][symbol] == pytest.approx(metrics), symbol
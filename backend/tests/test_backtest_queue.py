@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from config import settings
+from services.backtest_queue import BacktestQueue, BacktestWorker, LeaseLost
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(settings, "BACKTEST_JOBS_PER_USER", 2)
+    monkeypatch.setattr(settings, "BACKTEST_MAX_QUEUED_PER_USER", 10)
+    monkeypatch.setattr(settings, "BACKTEST_JOB_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "BACKTEST_JOB_LEASE_SECONDS", 30)
+    return BacktestQueue(redis_client=fakeredis.FakeRedis(decode_responses=True), prefix="test")
+
+def _enqueue(queue: BacktestQueue, user_id: int = 1, priority: int = 0):
+    return queue.enqueue(user_id, 7, "backtest", json.dumps({"symbols": ["INFY"]}), priority)
+
+def _active(queue: BacktestQueue, user_id: int = 1) -> int:
+    return int(queue.redis_client.hget(queue._key("active"), user_id) or 0)
+
+def _expire_leases(queue: BacktestQueue):
+    for job_id in queue.redis_client.zrange(queue._key("running"), 0, -1):
+        queue.redis_client.zadd(queue._key("running"), {job_id: 0})
+
+def test_claim_follows_priority_then_fifo(queue):
+    first = _enqueue(queue)
+    urgent = _enqueue(queue, priority=5)
+    second = _enqueue(queue)
+
+    claimed = [queue.claim("worker")["job_id"] for _ in range(2)]
+
+    assert claimed == [urgent["job_id"], first["job_id"]]
+    assert queue.get(second["job_id"])["status"] == "queued"
+
+def test_claim_respects_the_per_user_running_limit(queue):
+    jobs = [_enqueue(queue) for _ in range(3)]
+    other = _enqueue(queue, user_id=2)
+
+    claimed = [queue.claim("worker") for _ in range(4)]
+
+    assert [job["job_id"] for job in claimed if job] == [jobs[0]["job_id"], jobs[1]["job_id"], other["job_id"]]
+    assert _active(queue) == 2 and _active(queue, 2) == 1
+
+    job = queue.get(jobs[0]["job_id"])
+    assert queue.finish(claimed[0], "completed", {"total_return": 1.5})
+    assert _active(queue) == 1
+    assert queue.get(job["job_id"])["result"] == {"total_return": 1.5}
+    assert queue.claim("worker")["job_id"] == jobs[2]["job_id"]
+
+def test_expired_lease_requeues_and_fences_the_old_attempt(queue):
+    _enqueue(queue)
+    stale = queue.claim("worker-a")
+    _expire_leases(queue)
+
+    assert queue.requeue_expired() == 1
+    assert _active(queue) == 0
+    assert queue.get(stale["job_id"])["status"] == "queued"
+
+    with pytest.raises(LeaseLost):
+        queue.heartbeat(stale)
+    # The old attempt finishing late neither decrements the count again nor overwrites the job
+    assert not queue.finish(stale, "completed", {"total_return": -1})
+    assert _active(queue) == 0
+
+    fresh = queue.claim("worker-b")
+    assert fresh["job_id"] == stale["job_id"] and fresh["attempts"] == 2
+    assert not queue.finish(stale, "failed", error="late")
+    assert queue.get(fresh["job_id"])["status"] == "running"
+
+    assert queue.finish(fresh, "completed", {"total_return": 2.0})
+    assert _active(queue) == 0
+    assert queue.get(fresh["job_id"])["result"] == {"total_return": 2.0}
+
+def test_requeue_skips_leases_renewed_meanwhile(queue):
+    _enqueue(queue)
+    job = queue.claim("worker")
+
+    assert queue.heartbeat(job) is False
+    assert queue.requeue_expired() == 0
+    assert _active(queue) == 1
+
+def test_jobs_fail_after_max_attempts(queue):
+    job = _enqueue(queue)
+    for _ in range(3):
+        queue.claim("worker")
+        _expire_leases(queue)
+        queue.requeue_expired()
+
+    finished = queue.get(job["job_id"])
+    assert finished["status"] == "failed" and finished["attempts"] == 3
+    assert _active(queue) == 0
+    assert queue.claim("worker") is None
+
+def test_cancel_queued_and_running_jobs(queue):
+    queued = _enqueue(queue)
+    assert queue.cancel(queued["job_id"], 1)["status"] == "cancelled"
+    assert queue.cancel(queued["job_id"], 2) is None
+
+    running = _enqueue(queue)
+    job = queue.claim("worker")
+    assert queue.cancel(running["job_id"], 1)["status"] == "running"
+    assert queue.heartbeat(job) is True
+    assert queue.progress(job, 0.5) is True
+
+def test_worker_stops_an_attempt_that_lost_its_lease(queue, monkeypatch):
+    monkeypatch.setattr(settings, "BACKTEST_JOB_LEASE_SECONDS", 1)
+    _enqueue(queue)
+    job = queue.claim("worker-a")
+    stopped = asyncio.Event()
+
+    async def run_job(job, progress):
+        # Another worker reaps the lease while this attempt is still running
+        _expire_leases(queue)
+        queue.requeue_expired()
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            stopped.set()
+            raise
+        return {"total_return": -1}
+
+    worker = BacktestWorker(run_job, queue=queue)
+    asyncio.run(asyncio.wait_for(worker.execute(job), 3))
+
+    assert stopped.is_set()
+    assert queue.get(job["job_id"])["status"] == "queued"
+    assert _active(queue) == 0
+    assert queue.get(job["job_id"])["result"] is None
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from services.backtest_engine import BacktestEngine
+from services.condition_compiler import ConditionCompiler
+
+def _prices(length: int = 50):
+    close = np.linspace(100, 160, length)
+    volume = np.full(length, 100.0)
+    volume[30] = 200.0
+    return {"close": close, "volume": volume}
+
+def test_volume_condition_reads_the_volume_series():
+    prices = _prices()
+    plan = ConditionCompiler().compile({"entry": "volume > 150", "exit": "volume < 150"})
+
+    signals = plan.evaluate(prices)
+
+    assert np.flatnonzero(signals["entry"]).tolist() == [30]
+    assert not signals["exit"][30]
+    assert signals["exit"].sum() == len(prices["close"]) - 1
+
+def test_volume_combines_with_price_conditions():
+    prices = _prices()
+    plan = ConditionCompiler().compile({"entry": "volume > 150 and close > 200"})
+
+    assert not plan.evaluate(prices)["entry"].any()
+
+def test_missing_series_raises_instead_of_falling_back_to_close():
+    plan = ConditionCompiler().compile({"entry": "volume > 150"})
+
+    with pytest.raises(ValueError, match="volume"):
+        plan.evaluate({"close": _prices()["close"]})
+
+def test_backtest_enters_on_the_volume_spike():
+    prices = _prices()
+    timestamps = np.arange(len(prices["close"]), dtype=np.int64) * 86400 * 10**9
+
+    result = BacktestEngine().run(
+        timestamps, prices["close"], 100000,
+        conditions={"entry": "volume > 150", "exit": "volume < 150"},
+        volume=prices["volume"]
+    )
+
+    assert [trade["entry_index"] for trade in result["trades"]] == [30]
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+
+from services.event_backtester import EventBacktester, EventStream, FillModel
+
+MINUTE = 60 * 10**9
+# 09:15 IST on two consecutive sessions
+SESSION = int(np.datetime64("2024-01-02T03:45", "ns").astype(np.int64))
+NEXT_SESSION = SESSION + 86400 * 10**9
+
+def _model(**overrides) -> FillModel:
+    # Frictionless unless a test turns a feature on
+    options = dict(latency_ms=0, slippage_percent=0, participation_percent=0, circuit_percent=0)
+    options.update(overrides)
+    return FillModel(**options)
+
+def _run(model: FillModel, bars, entries=(), exits=(), risk_management=None, timestamps=None,
+         capital: float = 10000.0):
+    """Backtest one symbol over (open, high, low, close) rows with signals on the given bar indices"""
+    opens, highs, lows, closes = (np.array(column, dtype=float) for column in zip(*[row[:4] for row in bars]))
+    if timestamps is None:
+        timestamps = SESSION + np.arange(len(bars), dtype=np.int64) * MINUTE
+    volume = np.array([row[4] if len(row) > 4 else np.nan for row in bars], dtype=float)
+    stream = EventStream(timestamps, closes, highs, lows, opens, volume, MINUTE, model.circuit)
+    entry_signals = np.zeros((len(bars), 1), dtype=bool)
+    exit_signals = np.zeros((len(bars), 1), dtype=bool)
+    entry_signals[list(entries), 0] = True
+    exit_signals[list(exits), 0] = True
+    engine = EventBacktester(model, commission_percent=0, slippage_percent=0)
+    return engine.run_stream(stream, entry_signals, exit_signals, capital, risk_management)
+
+def _minute(index: int, start: int = SESSION) -> str:
+    return str(np.datetime64(start + index * MINUTE, "ns"))
+
+FLAT = [(100, 100, 100, 100)] * 6
+
+@pytest.mark.parametrize("latency_ms, price, entry_bar", [
+    # The signal is known when bar 0 closes, which is when bar 1 opens
+    (0, 100.0, 1),
+    # Arriving half way through bar 1: price interpolated from its open to its close
+    (30000, 105.0, 1),
+    (90000, 115.0, 2),
+])
+def test_latency_delays_entry_into_the_bar(latency_ms, price, entry_bar):
+    bars = [(100, 100, 100, 100), (100, 110, 100, 110), (110, 120, 110, 120), (120, 120, 120, 120)]
+
+    result = _run(_model(latency_ms=latency_ms), bars, entries=[0])
+
+    (trade,) = result["trades"]
+    assert trade["entry_price"] == pytest.approx(price)
+    assert trade["entry_time"] == _minute(entry_bar)
+    # Sized on the signal bar's close
+    assert trade["shares"] == 100
+    assert trade["exit_reason"] == "end_of_data" and trade["exit_price"] == 120
+
+def test_participation_limit_splits_an_order_into_partial_fills():
+    # 10% of 400 shares of volume: 40 shares per bar
+    bars = [(100, 100, 100, 100, 400), (100, 100, 100, 100, 400), (101, 101, 101, 101, 400),
+            (102, 102, 102, 102, 0), (103, 103, 103, 103, 400), (104, 104, 104, 104, 400)]
+
+    result = _run(_model(participation_percent=10), bars, entries=[0], capital=10000.0)
+
+    (trade,) = result["trades"]
+    # 100 shares: 40 at bar 1, 40 at bar 2, none on the empty bar 3, the last 20 at bar 4
+    assert trade["shares"] == 100
+    assert trade["entry_price"] == pytest.approx((40 * 100 + 40 * 101 + 20 * 103) / 100)
+    assert trade["fills"] == 4
+    assert result["per_symbol"]["symbol_0"]["total_trades"] == 1
+
+def test_slippage_and_impact_move_the_fill_price():
+    bars = [(100, 100, 100, 100, 1000), (100, 100, 100, 100, 1000), (100, 100, 100, 100, 1000)]
+
+    result = _run(_model(slippage_percent=1, impact_percent=10), bars, entries=[0], capital=10100.0)
+
+    (trade,) = result["trades"]
+    assert trade["shares"] == 100
+    # 1% slippage plus 10% impact scaled by 100 of 1000 shares traded
+    assert trade["entry_price"] == pytest.approx(102.0)
+    assert trade["exit_price"] == pytest.approx(99.0)
+
+def test_circuit_band_blocks_buys_at_the_upper_limit_and_caps_fill_prices():
+    timestamps = np.concatenate([SESSION + np.arange(2) * MINUTE, NEXT_SESSION + np.arange(3) * MINUTE])
+    bars = [
+        (100, 100, 100, 100), (100, 100, 100, 100),
+        # Next session's band is 90-110 around the last close of 100; the first bar is locked at 110
+        (110, 110, 110, 110), (108, 110, 107, 109), (109, 109, 109, 109)
+    ]
+
+    result = _run(_model(circuit_percent=10, slippage_percent=5), bars, entries=[1],
+                  risk_management={"position_size": 50}, timestamps=timestamps)
+
+    (trade,) = result["trades"]
+    assert trade["entry_time"] == _minute(1, NEXT_SESSION)
+    # 108 plus 5% slippage is above the band
+    assert trade["entry_price"] == pytest.approx(110.0)
+    assert trade["shares"] == np.floor(5000 / (100 * 1.05))
+
+@pytest.mark.parametrize("exit_bar, price, reason", [
+    # Touches the 95 stop inside the bar
+    ((99, 100, 94, 96), 95.0, "stop_loss"),
+    # Opens below the stop: fills at the open
+    ((93, 94, 92, 93), 93.0, "stop_loss"),
+    # Touches the 110 target inside the bar
+    ((104, 111, 103, 108), 110.0, "take_profit"),
+    # Opens above the target: fills at the open
+    ((112, 113, 111, 112), 112.0, "take_profit"),
+])
+def test_stops_and_targets_fill_inside_the_bar(exit_bar, price, reason):
+    bars = [(100, 100, 100, 100), (100, 101, 99, 100), (100, 101, 96, 100), exit_bar, (100, 100, 100, 100)]
+
+    result = _run(_model(), bars, entries=[0], risk_management={"stop_loss": 5, "take_profit": 10})
+
+    (trade,) = result["trades"]
+    assert trade["exit_reason"] == reason
+    assert trade["exit_price"] == pytest.approx(price)
+    assert trade["exit_time"] == _minute(3)
+    assert trade["pnl"] == pytest.approx(100 * (price - 100))
+
+def test_stop_is_checked_before_the_target_when_a_bar_touches_both():
+    bars = [(100, 100, 100, 100), (100, 100, 100, 100), (100, 111, 94, 100), (100, 100, 100, 100)]
+
+    result = _run(_model(), bars, entries=[0], risk_management={"stop_loss": 5, "take_profit": 10})
+
+    assert result["trades"][0]["exit_reason"] == "stop_loss"
+
+def test_square_off_flattens_intraday_positions_and_stops_new_entries():
+    # 09:15 to 09:24 IST; square-off at 09:20
+    bars = [(100 + index, 100 + index, 100 + index, 100 + index) for index in range(10)]
+
+    result = _run(_model(), bars, entries=[0, 6], risk_management={"square_off": "09:20"})
+
+    (trade,) = result["trades"]
+    assert trade["entry_time"] == _minute(1)
+    assert trade["exit_reason"] == "square_off"
+    assert trade["exit_time"] == _minute(5)
+    assert trade["exit_price"] == pytest.approx(105.0)
+    # Flat after the square-off, so equity no longer follows the price
+    assert result["equity"][-1] == pytest.approx(10000 + trade["pnl"])
+
+def test_exit_signal_sells_after_the_latency():
+    bars = [(100, 100, 100, 100)] * 3 + [(104, 106, 104, 106)] + [(106, 106, 106, 106)]
+
+    result = _run(_model(latency_ms=30000), bars, entries=[0], exits=[2])
+
+    (trade,) = result["trades"]
+    assert trade["exit_reason"] == "exit_signal"
+    assert trade["exit_time"] == _minute(3)
+    assert trade["exit_price"] == pytest.approx(105.0)
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+influxdb_client = pytest.importorskip("influxdb_client")
+
+from influxdb_client import InfluxDBClient, Organization
+from influxdb_client.client.tasks_api import TasksApi
+
+from services.timeseries_backends.influx import InfluxBackend
+
+class FakeInflux:
+    """Client whose task API is the real one minus the HTTP call, so request building is exercised"""
+
+    def __init__(self):
+        self.client = InfluxDBClient(url="http://localhost:8086", token="token", org="trading")
+        self.tasks = TasksApi(self.client)
+        self.tasks.find_tasks = lambda **kwargs: []
+        self.created = []
+        self.tasks.create_task = lambda task=None, **kwargs: self.created.append(task) or task
+        self.buckets = mock.Mock()
+        self.buckets.find_bucket_by_name.return_value = None
+        self.queries = []
+
+    def buckets_api(self):
+        return self.buckets
+
+    def tasks_api(self):
+        return self.tasks
+
+    def organizations_api(self):
+        api = mock.Mock()
+        api.find_organizations.return_value = [Organization(id="0123456789abcdef", name="trading")]
+        return api
+
+    def query_api(self):
+        api = mock.Mock()
+        api.query_data_frame.side_effect = lambda query, org=None: self.queries.append(query) or pd.DataFrame()
+        return api
+
+@pytest.fixture
+def backend():
+    fake = FakeInflux()
+    backend = InfluxBackend()
+    backend.influx_client = fake
+    backend.query_api = fake.query_api()
+    yield backend, fake
+    fake.client.close()
+
+def test_rollup_tasks_are_created(backend):
+    backend, fake = backend
+
+    assert asyncio.run(backend.ensure_rollups())
+
+    assert backend.rollups_ready
+    assert [task.name for task in fake.created] == [
+        f"rollup_{backend.bucket}_1h", f"rollup_{backend.bucket}_1d"
+    ]
+    assert all(task.org_id == "0123456789abcdef" for task in fake.created)
+    assert "every: 1h}" in fake.created[0].flux and "every: 1d}" in fake.created[1].flux
+    assert f'to(bucket: "{backend.bucket}_1d"' in fake.created[1].flux
+    assert f'from(bucket: "{backend.bucket}_1h")' in fake.created[1].flux
+
+def test_long_ranges_read_the_daily_rollup(backend):
+    backend, fake = backend
+    asyncio.run(backend.ensure_rollups())
+    now = datetime.utcnow()
+
+    asyncio.run(backend.query_history_columns("INFY", now - timedelta(days=400), now, "1d"))
+    asyncio.run(backend.query_history_columns("INFY", now - timedelta(days=5), now, "1h"))
+    asyncio.run(backend.query_history_columns("INFY", now - timedelta(hours=2), now, "1m"))
+
+    assert [query.split('from(bucket: "')[1].split('"')[0] for query in fake.queries] == [
+        f"{backend.bucket}_1d", f"{backend.bucket}_1h", backend.bucket
+    ]
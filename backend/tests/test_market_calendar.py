@@ -0,0 +1,18 @@
+from datetime import date, datetime, timezone
+
+from services.market_calendar import MarketCalendar
+
+# 2024-03-25 (Monday) is a holiday; NSE hours are 03:45-10:00 UTC
+calendar = MarketCalendar(holidays=["2024-03-25"])
+
+def test_session_date_during_and_after_the_session():
+    assert calendar.session_date(datetime(2024, 3, 22, 5, 0, tzinfo=timezone.utc)) == date(2024, 3, 22)
+    assert calendar.session_date(datetime(2024, 3, 22, 14, 0, tzinfo=timezone.utc)) == date(2024, 3, 22)
+
+def test_session_date_before_the_open_is_the_previous_session():
+    assert calendar.session_date(datetime(2024, 3, 26, 3, 0, tzinfo=timezone.utc)) == date(2024, 3, 22)
+
+def test_session_date_skips_weekends_and_holidays():
+    assert calendar.session_date(datetime(2024, 3, 24, 8, 0, tzinfo=timezone.utc)) == date(2024, 3, 22)
+    assert calendar.session_date(datetime(2024, 3, 25, 8, 0, tzinfo=timezone.utc)) == date(2024, 3, 22)
+    assert calendar.session_date(datetime(2024, 3, 26, 4, 0, tzinfo=timezone.utc)) == date(2024, 3, 26)
@@ -0,0 +1,105 @@
+import csv
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from models.market_data import MarketData
+from services.market_data_store import MarketDataStore, MARKET_DATA_COLUMNS, DEFAULT_PARTITION
+
+# Integration tests drop and recreate market_data, so they only run against a scratch database
+POSTGRES_URL = os.environ.get("MARKET_DATA_TEST_POSTGRES_URL")
+requires_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="MARKET_DATA_TEST_POSTGRES_URL not set")
+
+def _batch(symbol: str, timestamps, price: float):
+    return {
+        "symbol": [symbol] * len(timestamps),
+        "timestamp": list(timestamps),
+        "price": [price + index for index in range(len(timestamps))],
+        "volume": [1000] * len(timestamps),
+        "additional_data": [{"source": "test"}] * len(timestamps)
+    }
+
+def test_csv_batch_follows_copy_column_order():
+    timestamp = datetime(2024, 3, 1, 9, 15)
+    buffer = MarketDataStore(engine=None)._to_csv(
+        {"symbol": ["INFY"], "timestamp": [timestamp], "price": [1500.5], "additional_data": [{"pe": 24}]}, 1
+    )
+
+    (row,) = list(csv.reader(buffer))
+
+    assert len(row) == len(MARKET_DATA_COLUMNS)
+    values = dict(zip(MARKET_DATA_COLUMNS, row))
+    assert values["symbol"] == "INFY"
+    assert values["timestamp"] == timestamp.isoformat()
+    assert values["price"] == "1500.5"
+    assert values["additional_data"] == '{"pe": 24}'
+    # Empty unquoted fields are NULL to COPY ... (FORMAT csv)
+    assert values["volume"] == "" and values["close_price"] == ""
+
+@pytest.fixture
+def store():
+    engine = create_engine(POSTGRES_URL)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS market_data CASCADE"))
+    MarketData.__table__.create(engine)
+    yield MarketDataStore(engine=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS market_data CASCADE"))
+    engine.dispose()
+
+def _partition_of(store: MarketDataStore, symbol: str, timestamp: datetime) -> str:
+    with store.engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT tableoid::regclass::text FROM market_data WHERE symbol = :symbol AND timestamp = :timestamp"
+        ), {"symbol": symbol, "timestamp": timestamp}).scalar()
+
+@requires_postgres
+def test_bulk_insert_upserts_into_monthly_partitions(store):
+    timestamps = [datetime(2024, 1, 31, 15, 29), datetime(2024, 2, 1, 9, 15), datetime(2024, 2, 1, 9, 16)]
+
+    assert store.bulk_insert(_batch("INFY", timestamps, 100.0)) == 3
+    assert store.bulk_insert(_batch("INFY", timestamps[1:], 200.0), on_conflict="update") == 2
+    assert store.bulk_insert_rows([{"symbol": "INFY", "timestamp": timestamps[0], "price": 1.0}], on_conflict="ignore") == 1
+
+    columns = store.query_range("INFY", datetime(2024, 1, 1), datetime(2024, 3, 1))
+    assert columns["timestamp"] == timestamps
+    assert columns["price"] == [100.0, 200.0, 201.0]
+    assert columns["volume"] == [1000, 1000, 1000]
+    assert _partition_of(store, "INFY", timestamps[0]) == "market_data_2024_01"
+    assert _partition_of(store, "INFY", timestamps[1]) == "market_data_2024_02"
+
+@requires_postgres
+def test_bulk_insert_without_conflict_handling_rejects_duplicates(store):
+    timestamps = [datetime(2024, 5, 2, 9, 15)]
+    store.bulk_insert(_batch("TCS", timestamps, 3500.0), on_conflict="error")
+
+    with pytest.raises(Exception):
+        store.bulk_insert(_batch("TCS", timestamps, 3600.0), on_conflict="error")
+
+@requires_postgres
+def test_new_partition_takes_over_rows_from_the_default_partition(store):
+    store.ensure_partitions(datetime(2024, 1, 1), datetime(2024, 1, 1))
+    stranded = datetime(2024, 6, 10, 10, 0)
+    with store.engine.begin() as conn:
+        conn.execute(text("INSERT INTO market_data (symbol, timestamp, price) VALUES ('SBIN', :timestamp, 800)"),
+                     {"timestamp": stranded})
+    assert _partition_of(store, "SBIN", stranded) == DEFAULT_PARTITION
+
+    assert store.ensure_partitions(datetime(2024, 5, 1), datetime(2024, 7, 1)) == [
+        "market_data_2024_05", "market_data_2024_06", "market_data_2024_07"
+    ]
+
+    assert _partition_of(store, "SBIN", stranded) == "market_data_2024_06"
+    assert DEFAULT_PARTITION in store.list_partitions()
+
+@requires_postgres
+def test_retention_drops_whole_partitions(store):
+    store.bulk_insert(_batch("HDFC", [datetime(2020, 1, 15), datetime(2024, 1, 15)], 1600.0))
+
+    dropped = store.drop_partitions_before(datetime(2023, 1, 1))
+
+    # The batch created every month between its first and last row
+    assert sorted(dropped) == [f"market_data_{year}_{month:02d}" for year in (2020, 2021, 2022) for month in range(1, 13)]
+    assert store.query_range("HDFC", datetime(2019, 1, 1), datetime(2025, 1, 1))["timestamp"] == [datetime(2024, 1, 15)]
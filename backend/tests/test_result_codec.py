@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from services import result_codec
+from services.result_codec import (
+    encode_equity, decode_equity, encode_trades, decode_trades, encode_state, decode_state
+)
+
+TRADES = [
+    {"symbol": "INFY", "entry_index": 3, "exit_index": 9, "entry_price": 1500.25, "pnl": -12.5,
+     "exit_reason": "signal", "tags": ["swing"]},
+    {"symbol": "TCS", "entry_index": 12, "exit_index": 20, "entry_price": 3500, "pnl": 40.0,
+     "exit_reason": "stop_loss", "tags": None},
+    {"symbol": "INFY", "entry_index": 25, "exit_index": 31, "entry_price": 1510.0, "pnl": 7.75,
+     "exit_reason": "signal", "tags": []}
+]
+
+def test_equity_round_trip():
+    timestamps = np.datetime64("2024-01-01", "ns").astype(np.int64) + np.arange(500, dtype=np.int64) * 60 * 10**9
+    equity = 100000 * np.cumprod(1 + np.random.default_rng(1).normal(0, 0.001, 500))
+
+    decoded_timestamps, decoded_equity = decode_equity(encode_equity(timestamps, equity))
+
+    np.testing.assert_array_equal(decoded_timestamps, timestamps)
+    assert decoded_equity.dtype == np.float64
+    np.testing.assert_allclose(decoded_equity, equity, rtol=1e-6)
+
+def test_trades_round_trip_keeps_values_and_extra():
+    extra = {"per_symbol": {"INFY": {"total_trades": 2}}}
+
+    decoded = decode_trades(encode_trades(TRADES, extra))
+
+    assert decoded == dict(extra, trades=TRADES)
+    assert isinstance(decoded["trades"][1]["entry_price"], float)
+    assert isinstance(decoded["trades"][0]["entry_index"], int)
+
+def test_trades_round_trip_empty():
+    assert decode_trades(encode_trades([])) == {"trades": []}
+
+def test_state_round_trip():
+    state = {"position": 1, "cash": 2500.5, "entry_index": 42}
+    arrays = {"close": np.linspace(100, 110, 30), "ohlc": np.arange(40, dtype=float).reshape(10, 4)}
+
+    decoded_state, decoded_arrays = decode_state(encode_state(state, arrays))
+
+    assert decoded_state == state
+    assert decoded_arrays.keys() == arrays.keys()
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(decoded_arrays[name], values)
+
+def test_zlib_fallback_round_trip(monkeypatch):
+    monkeypatch.setattr(result_codec, "zstandard", None)
+
+    blob = encode_trades(TRADES)
+
+    assert blob[3] == result_codec.CODEC_ZLIB
+    assert decode_trades(blob)["trades"] == TRADES
+
+def test_rejects_foreign_blobs():
+    with pytest.raises(ValueError):
+        decode_equity(b"XX\x01\x01" + b"\x00" * 16)
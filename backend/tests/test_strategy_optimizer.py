@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from services.strategy_optimizer import StrategyOptimizer, grid_combinations
+
+def _panel(length: int = 400, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, length)))
+    return {
+        "timestamps": np.arange(length, dtype=np.int64) * 86400 * 10**9,
+        "close": close,
+        "high": close * 1.01,
+        "low": close * 0.99,
+        "open": np.concatenate([[close[0]], close[:-1]]),
+        "volume": rng.integers(1000, 5000, length).astype(float)
+    }
+
+def _by_parameters(rows):
+    return {tuple(sorted(row["parameters"].items())): row for row in rows}
+
+def _assert_same(pooled, single):
+    pooled, single = _by_parameters(pooled), _by_parameters(single)
+    assert pooled.keys() == single.keys()
+    for key, row in single.items():
+        for metric, value in row.items():
+            if metric != "parameters":
+                np.testing.assert_equal(pooled[key][metric], value, err_msg=f"{key} {metric}")
+
+@pytest.mark.slow
+@pytest.mark.parametrize("category, conditions", [
+    ("moving_average_crossover", None),
+    ("custom", {"entry": "close > short_ma and volume > 2000", "exit": "close < long_ma"})
+])
+def test_pool_matches_single_process(category, conditions):
+    panel = _panel()
+    space = {"short_period": [5, 10, 15, 20], "long_period": [30, 40, 50]}
+    combinations = grid_combinations(category, space)
+    pool = StrategyOptimizer(max_workers=2, chunk_size=2)
+    single = StrategyOptimizer(max_workers=1)
+    arrays = pool._arrays(panel["timestamps"], panel["close"], panel["high"], panel["low"],
+                          panel["open"], panel["volume"])
+    context = pool._context(category, 100000, None, conditions, None)
+    windows = [(0, 200), (100, 300), (200, 400)]
+
+    pooled = pool.evaluate(arrays, combinations, context, windows)
+    expected = single.evaluate(arrays, combinations, context, windows)
+
+    assert len(pooled) == len(expected) == len(windows)
+    for pooled_rows, single_rows in zip(pooled, expected):
+        _assert_same(pooled_rows, single_rows)
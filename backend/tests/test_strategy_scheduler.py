@@ -0,0 +1,97 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from services import strategy_scheduler as scheduler_module
+from services.strategy_scheduler import StrategyScheduler
+
+STRATEGY = SimpleNamespace(id=1, user_id=9, lookback=10)
+
+def _scheduler(redis_client, fetch_seconds: float) -> StrategyScheduler:
+    scheduler = StrategyScheduler(redis_client=redis_client)
+    scheduler.shards = 1
+    scheduler.lease_ms = 60
+    scheduler.groups = {"5m": {"INFY": [STRATEGY]}}
+    scheduler.fetches = 0
+
+    async def fetch_bars(symbol, interval, bars, bar_close):
+        scheduler.fetches += 1
+        # Evaluating the shard takes several lease periods
+        await asyncio.sleep(fetch_seconds)
+        return {"close": np.array([100.0])}
+
+    scheduler.fetch_bars = fetch_bars
+    scheduler.mark_executed = lambda strategy_ids, bar_close: None
+    return scheduler
+
+@pytest.fixture(autouse=True)
+def one_order(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "evaluate_group", lambda symbol, columns, strategies, bar_close: [
+        (STRATEGY, {"symbol": symbol, "action": "BUY", "quantity": 1, "price": 100.0})
+    ])
+
+def _published(redis_client):
+    return [json.loads(message) for message in redis_client.lrange("strategy:orders:1", 0, -1)]
+
+def _bar_close():
+    # Past its deadline, so run_bar stops waiting on shards other workers hold
+    return datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(hours=1)
+
+def test_lease_is_renewed_while_a_slow_shard_runs():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    first, second = _scheduler(redis_client, 0.3), _scheduler(redis_client, 0.3)
+    bar_close = _bar_close()
+
+    async def both():
+        slow = asyncio.ensure_future(first.run_bar("5m", bar_close))
+        await asyncio.sleep(0.15)
+        late = await second.run_bar("5m", bar_close)
+        return await slow, late
+
+    summary, late = asyncio.run(both())
+
+    assert summary["shards_run"] == 1 and late["shards_run"] == 0
+    assert second.fetches == 0
+    assert len(_published(redis_client)) == 1
+    assert redis_client.get(f"scheduler:lease:5m:{int(bar_close.timestamp())}:0") == "done"
+
+def test_shard_taken_over_is_not_published():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    scheduler = _scheduler(redis_client, 0.3)
+    bar_close = _bar_close()
+    key = f"scheduler:lease:5m:{int(bar_close.timestamp())}:0"
+
+    async def run():
+        task = asyncio.ensure_future(scheduler.run_bar("5m", bar_close))
+        await asyncio.sleep(0.1)
+        # Our lease lapsed (say the event loop stalled) and another worker claimed the shard
+        redis_client.set(key, "other-worker", px=60000)
+        return await task
+
+    summary = asyncio.run(run())
+
+    assert summary["shards_run"] == 0
+    assert _published(redis_client) == []
+    assert redis_client.get(key) == "other-worker"
+
+def test_lease_changes_only_apply_to_the_holder():
+    redis_client = fakeredis.FakeRedis(decode_responses=True)
+    scheduler = _scheduler(redis_client, 0)
+
+    assert scheduler.claim("lease") is True
+    assert scheduler.claim("lease") is None
+    assert scheduler.renew("lease") is True and redis_client.pttl("lease") > 0
+
+    redis_client.set("lease", "other-worker")
+    assert scheduler.renew("lease") is False
+    assert scheduler.settle("lease", done=True) is False
+    assert redis_client.get("lease") == "other-worker"
+
+    redis_client.set("lease", "done")
+    assert scheduler.claim("lease") is False
@@ -0,0 +1,29 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from services.timeseries_backends.conformance import run_conformance
+from services.timeseries_backends.embedded import EmbeddedBackend
+
+def test_embedded_backend_passes_conformance(tmp_path):
+    backend = EmbeddedBackend(str(tmp_path / "timeseries.db"))
+
+    results = asyncio.run(run_conformance(backend))
+
+    failed = [f"{check}: {detail}" for check, passed, detail in results if not passed]
+    assert not failed, failed
+
+def test_embedded_backend_stores_absent_fields_as_missing(tmp_path):
+    backend = EmbeddedBackend(str(tmp_path / "timeseries.db"))
+    start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=1)
+    asyncio.run(backend.write_prices_batch([
+        {"symbol": "TEST", "timestamp": start, "close": 10.0},
+        {"symbol": "TEST", "timestamp": start + timedelta(minutes=1), "close": 11.0, "volume": 500.0}
+    ]))
+
+    columns = asyncio.run(backend.query_history_columns("TEST", start, start + timedelta(minutes=5), "1m"))
+
+    assert columns["close"].tolist() == [10.0, 11.0]
+    assert np.isnan(columns["volume"][0]) and columns["volume"][1] == 500.0
+    assert np.isnan(columns["open"]).all()
@@ -0,0 +1,34 @@
+import json
+
+import numpy as np
+
+from services.volume_analytics import VolumeAnalytics
+
+MINUTE = 60 * 10**9
+# 09:15 IST
+SESSION = int(np.datetime64("2024-01-02T03:45", "ns").astype(np.int64))
+
+def test_analysis_with_a_missing_print_is_valid_json():
+    close = np.linspace(100, 103, 30)
+    close[-1] = np.nan
+    columns = {
+        "timestamp": SESSION + np.arange(30, dtype=np.int64) * MINUTE,
+        "close": close,
+        "volume": np.full(30, 500.0)
+    }
+
+    result = VolumeAnalytics().analyze(columns)
+
+    # The latest VWAP is a NaN numpy scalar; the response must carry neither through
+    assert result["vwap"]["vwap"] is None and result["vwap"]["series"][-1] is None
+    json.dumps(result, allow_nan=False)
+
+def test_scalars_and_arrays_become_plain_json_values():
+    result = VolumeAnalytics().analyze({
+        "timestamp": SESSION + np.arange(3, dtype=np.int64) * MINUTE,
+        "close": np.array([100.0, 101.0, 102.0]),
+        "volume": np.array([10.0, 20.0, 30.0])
+    }, sections=["vwap"])
+
+    assert isinstance(result["vwap"]["vwap"], float)
+    assert result["vwap"]["series"] == [100.0, 100 + 20 / 30, 101 + 1 / 3]
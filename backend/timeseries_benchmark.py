@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Time-Series Backend Conformance & Benchmark Script
+Run this to verify a backend returns the same results as the reference
+aggregation and to compare ingest/query speed between backends.
+
+Usage: python timeseries_benchmark.py [embedded] [influxdb]
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.timeseries_backends import get_timeseries_backend
+from services.timeseries_backends.conformance import run_conformance, run_benchmark
+
+def build_backend(name: str):
+    """Embedded runs against a throwaway file so the real store is untouched"""
+    if name == "embedded":
+        from services.timeseries_backends.embedded import EmbeddedBackend
+        return EmbeddedBackend(path=os.path.join(tempfile.mkdtemp(), "timeseries_bench.db"))
+    return get_timeseries_backend(name)
+
+async def check_backend(name: str) -> bool:
+    print(f"\n📦 Backend: {name}")
+    print("=" * 50)
+
+    try:
+        backend = build_backend(name)
+    except Exception as e:
+        print(f"❌ Could not create backend: {e}")
+        return False
+
+    passed = True
+    try:
+        print("🔍 Conformance:")
+        for check, ok, detail in await run_conformance(backend):
+            passed = passed and ok
+            print(f"   {'✅' if ok else '❌'} {check}: {detail}")
+
+        print("\n⏱️  Benchmark:")
+        for metric, value in (await run_benchmark(backend)).items():
+            print(f"   {metric}: {value:,.1f}")
+    except Exception as e:
+        print(f"❌ Backend error: {e}")
+        passed = False
+    finally:
+        await backend.close()
+
+    return passed
+
+async def main(names):
+    results = {name: await check_backend(name) for name in names}
+
+    print("\n" + "=" * 50)
+    for name, ok in results.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return all(results.values())
+
+if __name__ == "__main__":
+    backends = sys.argv[1:] or ["embedded"]
+    sys.exit(0 if asyncio.run(main(backends)) else 1)